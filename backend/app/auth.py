@@ -0,0 +1,96 @@
+# backend/app/auth.py
+import os
+import secrets
+import time
+
+import jwt
+from fastapi import HTTPException, Request
+
+from app.database.shared import shared_counters
+
+# Секрет подписи токенов. Без JWT_SECRET генерируется случайный — он
+# живёт только в памяти процесса, поэтому токены перестают действовать
+# после перезапуска, а с несколькими воркерами JWT_SECRET обязателен.
+JWT_SECRET = os.getenv('JWT_SECRET')
+_FALLBACK_SECRET = secrets.token_hex(32)
+JWT_ALGORITHM = 'HS256'
+
+# Время жизни токенов, секунд
+ACCESS_TOKEN_TTL = int(os.getenv('ACCESS_TOKEN_TTL', str(15 * 60)))
+REFRESH_TOKEN_TTL = int(os.getenv('REFRESH_TOKEN_TTL', str(7 * 24 * 60 * 60)))
+
+
+def _secret():
+    return JWT_SECRET or _FALLBACK_SECRET
+
+
+def require_secret(workers):
+    """Проверка при старте: токен, подписанный случайным секретом одного
+    воркера, другие воркеры не примут — без JWT_SECRET запуск возможен
+    только одним процессом"""
+    if JWT_SECRET:
+        return
+    if workers > 1 or shared_counters.peers:
+        raise RuntimeError('❌ С несколькими воркерами задайте JWT_SECRET')
+
+
+def _encode(user, token_type, ttl):
+    now = int(time.time())
+    payload = {
+        "sub": str(user["id"]),
+        "role": user.get("role") or "student",
+        "group": user.get("group_name"),
+        "type": token_type,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    return jwt.encode(payload, _secret(), algorithm=JWT_ALGORITHM)
+
+
+def issue_tokens(user):
+    """Выпускает пару токенов (access + refresh) для пользователя из БД"""
+    return {
+        "access_token": _encode(user, "access", ACCESS_TOKEN_TTL),
+        "refresh_token": _encode(user, "refresh", REFRESH_TOKEN_TTL),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
+
+
+def decode_token(token, token_type="access"):
+    """Проверяет подпись и срок действия токена; возвращает данные пользователя"""
+    try:
+        payload = jwt.decode(token, _secret(), algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="❌ Срок действия токена истёк")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="❌ Недействительный токен")
+
+    if payload.get("type") != token_type:
+        raise HTTPException(status_code=401, detail="❌ Недействительный токен")
+
+    return {
+        "id": int(payload["sub"]),
+        "role": payload.get("role", "student"),
+        "group_name": payload.get("group"),
+    }
+
+
+def current_user(request: Request):
+    """Зависимость FastAPI: пользователь из заголовка Authorization: Bearer <token>.
+
+    Проверка выполняется в памяти, без обращения к БД.
+    """
+    header = request.headers.get("authorization", "")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="❌ Требуется авторизация")
+    return decode_token(token.strip())
+
+
+def optional_user(request: Request):
+    """Как current_user, но без заголовка Authorization возвращает None —
+    для страниц, которые аноним видит без персональной части."""
+    if not request.headers.get("authorization"):
+        return None
+    return current_user(request)
@@ -0,0 +1,129 @@
+# backend/app/coalesce.py
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from app.metrics import registry
+
+# Объединение одинаковых одновременных чтений (single-flight)
+COALESCE_ENABLED = os.getenv('COALESCE_ENABLED', '1') != '0'
+# Сколько секунд готовый ответ отдаётся повторным запросам без чтения из БД
+COALESCE_TTL = float(os.getenv('COALESCE_TTL', '0.05'))
+# Сколько готовых ответов хранится и для скольких ключей ведётся статистика
+COALESCE_MAXSIZE = int(os.getenv('COALESCE_MAXSIZE', '1024'))
+COALESCE_STATS_KEYS = int(os.getenv('COALESCE_STATS_KEYS', '256'))
+
+
+class SingleFlight:
+    """Одно чтение на все одинаковые одновременные запросы.
+
+    Первый запрос по ключу запускает fetch отдельной задачей, остальные
+    ждут её же результат (отмена одного ожидающего не отменяет чтение).
+    Готовый результат ещё ttl секунд отдаётся без чтения (micro-TTL).
+
+    Ключ дополняется версией данных (ETag из versions): после записи
+    версия другая, и запрос не присоединяется к чтению, начатому до
+    записи, и не получает сохранённый до неё ответ. Ошибки не
+    сохраняются — следующий запрос читает заново.
+
+    Работает в пределах event loop одного воркера.
+    """
+
+    def __init__(self, name, ttl=COALESCE_TTL, maxsize=COALESCE_MAXSIZE,
+                 stats_keys=COALESCE_STATS_KEYS):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stats_keys = stats_keys
+        self._inflight = {}
+        self._recent = OrderedDict()
+        self._keys = OrderedDict()           # ключ → [чтений, присоединений, из micro-TTL]
+        self.fetches = 0
+        self.shared = 0
+        self.recent_hits = 0
+
+    async def do(self, key, version, fetch):
+        """Результат fetch() для (key, version) — общий для одновременных запросов"""
+        if not COALESCE_ENABLED:
+            return await fetch()
+
+        flight = (key, version)
+        counters = self._counters(key)
+        item = self._recent.get(flight)
+        if item is not None:
+            value, expires = item
+            if expires > time.monotonic():
+                counters[2] += 1
+                self.recent_hits += 1
+                return value
+            del self._recent[flight]
+
+        task = self._inflight.get(flight)
+        if task is not None:
+            counters[1] += 1
+            self.shared += 1
+        else:
+            counters[0] += 1
+            self.fetches += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[flight] = task
+            task.add_done_callback(lambda done: self._finish(flight, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, flight, task):
+        self._inflight.pop(flight, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.ttl > 0:
+            self._recent[flight] = (task.result(), time.monotonic() + self.ttl)
+            self._recent.move_to_end(flight)
+            while len(self._recent) > self.maxsize:
+                self._recent.popitem(last=False)
+
+    def _counters(self, key):
+        counters = self._keys.pop(key, None) or [0, 0, 0]
+        self._keys[key] = counters
+        if len(self._keys) > self.stats_keys:
+            self._keys.popitem(last=False)
+        return counters
+
+    def stats(self, top=10):
+        total = self.fetches + self.shared + self.recent_hits
+        saved = self.shared + self.recent_hits
+        keys = sorted(self._keys.items(), key=lambda item: item[1][1] + item[1][2], reverse=True)
+        return {
+            "ttl": self.ttl,
+            "inflight": len(self._inflight),
+            "recent": len(self._recent),
+            "fetches": self.fetches,
+            "shared": self.shared,
+            "recent_hits": self.recent_hits,
+            "saved_ratio": round(saved / total, 4) if total else 0.0,
+            "keys": [{"key": repr(key), "fetches": fetches, "shared": shared, "recent_hits": recent}
+                     for key, (fetches, shared, recent) in keys[:top]],
+        }
+
+
+# Горячие чтения во время открытия записи
+event_flight = SingleFlight('event')
+group_events_flight = SingleFlight('events_by_group')
+
+FLIGHTS = [event_flight, group_events_flight]
+
+
+def coalesce_stats(top=10):
+    return {flight.name: flight.stats(top) for flight in FLIGHTS}
+
+
+def _coalesce_counters():
+    values = {}
+    for flight in FLIGHTS:
+        values[(flight.name, 'fetch')] = flight.fetches
+        values[(flight.name, 'shared')] = flight.shared
+        values[(flight.name, 'recent')] = flight.recent_hits
+    return values
+
+
+registry.callback('coalesce_requests_total', 'Чтения, объединённые single-flight', 'counter',
+                  ('endpoint', 'result'), _coalesce_counters)
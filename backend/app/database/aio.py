@@ -0,0 +1,37 @@
+# backend/app/database/aio.py
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Число потоков для синхронных вызовов SQLite
+DB_THREADS = int(os.getenv('DB_THREADS', '8'))
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DB_THREADS, thread_name_prefix='db')
+    return _executor
+
+
+async def run_db(func, *args, **kwargs):
+    """Выполняет синхронный вызов к БД в ограниченном пуле потоков,
+    не блокируя event loop.
+
+        user = await run_db(UserDB.get_user_by_email, email)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Останавливает пул потоков БД"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
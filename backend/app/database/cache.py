@@ -0,0 +1,206 @@
+# backend/app/database/cache.py
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.database.shared import shared_counters
+from app.metrics import registry
+
+# Настройки кеша чтения (размер — число ключей, TTL — секунды)
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', '1') != '0'
+CACHE_TTL = float(os.getenv('CACHE_TTL', '30'))
+CACHE_MAXSIZE = int(os.getenv('CACHE_MAXSIZE', '1024'))
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кеш с ограничением размера и временем жизни записей.
+
+    Каждая запись помечена поколением своего ключа (и всего кеша) из
+    общих счётчиков shared_counters. Инвалидация увеличивает счётчик,
+    поэтому её видят все процессы-воркеры, а значение, прочитанное из
+    БД до инвалидации, в кеш не попадает (или не будет из него выдано).
+    """
+
+    def __init__(self, name, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Возвращает (найдено, значение)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires, generation = item
+                if expires > time.monotonic() and generation == self.generation(key):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def generation(self, key):
+        return (shared_counters.get(shared_counters.slot(self.name, key)),
+                shared_counters.get(shared_counters.slot(self.name)))
+
+    def set(self, key, value, generation=None):
+        """Кладёт значение; если с момента generation была инвалидация — пропускает"""
+        current = self.generation(key)
+        if generation is not None and generation != current:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl, current)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        for key in keys:
+            shared_counters.bump(shared_counters.slot(self.name, key))
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        shared_counters.bump(shared_counters.slot(self.name))
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+def cached(cache):
+    """Кеширует результат функции по её позиционным аргументам"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not CACHE_ENABLED:
+                return func(*args)
+            found, value = cache.get(args)
+            if found:
+                return value
+            generation = cache.generation(args)
+            value = func(*args)
+            cache.set(args, value, generation)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+# Кеши горячих чтений. Значения общие для всех вызывающих — не изменять.
+groups_cache = TTLCache('groups', maxsize=1, ttl=float(os.getenv('CACHE_GROUPS_TTL', '3600')))
+group_events_cache = TTLCache('events_by_group', maxsize=256)
+event_cache = TTLCache('event')
+slots_cache = TTLCache('slots_by_event')
+
+CACHES = [groups_cache, group_events_cache, event_cache, slots_cache]
+
+
+class Versions:
+    """Версии данных для ETag: счётчики по (область, ключ), которые
+    увеличиваются при каждой записи. Счётчики общие для всех воркеров;
+    токен запуска делает ETag недействительными после перезапуска сервиса."""
+
+    @property
+    def boot(self):
+        return shared_counters.token
+
+    def get(self, scope, key=None):
+        return shared_counters.get(shared_counters.slot('version', scope, key))
+
+    def bump(self, scope, key=None):
+        shared_counters.bump(shared_counters.slot('version', scope, key))
+
+    def etag(self, *parts):
+        """Сильный ETag из текущих версий пар (область, ключ)"""
+        tags = '|'.join(f'{scope}:{key}:{self.get(scope, key)}' for scope, key in parts)
+        digest = hashlib.blake2b(tags.encode(), digest_size=8).hexdigest()
+        return f'"{self.boot}-{digest}"'
+
+
+versions = Versions()
+
+
+def invalidate_event(event_id, group_name=None):
+    """Сбрасывает всё, что зависит от мероприятия: его данные, слоты и список группы"""
+    event_cache.invalidate((event_id,))
+    invalidate_slots(event_id)
+    if group_name is not None:
+        invalidate_group(group_name)
+    # Название и время мероприятия входят в списки записей пользователей
+    versions.bump('catalog')
+
+
+def invalidate_slots(event_id):
+    slots_cache.invalidate((event_id,))
+    versions.bump('event', event_id)
+
+
+def invalidate_availability(event_id, group_name, organizer_id):
+    """Изменились счётчики свободных и занятых слотов: они есть в строке
+    мероприятия, в списке группы и в профиле организатора"""
+    event_cache.invalidate((event_id,))
+    invalidate_slots(event_id)
+    invalidate_group(group_name)
+    invalidate_user(organizer_id)
+
+
+def invalidate_waitlist(event_id):
+    """Изменилась очередь ожидания: данных в кеше нет, только версия мероприятия"""
+    versions.bump('event', event_id)
+
+
+def invalidate_group(group_name):
+    group_events_cache.invalidate((group_name,))
+    versions.bump('group', group_name)
+
+
+def invalidate_user(user_id):
+    """Изменились данные пользователя: роль, записи или созданные мероприятия
+    (кеша нет, только версия для ETag)"""
+    versions.bump('user', user_id)
+
+
+def cache_stats():
+    return {cache.name: cache.stats() for cache in CACHES}
+
+
+def clear_caches():
+    for cache in CACHES:
+        cache.clear()
+
+
+def _cache_counters():
+    values = {}
+    for cache in CACHES:
+        values[(cache.name, 'hit')] = cache.hits
+        values[(cache.name, 'miss')] = cache.misses
+    return values
+
+
+registry.callback('cache_requests_total', 'Обращения к кешу чтения', 'counter',
+                  ('cache', 'result'), _cache_counters)
+registry.callback('cache_entries', 'Записей в кеше чтения', 'gauge',
+                  ('cache',), lambda: {(cache.name,): len(cache._data) for cache in CACHES})
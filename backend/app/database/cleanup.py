@@ -0,0 +1,107 @@
+# backend/app/database/cleanup.py
+"""Поиск и удаление «висячих» строк — ссылок на удалённые строки — и
+проверка счётчиков слотов мероприятий.
+
+Пока внешние ключи не проверялись, удаление пользователя оставляло слоты
+его мероприятий, чужие записи на них и занятые им слоты чужих
+мероприятий. Миграция 6 один раз чистит БД перед включением ON DELETE
+CASCADE; скрипт нужен для БД, которые правились в обход приложения
+(без PRAGMA foreign_keys). Там же могут разойтись с time_slots счётчики
+events.free_slots/booked_slots — скрипт пересчитывает их.
+
+    cd backend
+    python -m app.database.cleanup          # только отчёт
+    python -m app.database.cleanup --apply  # удалить и пересчитать
+"""
+import argparse
+
+# (таблица, условие висячей строки) — в порядке удаления: сначала родители
+ORPHANS = [
+    ('events', 'organizer_id NOT IN (SELECT id FROM users)'),
+    ('time_slots', 'event_id NOT IN (SELECT id FROM events)'),
+    ('registrations', 'user_id NOT IN (SELECT id FROM users)'
+                      ' OR event_id NOT IN (SELECT id FROM events)'
+                      ' OR time_slot_id NOT IN (SELECT id FROM time_slots)'),
+    ('waitlist', 'user_id NOT IN (SELECT id FROM users)'
+                 ' OR event_id NOT IN (SELECT id FROM events)'),
+]
+
+# Слоты, занятые записью, которой больше нет
+STALE_SLOTS = ('is_available = 0'
+               ' AND id NOT IN (SELECT time_slot_id FROM registrations)')
+
+
+# Счётчики мероприятия по его слотам
+FREE_SLOTS = 'SELECT COUNT(*) FROM time_slots WHERE event_id = events.id AND is_available = 1'
+BOOKED_SLOTS = 'SELECT COUNT(*) FROM time_slots WHERE event_id = events.id AND is_available = 0'
+COUNTER_DRIFT = f'free_slots != ({FREE_SLOTS}) OR booked_slots != ({BOOKED_SLOTS})'
+
+
+def find_orphans(cursor):
+    """Число висячих строк по таблицам и занятых без записи слотов"""
+    counts = {}
+    for table, condition in ORPHANS:
+        counts[table] = cursor.execute(
+            f'SELECT COUNT(*) FROM {table} WHERE {condition}').fetchone()[0]
+    counts['stale_slots'] = cursor.execute(
+        f'SELECT COUNT(*) FROM time_slots WHERE {STALE_SLOTS}').fetchone()[0]
+    return counts
+
+
+def delete_orphans(cursor):
+    """Удаляет висячие строки и освобождает слоты без записи (внутри
+    текущей транзакции cursor). Возвращает число строк по таблицам."""
+    counts = {}
+    for table, condition in ORPHANS:
+        cursor.execute(f'DELETE FROM {table} WHERE {condition}')
+        counts[table] = cursor.rowcount
+    cursor.execute(f'UPDATE time_slots SET is_available = 1 WHERE {STALE_SLOTS}')
+    counts['stale_slots'] = cursor.rowcount
+    return counts
+
+
+def find_counter_drift(cursor):
+    """id мероприятий, у которых счётчики слотов расходятся с time_slots"""
+    return [row[0] for row in cursor.execute(
+        f'SELECT id FROM events WHERE {COUNTER_DRIFT} ORDER BY id')]
+
+
+def rebuild_counters(cursor, event_ids=None):
+    """Пересчитывает счётчики слотов по time_slots (внутри текущей
+    транзакции cursor): заданных мероприятий или всех разошедшихся.
+    Возвращает число исправленных мероприятий."""
+    sql = f'UPDATE events SET free_slots = ({FREE_SLOTS}), booked_slots = ({BOOKED_SLOTS})'
+    if event_ids is None:
+        cursor.execute(f'{sql} WHERE {COUNTER_DRIFT}')
+        return cursor.rowcount
+    cursor.executemany(f'{sql} WHERE id = ?', [(event_id,) for event_id in event_ids])
+    return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apply', action='store_true', help='удалить найденные строки')
+    args = parser.parse_args()
+
+    from app.database.cache import clear_caches
+    from app.database.db import DATABASE, get_db, transaction
+
+    if args.apply:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            counts = delete_orphans(cursor)
+            counts['counters'] = rebuild_counters(cursor)
+        # Удалённые строки и старые счётчики могли попасть в кеши других процессов
+        clear_caches()
+    else:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            counts = find_orphans(cursor)
+            counts['counters'] = len(find_counter_drift(cursor))
+
+    action = 'удалено' if args.apply else 'найдено'
+    print(f'{DATABASE}: {action} ' + ', '.join(f'{table}: {count}' for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
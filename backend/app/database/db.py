@@ -1,23 +1,256 @@
 # backend/app/database/db.py
+import functools
+import os
+import random
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from typing import List, Dict, Any
 
-DATABASE = 'mephi_link.db'
+from app.database.cache import (
+    cached, groups_cache, group_events_cache, event_cache, slots_cache,
+    invalidate_event, invalidate_slots, invalidate_group, invalidate_user, invalidate_waitlist,
+    invalidate_availability,
+)
+from app.database.cleanup import rebuild_counters
+from app.database.instrument import InstrumentedConnection, track_operations
+from app.database.slowlog import SLOW_QUERY_ENABLED
+from app.database.paging import paginate
+from app.database.pool import ConnectionPool
+from app.database.repository import (
+    UserRepository, GroupRepository, EventRepository, SlotRepository, RegistrationRepository,
+    SLOT_MINUTES, BOOKED, ALREADY_REGISTERED, SLOT_TAKEN,
+    WAITLISTED, ALREADY_WAITLISTED, SLOTS_AVAILABLE, event_bounds, event_day,
+)
+from app.database.shared import shared_counters
+from app.metrics import METRICS_ENABLED, db_busy_retries
+from app.pubsub import slot_events
+
+DATABASE = os.getenv('DATABASE', 'mephi_link.db')
+
+# Повторы транзакций при конкуренции за блокировку записи
+BUSY_RETRIES = int(os.getenv('DB_BUSY_RETRIES', '5'))
+BUSY_BACKOFF = 0.01
+
+# Размер пачки executemany при массовой вставке и число параметров в IN (...)
+BULK_BATCH = int(os.getenv('DB_BULK_BATCH', '1000'))
+IN_CHUNK = 500
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Возвращает пул соединений для текущего DATABASE"""
+    global _pool
+    if _pool is None or _pool.database != DATABASE:
+        with _pool_lock:
+            if _pool is None or _pool.database != DATABASE:
+                if _pool is not None:
+                    _pool.close()
+                instrumented = METRICS_ENABLED or SLOW_QUERY_ENABLED
+                factory = InstrumentedConnection if instrumented else sqlite3.Connection
+                _pool = ConnectionPool(DATABASE, factory=factory)
+                # Счётчики поколений кеша — общие для всех процессов с этой БД
+                shared_counters.attach(DATABASE + '-gen')
+    return _pool
+
+
+def close_pool():
+    """Закрывает все соединения пула (при остановке приложения)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
 
 
 @contextmanager
 def get_db():
-    """Контекстный менеджер для безопасной работы с БД"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
+    """Контекстный менеджер для безопасной работы с БД.
+
+    Соединение берётся из пула и возвращается в него после использования;
+    незавершённая транзакция при этом откатывается.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+def retry_on_busy(func):
+    """Повторяет вызов, если SQLite вернул «database is locked»/«busy»
+    (конкуренция за блокировку записи), с экспоненциальной паузой."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                message = str(e)
+                if 'locked' not in message and 'busy' not in message:
+                    raise
+                if attempt == BUSY_RETRIES - 1:
+                    raise
+                db_busy_retries.inc((func.__qualname__,))
+                time.sleep(BUSY_BACKOFF * (2 ** attempt) * (1 + random.random()))
+    return wrapper
+
+
+@contextmanager
+def transaction():
+    """Соединение из пула с открытой транзакцией BEGIN IMMEDIATE.
+
+    Фиксирует изменения при выходе из блока и откатывает их при исключении.
+    """
+    with get_db() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def _users_query(limit, after):
+    sql = ('SELECT id, first_name, last_name, email, group_name, role, is_admin, created_at '
+           'FROM users')
+    params = []
+    if after:
+        sql += ' WHERE (created_at, id) < (?, ?)'
+        params += after
+    sql += ' ORDER BY created_at DESC, id DESC'
+    return _with_limit(sql, params, limit)
+
+
+def _group_events_query(group_name, limit, after):
+    sql = 'SELECT * FROM events WHERE group_name = ?'
+    params = [group_name]
+    if after:
+        sql += ' AND (created_at, id) < (?, ?)'
+        params += after
+    sql += ' ORDER BY created_at DESC, id DESC'
+    return _with_limit(sql, params, limit)
+
+
+def _range_events_query(group_name, start, end, limit, after):
+    # Только мероприятия с датой; поиск — по индексу idx_events_group_starts
+    sql = 'SELECT * FROM events WHERE group_name = ? AND starts_at IS NOT NULL'
+    params = [group_name]
+    if start is not None:
+        sql += ' AND starts_at >= ?'
+        params.append(start)
+    if end is not None:
+        sql += ' AND starts_at < ?'
+        params.append(end)
+    if after:
+        sql += ' AND (starts_at, id) > (?, ?)'
+        params += after
+    sql += ' ORDER BY starts_at, id'
+    return _with_limit(sql, params, limit)
+
 
+def _organizer_events_query(organizer_id, limit, after):
+    sql = 'SELECT * FROM events WHERE organizer_id = ?'
+    params = [organizer_id]
+    if after:
+        sql += ' AND id < ?'
+        params += after
+    sql += ' ORDER BY id DESC'
+    return _with_limit(sql, params, limit)
 
-class UserDB:
+
+def _with_limit(sql, params, limit):
+    # Берём на одну строку больше, чтобы понять, есть ли следующая страница
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit + 1)
+    return sql, params
+
+
+def _select_in(cursor, sql, ids):
+    """Строки запроса с условием IN ({ids}) — пачками по IN_CHUNK значений"""
+    ids = list(dict.fromkeys(ids))
+    rows = []
+    for i in range(0, len(ids), IN_CHUNK):
+        chunk = ids[i:i + IN_CHUNK]
+        rows += cursor.execute(sql.format(ids=', '.join('?' * len(chunk))), chunk).fetchall()
+    return rows
+
+
+def _publish_deleted(events):
+    """Сброс кеша и SSE-событие по каждому удалённому мероприятию (id, group_name)"""
+    for event_id, group_name in events:
+        invalidate_event(event_id, group_name)
+        slot_events.publish(event_id, {"type": "event", "action": "deleted", "event_id": event_id})
+
+
+def _shift_counters(cursor, event_id, free, booked):
+    """Сдвигает счётчики слотов мероприятия (внутри текущей транзакции cursor).
+    Возвращает (group_name, organizer_id) или None, если мероприятия нет."""
+    cursor.execute('''
+        UPDATE events SET free_slots = free_slots + ?, booked_slots = booked_slots + ?
+        WHERE id = ?
+        RETURNING group_name, organizer_id
+    ''', (free, booked, event_id))
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def _publish_released(event_id, time_slot_id, promoted, owner):
+    """Слот освободился: он свободен или уже отдан первому в очереди (promoted).
+    owner — (group_name, organizer_id) мероприятия."""
+    if promoted is None and owner is not None:
+        invalidate_availability(event_id, *owner)
+    else:
+        invalidate_slots(event_id)
+    slot_events.publish(event_id, {
+        "type": "slot", "event_id": event_id,
+        "slot_id": time_slot_id, "is_available": promoted is None,
+    })
+    if promoted is not None:
+        if owner is not None:
+            # Счётчики не изменились, но в списке записавшихся группы новый студент
+            invalidate_group(owner[0])
+        _publish_promoted(event_id, time_slot_id, promoted)
+
+
+def _publish_promoted(event_id, time_slot_id, user_id):
+    """Слот отдан студенту из очереди ожидания"""
+    invalidate_user(user_id)
+    slot_events.publish(event_id, {
+        "type": "promoted", "event_id": event_id,
+        "slot_id": time_slot_id, "user_id": user_id,
+    })
+
+
+def _publish_filled(event_id, promotions):
+    """Свободные слоты отданы очереди при изменении мероприятия; кеш
+    мероприятия и группы к этому моменту уже сброшен"""
+    for time_slot_id, user_id in promotions:
+        slot_events.publish(event_id, {
+            "type": "slot", "event_id": event_id,
+            "slot_id": time_slot_id, "is_available": False,
+        })
+        _publish_promoted(event_id, time_slot_id, user_id)
+
+
+def _existing_emails(conn, emails):
+    found = set()
+    for i in range(0, len(emails), IN_CHUNK):
+        chunk = emails[i:i + IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        found.update(row[0] for row in conn.execute(
+            f'SELECT email FROM users WHERE email IN ({placeholders})', chunk))
+    return found
+
+
+@track_operations
+class UserDB(UserRepository):
     @staticmethod
     def create_user(first_name, last_name, email, password_hash, telegram_alias, course, group_name):
         with get_db() as conn:
@@ -32,6 +265,34 @@ class UserDB:
             except sqlite3.IntegrityError:
                 return None
 
+    @staticmethod
+    def find_existing_emails(emails):
+        """Какие из email уже зарегистрированы (множество)"""
+        with get_db() as conn:
+            return _existing_emails(conn, list(emails))
+
+    @staticmethod
+    @retry_on_busy
+    def create_users_bulk(users):
+        """Создаёт пользователей одной транзакцией пачками executemany.
+
+        users — словари с полями create_user (password_hash — уже хеш).
+        Email, занятые к моменту вставки, пропускаются. Возвращает
+        множество пропущенных email.
+        """
+        with transaction() as conn:
+            taken = _existing_emails(conn, [user["email"] for user in users])
+            rows = [(user["first_name"], user["last_name"], user["email"], user["password_hash"],
+                     user["telegram_alias"], user["course"], user["group_name"])
+                    for user in users if user["email"] not in taken]
+            for i in range(0, len(rows), BULK_BATCH):
+                conn.executemany('''
+                    INSERT INTO users (first_name, last_name, email, password, telegram_alias,
+                                       course, group_name)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows[i:i + BULK_BATCH])
+        return taken
+
     @staticmethod
     def get_user_by_email(email):
         with get_db() as conn:
@@ -50,12 +311,17 @@ class UserDB:
 
     @staticmethod
     def set_user_role(user_id, role):
-        """Установить роль пользователю (admin, starosta, student)"""
+        """Установить роль пользователю (admin, starosta, student).
+
+        Флаг is_admin выставляется только для роли admin.
+        """
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'UPDATE users SET role = ? WHERE id = ?', (role, user_id))
+                'UPDATE users SET role = ?, is_admin = ? WHERE id = ?',
+                (role, 1 if role == "admin" else 0, user_id))
             conn.commit()
+        invalidate_user(user_id)
 
     @staticmethod
     def make_admin(user_id):
@@ -65,11 +331,93 @@ class UserDB:
             cursor.execute(
                 'UPDATE users SET role = ?, is_admin = 1 WHERE id = ?', ("admin", user_id))
             conn.commit()
+        invalidate_user(user_id)
 
+    @staticmethod
+    def get_profile(user_id):
+        """Данные пользователя, его записи и созданные им мероприятия
+        на одном соединении. Возвращает None, если пользователя нет."""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, first_name, last_name, email, telegram_alias, course,
+                       group_name, role, is_admin
+                FROM users WHERE id = ?
+            ''', (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                return None
+            cursor.execute(USER_REGISTRATIONS_SQL, (user_id,))
+            registrations = [dict(row) for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT * FROM events WHERE organizer_id = ?", (user_id,))
+            organized_events = [dict(row) for row in cursor.fetchall()]
 
+        user = dict(user)
+        user["is_admin"] = bool(user["is_admin"])
+        return {
+            "user": user,
+            "registrations": registrations,
+            "organized_events": organized_events,
+        }
 
-class GroupDB:
     @staticmethod
+    def get_all_users(limit=None, after=None):
+        """Пользователи от новых к старым с keyset-пагинацией.
+
+        after — (created_at, id) последней строки предыдущей страницы.
+        Возвращает (строки, next_cursor).
+        """
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(*_users_query(limit, after))
+            rows = [dict(row) for row in cursor.fetchall()]
+        return paginate(rows, limit, lambda row: (row["created_at"], row["id"]))
+
+    @staticmethod
+    def delete_user(user_id):
+        """Удаляет пользователя вместе с его записями и мероприятиями;
+        False, если пользователя нет"""
+        return UserDB.delete_users([user_id]) > 0
+
+    @staticmethod
+    @retry_on_busy
+    def delete_users(user_ids):
+        """Удаляет пользователей одной транзакцией.
+
+        Их мероприятия (со слотами и чужими записями), записи и места в
+        очередях удаляются каскадом (ON DELETE CASCADE). Занятые ими слоты
+        чужих мероприятий освобождаются и отдаются первому в очереди.
+        Возвращает число удалённых пользователей.
+        """
+        with transaction() as conn:
+            cursor = conn.cursor()
+            user_ids = [row[0] for row in _select_in(
+                cursor, 'SELECT id FROM users WHERE id IN ({ids})', user_ids)]
+            organized = [row[0] for row in _select_in(
+                cursor, 'SELECT id FROM events WHERE organizer_id IN ({ids})', user_ids)]
+            events = EventDB.remove_events(cursor, organized)
+            booked = sorted(tuple(row) for row in _select_in(
+                cursor, 'SELECT r.id, r.event_id, r.time_slot_id, e.group_name, e.organizer_id '
+                        'FROM registrations r JOIN events e ON e.id = r.event_id '
+                        'WHERE r.user_id IN ({ids})', user_ids))
+            cursor.executemany('DELETE FROM users WHERE id = ?', [(user_id,) for user_id in user_ids])
+            released = [(event_id, time_slot_id,
+                         RegistrationDB.release_slot(cursor, event_id, time_slot_id), owner)
+                        for _, event_id, time_slot_id, *owner in booked]
+
+        _publish_deleted(events)
+        for event_id, time_slot_id, promoted, owner in released:
+            _publish_released(event_id, time_slot_id, promoted, owner)
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        return len(user_ids)
+
+
+@track_operations
+class GroupDB(GroupRepository):
+    @staticmethod
+    @cached(groups_cache)
     def get_all_groups():
         with get_db() as conn:
             cursor = conn.cursor()
@@ -77,19 +425,70 @@ class GroupDB:
             return [row[0] for row in cursor.fetchall()]
 
 
-class EventDB:
+@track_operations
+class EventDB(EventRepository):
     @staticmethod
-    def create_event(title, start_time, end_time, total_slots, group_name, organizer_id):
+    def create_event(title, start_time, end_time, total_slots, group_name, organizer_id,
+                     slot_minutes=SLOT_MINUTES, event_date=None):
+        starts_at, ends_at = event_bounds(event_date, start_time, end_time)
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO events (title, start_time, end_time, total_slots, group_name, organizer_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (title, start_time, end_time, total_slots, group_name, organizer_id))
+                INSERT INTO events (title, start_time, end_time, total_slots, group_name, organizer_id,
+                                    slot_minutes, starts_at, ends_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (title, start_time, end_time, total_slots, group_name, organizer_id, slot_minutes,
+                  starts_at, ends_at))
             conn.commit()
+            invalidate_group(group_name)
+            invalidate_user(organizer_id)
             return cursor.lastrowid
 
     @staticmethod
+    @retry_on_busy
+    def create_events_bulk(events):
+        """Создаёт мероприятия вместе со слотами одной транзакцией.
+
+        events — словари с полями create_event (event_date — необязательное).
+        Слоты всех мероприятий вставляются пачками executemany.
+        Возвращает список id мероприятий.
+        """
+        with transaction() as conn:
+            cursor = conn.cursor()
+            event_ids = []
+            slots = []
+            for event in events:
+                starts_at, ends_at = event_bounds(event.get("event_date"), event["start_time"],
+                                                  event["end_time"])
+                times = SlotDB.slot_times(event["start_time"], event["end_time"],
+                                          event["slot_minutes"])
+                cursor.execute('''
+                    INSERT INTO events (title, start_time, end_time, total_slots, group_name,
+                                        organizer_id, slot_minutes, starts_at, ends_at, free_slots)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (event["title"], event["start_time"], event["end_time"], event["total_slots"],
+                      event["group_name"], event["organizer_id"], event["slot_minutes"],
+                      starts_at, ends_at, len(times)))
+                event_id = cursor.lastrowid
+                event_ids.append(event_id)
+                slots.extend((event_id, slot_time, minute) for minute, slot_time in times)
+
+            for i in range(0, len(slots), BULK_BATCH):
+                cursor.executemany('''
+                    INSERT INTO time_slots (event_id, slot_time, minute, is_available)
+                    VALUES (?, ?, ?, 1)
+                ''', slots[i:i + BULK_BATCH])
+
+        for event_id in event_ids:
+            invalidate_slots(event_id)
+        for group_name in {event["group_name"] for event in events}:
+            invalidate_group(group_name)
+        for organizer_id in {event["organizer_id"] for event in events}:
+            invalidate_user(organizer_id)
+        return event_ids
+
+    @staticmethod
+    @cached(group_events_cache)
     def get_events_by_group(group_name):
         with get_db() as conn:
             cursor = conn.cursor()
@@ -98,6 +497,27 @@ class EventDB:
             return [dict(row) for row in cursor.fetchall()]
 
     @staticmethod
+    def get_events_by_group_page(group_name, limit=None, after=None):
+        """Страница мероприятий группы; after — (created_at, id).
+        Возвращает (строки, next_cursor)."""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(*_group_events_query(group_name, limit, after))
+            rows = [dict(row) for row in cursor.fetchall()]
+        return paginate(rows, limit, lambda row: (row["created_at"], row["id"]))
+
+    @staticmethod
+    def get_events_in_range(group_name, start=None, end=None, limit=None, after=None):
+        """Мероприятия группы, начинающиеся в [start, end); after — (starts_at, id).
+        Возвращает (строки, next_cursor)."""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(*_range_events_query(group_name, start, end, limit, after))
+            rows = [dict(row) for row in cursor.fetchall()]
+        return paginate(rows, limit, lambda row: (row["starts_at"], row["id"]))
+
+    @staticmethod
+    @cached(event_cache)
     def get_event_by_id(event_id):
         with get_db() as conn:
             cursor = conn.cursor()
@@ -106,60 +526,206 @@ class EventDB:
             return dict(row) if row else None
 
     @staticmethod
-    def update_event(event_id, title, start_time, end_time, total_slots):
+    def get_event_detail(event_id, user_id=None):
+        """Мероприятие, его слоты со счётчиками и запись пользователя на него —
+        одним запросом с JOIN. Возвращает None, если мероприятия нет."""
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE events SET title = ?, start_time = ?, end_time = ?, total_slots = ?
-                WHERE id = ?
-            ''', (title, start_time, end_time, total_slots, event_id))
-            conn.commit()
+                SELECT e.*,
+                       ts.id AS slot_id, ts.slot_time, ts.is_available,
+                       r.id AS registration_id
+                FROM events e
+                LEFT JOIN time_slots ts ON ts.event_id = e.id
+                LEFT JOIN registrations r ON r.time_slot_id = ts.id AND r.user_id = ?
+                WHERE e.id = ?
+                ORDER BY ts.minute
+            ''', (user_id, event_id))
+            rows = cursor.fetchall()
+            if rows:
+                cursor.execute('SELECT COUNT(*) FROM waitlist WHERE event_id = ?', (event_id,))
+                waitlist_length = cursor.fetchone()[0]
+                waitlist_position = _waitlist_position(cursor, user_id, event_id)
+
+        if not rows:
+            return None
+
+        slot_fields = ('slot_id', 'slot_time', 'is_available', 'registration_id')
+        event = {key: rows[0][key] for key in rows[0].keys() if key not in slot_fields}
+        slots = []
+        my_registration = None
+        for row in rows:
+            if row['slot_id'] is None:
+                continue
+            slots.append({
+                "id": row['slot_id'],
+                "slot_time": row['slot_time'],
+                "is_available": row['is_available'],
+            })
+            if row['registration_id'] is not None:
+                my_registration = {
+                    "id": row['registration_id'],
+                    "time_slot_id": row['slot_id'],
+                    "slot_time": row['slot_time'],
+                }
+
+        free = sum(1 for slot in slots if slot["is_available"])
+        return {
+            "event": event,
+            "slots": slots,
+            "availability": {
+                "total": len(slots),
+                "free": free,
+                "taken": len(slots) - free,
+            },
+            "my_registration": my_registration,
+            "waitlist": {
+                "length": waitlist_length,
+                "my_position": waitlist_position,
+            },
+        }
 
     @staticmethod
-    def delete_event(event_id):
+    def get_events_by_organizer(organizer_id, limit=None, after=None):
+        """Мероприятия организатора от новых к старым; after — (id,).
+        Возвращает (строки, next_cursor)."""
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                'DELETE FROM registrations WHERE event_id = ?', (event_id,))
-            cursor.execute(
-                'DELETE FROM time_slots WHERE event_id = ?', (event_id,))
-            cursor.execute('DELETE FROM events WHERE id = ?', (event_id,))
-            conn.commit()
+            cursor.execute(*_organizer_events_query(organizer_id, limit, after))
+            rows = [dict(row) for row in cursor.fetchall()]
+        return paginate(rows, limit, lambda row: (row["id"],))
+
+    @staticmethod
+    @retry_on_busy
+    def update_event(event_id, title, start_time, end_time, total_slots, slot_minutes=None,
+                     event_date=None):
+        """Обновляет мероприятие и сверяет его слоты с новым окном времени.
+
+        Всё выполняется одной транзакцией: слоты, которые остались в окне,
+        сохраняются вместе с записями, новые добавляются, а слоты вне окна
+        удаляются вместе с записями на них, а свободные места отдаются
+        очереди ожидания. Возвращает итог сверки (kept, added, removed,
+        cancelled, promoted).
+        """
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT slot_minutes, group_name, starts_at FROM events WHERE id = ?',
+                           (event_id,))
+            row = cursor.fetchone()
+            if slot_minutes is None:
+                slot_minutes = row[0] if row else SLOT_MINUTES
+            if event_date is None and row:
+                event_date = event_day(row[2])
+            starts_at, ends_at = event_bounds(event_date, start_time, end_time)
+            cursor.execute('''
+                UPDATE events SET title = ?, start_time = ?, end_time = ?, total_slots = ?,
+                                  slot_minutes = ?, starts_at = ?, ends_at = ?
+                WHERE id = ?
+            ''', (title, start_time, end_time, total_slots, slot_minutes, starts_at, ends_at,
+                  event_id))
+            summary, promotions = SlotDB.reconcile_slots(
+                cursor, event_id, start_time, end_time, slot_minutes)
 
+        invalidate_event(event_id, row[1] if row else None)
+        slot_events.publish(event_id, {"type": "event", "action": "updated", "event_id": event_id})
+        _publish_filled(event_id, promotions)
+        return summary
 
-class SlotDB:
     @staticmethod
-    def create_slots(event_id, start_time, end_time):
-        """Генерирует слоты по 30 минут"""
-        from datetime import datetime, timedelta
+    def delete_event(event_id):
+        return EventDB.delete_events([event_id]) > 0
 
-        start = datetime.strptime(start_time, "%H:%M")
-        end = datetime.strptime(end_time, "%H:%M")
+    @staticmethod
+    @retry_on_busy
+    def delete_events(event_ids):
+        """Удаляет мероприятия одной транзакцией; слоты, записи и очередь
+        удаляются каскадом. Возвращает число удалённых мероприятий."""
+        with transaction() as conn:
+            events = EventDB.remove_events(conn.cursor(), event_ids)
+        _publish_deleted(events)
+        return len(events)
+
+    @staticmethod
+    def remove_events(cursor, event_ids):
+        """Удаляет мероприятия внутри текущей транзакции cursor.
+        Возвращает [(id, group_name)] удалённых."""
+        events = [tuple(row) for row in _select_in(
+            cursor, 'SELECT id, group_name FROM events WHERE id IN ({ids})', event_ids)]
+        cursor.executemany('DELETE FROM events WHERE id = ?', [(event_id,) for event_id, _ in events])
+        return events
+
+
+@track_operations
+class SlotDB(SlotRepository):
+    @staticmethod
+    def create_slots(event_id, start_time, end_time, slot_minutes=SLOT_MINUTES):
+        """Генерирует слоты длительностью slot_minutes"""
+        slots = SlotDB.slot_times(start_time, end_time, slot_minutes)
 
         with get_db() as conn:
             cursor = conn.cursor()
-            current = start
-            slots = []
+            cursor.executemany('''
+                INSERT INTO time_slots (event_id, slot_time, minute, is_available)
+                VALUES (?, ?, ?, 1)
+            ''', [(event_id, slot_time, minute) for minute, slot_time in slots])
+            owner = _shift_counters(cursor, event_id, len(slots), 0)
+            conn.commit()
+        if owner is not None:
+            invalidate_availability(event_id, *owner)
+        else:
+            invalidate_slots(event_id)
+        return [slot_time for _, slot_time in slots]
 
-            while current < end:
-                slot_time = current.strftime("%H:%M")
-                cursor.execute('''
-                    INSERT INTO time_slots (event_id, slot_time, is_available)
-                    VALUES (?, ?, 1)
-                ''', (event_id, slot_time))
-                slots.append(slot_time)
-                current += timedelta(minutes=30)
+    @staticmethod
+    def reconcile_slots(cursor, event_id, start_time, end_time, slot_minutes=SLOT_MINUTES):
+        """Приводит слоты мероприятия к новому окну времени внутри
+        текущей транзакции cursor.
 
-            conn.commit()
-            return slots
+        Совпадающие слоты (и записи на них) не трогаются, недостающие
+        добавляются одним executemany, лишние удаляются вместе с записями.
+        На свободные слоты, пока позволяет total_slots, записываются
+        студенты из очереди ожидания. Возвращает (итог, [(слот, студент)]).
+        """
+        wanted = SlotDB.slot_times(start_time, end_time, slot_minutes)
+        cursor.execute('SELECT id, minute FROM time_slots WHERE event_id = ?', (event_id,))
+        existing = {row[1]: row[0] for row in cursor.fetchall()}
+
+        wanted_set = {minute for minute, _ in wanted}
+        removed = [(slot_id,) for minute, slot_id in existing.items()
+                   if minute not in wanted_set]
+        added = [(event_id, slot_time, minute) for minute, slot_time in wanted
+                 if minute not in existing]
+
+        cancelled = 0
+        if removed:
+            cursor.executemany(
+                'DELETE FROM registrations WHERE time_slot_id = ?', removed)
+            cancelled = cursor.rowcount
+            cursor.executemany('DELETE FROM time_slots WHERE id = ?', removed)
+        if added:
+            cursor.executemany('''
+                INSERT INTO time_slots (event_id, slot_time, minute, is_available)
+                VALUES (?, ?, ?, 1)
+            ''', added)
+        promotions = RegistrationDB.fill_from_waitlist(cursor, event_id)
+        rebuild_counters(cursor, [event_id])
+
+        return {
+            "kept": len(existing) - len(removed),
+            "added": len(added),
+            "removed": len(removed),
+            "cancelled": cancelled,
+            "promoted": len(promotions),
+        }, promotions
 
     @staticmethod
+    @cached(slots_cache)
     def get_slots_by_event(event_id):
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT id, slot_time, is_available FROM time_slots 
-                WHERE event_id = ? ORDER BY slot_time
+                SELECT id, slot_time, is_available FROM time_slots
+                WHERE event_id = ? ORDER BY minute
             ''', (event_id,))
             return [dict(row) for row in cursor.fetchall()]
 
@@ -168,51 +734,334 @@ class SlotDB:
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM time_slots WHERE event_id = ?', (event_id,))
+            rebuild_counters(cursor, [event_id])
+            owner = cursor.execute('SELECT group_name, organizer_id FROM events WHERE id = ?',
+                                   (event_id,)).fetchone()
             conn.commit()
+        if owner is not None:
+            invalidate_availability(event_id, *owner)
+        else:
+            invalidate_slots(event_id)
+
+def _waitlist_position(cursor, user_id, event_id):
+    """Позиция студента в очереди мероприятия (с 1) или None"""
+    if user_id is None:
+        return None
+    cursor.execute('''
+        SELECT COUNT(*) FROM waitlist
+        WHERE event_id = ?
+          AND id <= (SELECT id FROM waitlist WHERE event_id = ? AND user_id = ?)
+    ''', (event_id, event_id, user_id))
+    return cursor.fetchone()[0] or None
+
+
+USER_REGISTRATIONS_SELECT = '''
+    SELECT 
+        r.id, 
+        e.id as event_id, 
+        e.title, 
+        e.start_time, 
+        e.end_time, 
+        ts.slot_time, 
+        ts.id as time_slot_id, 
+        e.group_name,
+        e.starts_at,
+        e.slot_minutes,
+        r.registered_at
+    FROM registrations r
+    JOIN events e ON r.event_id = e.id
+    JOIN time_slots ts ON r.time_slot_id = ts.id
+    WHERE r.user_id = ?
+'''
+
+USER_REGISTRATIONS_SQL = f'{USER_REGISTRATIONS_SELECT} ORDER BY e.created_at DESC'
+
+
+def _user_registrations_query(user_id, limit, after):
+    # Выгрузка: по индексу (user_id, event_id), без сортировки
+    sql = USER_REGISTRATIONS_SELECT
+    params = [user_id]
+    if after:
+        sql += ' AND r.event_id > ?'
+        params += after
+    sql += ' ORDER BY r.event_id'
+    return _with_limit(sql, params, limit)
+
+
+# Список записавшихся: студент, слот и мероприятие. Строки идут в порядке
+# индексов (мероприятия по началу, слоты по времени) — без сортировки;
+# на слот приходится одна запись, поэтому minute — ключ страницы
+ROSTER_COLUMNS = '''
+    e.id AS event_id, e.title, e.starts_at, ts.slot_time, ts.minute, r.registered_at,
+    u.last_name, u.first_name, u.email, u.telegram_alias, u.group_name, u.course
+'''
+
+
+def _event_roster_query(event_id, limit, after):
+    sql = f'''
+        SELECT {ROSTER_COLUMNS}
+        FROM time_slots ts
+        JOIN registrations r ON r.time_slot_id = ts.id
+        JOIN users u ON u.id = r.user_id
+        JOIN events e ON e.id = ts.event_id
+        WHERE ts.event_id = ?
+    '''
+    params = [event_id]
+    if after:
+        sql += ' AND ts.minute > ?'
+        params += after
+    sql += ' ORDER BY ts.minute'
+    return _with_limit(sql, params, limit)
 
-class RegistrationDB:
+
+def _group_roster_query(group_name, limit, after):
+    sql = f'''
+        SELECT {ROSTER_COLUMNS}
+        FROM events e
+        JOIN time_slots ts ON ts.event_id = e.id
+        JOIN registrations r ON r.time_slot_id = ts.id
+        JOIN users u ON u.id = r.user_id
+        WHERE e.group_name = ?
+    '''
+    params = [group_name]
+    if after:
+        starts_at, event_id, minute = after
+        if starts_at is None:
+            # Мероприятия без даты (NULL) идут первыми: дальше — их хвост и все с датой
+            sql += ' AND (e.starts_at IS NOT NULL OR (e.id, ts.minute) > (?, ?))'
+            params += [event_id, minute]
+        else:
+            sql += ' AND (e.starts_at, e.id, ts.minute) > (?, ?, ?)'
+            params += after
+    sql += ' ORDER BY e.starts_at, e.id, ts.minute'
+    return _with_limit(sql, params, limit)
+
+
+@track_operations
+class RegistrationDB(RegistrationRepository):
     @staticmethod
+    @retry_on_busy
     def register_user(user_id, event_id, time_slot_id):
+        """Записывает пользователя на слот одной транзакцией BEGIN IMMEDIATE.
+
+        Слот занимается условным UPDATE: он срабатывает, только если слот
+        принадлежит мероприятию, ещё свободен и лимит total_slots не исчерпан
+        (по счётчику booked_slots). Счётчики слотов мероприятия меняются в
+        той же транзакции. Возвращает BOOKED, ALREADY_REGISTERED или SLOT_TAKEN.
+        """
         with get_db() as conn:
             cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
             try:
                 cursor.execute('''
                     INSERT INTO registrations (user_id, event_id, time_slot_id)
                     VALUES (?, ?, ?)
                 ''', (user_id, event_id, time_slot_id))
-                
-                cursor.execute('UPDATE time_slots SET is_available = 0 WHERE id = ?', (time_slot_id,))
-                conn.commit()
-                return True
-            except sqlite3.IntegrityError:
-                return False
+            except sqlite3.IntegrityError as e:
+                conn.rollback()
+                # UNIQUE(user_id, event_id) — уже записан; иначе нет
+                # пользователя, мероприятия или слота (FOREIGN KEY)
+                return ALREADY_REGISTERED if 'UNIQUE' in str(e) else SLOT_TAKEN
+
+            cursor.execute('''
+                UPDATE time_slots SET is_available = 0
+                WHERE id = ? AND event_id = ? AND is_available = 1
+                  AND (SELECT booked_slots < total_slots FROM events WHERE id = ?)
+            ''', (time_slot_id, event_id, event_id))
+            if cursor.rowcount != 1:
+                conn.rollback()
+                return SLOT_TAKEN
+            owner = _shift_counters(cursor, event_id, -1, 1)
+
+            # Записавшийся сам больше не ждёт в очереди
+            cursor.execute('DELETE FROM waitlist WHERE event_id = ? AND user_id = ?',
+                           (event_id, user_id))
+            conn.commit()
+            invalidate_availability(event_id, *owner)
+            invalidate_user(user_id)
+            slot_events.publish(event_id, {
+                "type": "slot", "event_id": event_id,
+                "slot_id": time_slot_id, "is_available": False,
+            })
+            return BOOKED
 
     @staticmethod
     def get_user_registrations(user_id):
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    r.id, 
-                    e.id as event_id, 
-                    e.title, 
-                    e.start_time, 
-                    e.end_time, 
-                    ts.slot_time, 
-                    ts.id as time_slot_id, 
-                    e.group_name
-                FROM registrations r
-                JOIN events e ON r.event_id = e.id
-                JOIN time_slots ts ON r.time_slot_id = ts.id
-                WHERE r.user_id = ?
-                ORDER BY e.created_at DESC
-            ''', (user_id,))
+            cursor.execute(USER_REGISTRATIONS_SQL, (user_id,))
             return [dict(row) for row in cursor.fetchall()]
 
     @staticmethod
-    def cancel_registration(registration_id, time_slot_id):
+    def get_user_registrations_page(user_id, limit=None, after=None):
+        """Записи пользователя по event_id (для выгрузок). Возвращает (строки, next_cursor)."""
+        with get_db() as conn:
+            rows = [dict(row) for row in conn.execute(*_user_registrations_query(user_id, limit, after))]
+        return paginate(rows, limit, lambda row: (row["event_id"],))
+
+    @staticmethod
+    def get_event_roster(event_id, limit=None, after=None):
+        with get_db() as conn:
+            rows = [dict(row) for row in conn.execute(*_event_roster_query(event_id, limit, after))]
+        return paginate(rows, limit, lambda row: (row["minute"],))
+
+    @staticmethod
+    def get_group_roster(group_name, limit=None, after=None):
         with get_db() as conn:
+            rows = [dict(row) for row in conn.execute(*_group_roster_query(group_name, limit, after))]
+        return paginate(rows, limit, lambda row: (row["starts_at"], row["event_id"], row["minute"]))
+
+    @staticmethod
+    @retry_on_busy
+    def cancel_registration(registration_id, time_slot_id):
+        """Отменяет запись и отдаёт освободившийся слот первому в очереди
+        ожидания — в той же транзакции. Возвращает id записанного из
+        очереди студента или None."""
+        with transaction() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT r.user_id, r.event_id, e.group_name, e.organizer_id
+                FROM registrations r JOIN events e ON e.id = r.event_id
+                WHERE r.id = ? AND r.time_slot_id = ?
+            ''', (registration_id, time_slot_id))
+            registration = cursor.fetchone()
+            if registration is None:
+                return None
+            user_id, event_id, *owner = registration
             cursor.execute('DELETE FROM registrations WHERE id = ?', (registration_id,))
-            cursor.execute('UPDATE time_slots SET is_available = 1 WHERE id = ?', (time_slot_id,))
+            promoted = RegistrationDB.release_slot(cursor, event_id, time_slot_id)
+
+        invalidate_user(user_id)
+        _publish_released(event_id, time_slot_id, promoted, owner)
+        return promoted
+
+    @staticmethod
+    def release_slot(cursor, event_id, time_slot_id):
+        """Освобождает слот и отдаёт его первому в очереди (внутри текущей
+        транзакции cursor). Возвращает id записанного студента или None."""
+        cursor.execute('UPDATE time_slots SET is_available = 1 WHERE id = ?', (time_slot_id,))
+        if cursor.rowcount == 0:
+            return None
+        promoted = RegistrationDB._promote_waitlist(cursor, event_id, time_slot_id)
+        if promoted is None:
+            # Слот остался свободным; отданный очереди — по-прежнему занят
+            _shift_counters(cursor, event_id, 1, -1)
+        return promoted
+
+    @staticmethod
+    def fill_from_waitlist(cursor, event_id):
+        """Записывает очередь ожидания на свободные слоты мероприятия по
+        времени, пока есть места по total_slots (внутри текущей транзакции
+        cursor; счётчики не сдвигает). Возвращает [(слот, студент)]."""
+        cursor.execute('''
+            SELECT total_slots - (SELECT COUNT(*) FROM registrations WHERE event_id = e.id)
+            FROM events e
+            WHERE e.id = ? AND EXISTS (SELECT 1 FROM waitlist WHERE event_id = e.id)
+        ''', (event_id,))
+        row = cursor.fetchone()
+        places = row[0] if row else 0
+        if places <= 0:
+            return []
+        cursor.execute('''
+            SELECT id FROM time_slots WHERE event_id = ? AND is_available = 1
+            ORDER BY minute LIMIT ?
+        ''', (event_id, places))
+        promotions = []
+        for (time_slot_id,) in cursor.fetchall():
+            user_id = RegistrationDB._promote_waitlist(cursor, event_id, time_slot_id)
+            if user_id is None:
+                break
+            promotions.append((time_slot_id, user_id))
+        return promotions
+
+    @staticmethod
+    def _promote_waitlist(cursor, event_id, time_slot_id):
+        """Записывает на свободный слот первого в очереди (внутри текущей
+        транзакции cursor). Возвращает id студента или None, если очередь пуста."""
+        while True:
+            cursor.execute('''
+                SELECT id, user_id FROM waitlist WHERE event_id = ? ORDER BY id LIMIT 1
+            ''', (event_id,))
+            head = cursor.fetchone()
+            if head is None:
+                return None
+            waitlist_id, user_id = head
+            cursor.execute('DELETE FROM waitlist WHERE id = ?', (waitlist_id,))
+            try:
+                cursor.execute('''
+                    INSERT INTO registrations (user_id, event_id, time_slot_id)
+                    VALUES (?, ?, ?)
+                ''', (user_id, event_id, time_slot_id))
+            except sqlite3.IntegrityError:
+                # Уже записан на это мероприятие — берём следующего
+                continue
+            cursor.execute('UPDATE time_slots SET is_available = 0 WHERE id = ?', (time_slot_id,))
+            return user_id
+
+    @staticmethod
+    @retry_on_busy
+    def join_waitlist(user_id, event_id):
+        """Ставит студента в очередь ожидания мероприятия.
+
+        Возвращает (результат, позиция): WAITLISTED или ALREADY_WAITLISTED
+        с позицией в очереди, ALREADY_REGISTERED, SLOTS_AVAILABLE (мест
+        хватает — нужно просто записаться) или (None, None), если
+        мероприятия или пользователя нет.
+        """
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT e.total_slots,
+                       (SELECT COUNT(*) FROM registrations WHERE event_id = e.id) AS booked,
+                       e.free_slots > 0 AS has_free,
+                       EXISTS(SELECT 1 FROM registrations
+                              WHERE event_id = e.id AND user_id = ?) AS registered
+                FROM events e WHERE e.id = ?
+            ''', (user_id, event_id))
+            event = cursor.fetchone()
+            if event is None:
+                return None, None
+            if event['registered']:
+                return ALREADY_REGISTERED, None
+            if event['has_free'] and event['booked'] < event['total_slots']:
+                return SLOTS_AVAILABLE, None
+
+            try:
+                cursor.execute('INSERT INTO waitlist (event_id, user_id) VALUES (?, ?)',
+                               (event_id, user_id))
+                result = WAITLISTED
+            except sqlite3.IntegrityError as e:
+                if 'UNIQUE' not in str(e):
+                    # Пользователя нет (FOREIGN KEY)
+                    return None, None
+                result = ALREADY_WAITLISTED
+            position = _waitlist_position(cursor, user_id, event_id)
+
+        if result == WAITLISTED:
+            invalidate_waitlist(event_id)
+            invalidate_user(user_id)
+        return result, position
+
+    @staticmethod
+    def leave_waitlist(user_id, event_id):
+        """Убирает студента из очереди; True, если он в ней был"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM waitlist WHERE event_id = ? AND user_id = ?',
+                           (event_id, user_id))
             conn.commit()
+            removed = cursor.rowcount > 0
+        if removed:
+            invalidate_waitlist(event_id)
+            invalidate_user(user_id)
+        return removed
+
+    @staticmethod
+    def get_waitlist_status(user_id, event_id):
+        """Длина очереди мероприятия и позиция в ней студента (или None)"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM waitlist WHERE event_id = ?', (event_id,))
+            length = cursor.fetchone()[0]
+            position = _waitlist_position(cursor, user_id, event_id)
+        return {"length": length, "position": position}
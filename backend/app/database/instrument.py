@@ -0,0 +1,137 @@
+# backend/app/database/instrument.py
+import contextvars
+import functools
+import inspect
+import sqlite3
+import time
+
+from app.database.slowlog import SLOW_QUERY_ENABLED, slow_queries
+from app.metrics import METRICS_ENABLED, db_lock_wait, db_query_latency, db_rows
+
+# Метод *DB-класса, который сейчас выполняет запросы ("EventDB.get_event_by_id")
+current_operation = contextvars.ContextVar('db_operation', default='other')
+
+_WRITES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _record(sql, parameters, elapsed, cursor, many=False):
+    operation = current_operation.get()
+    statement = sql.lstrip()[:7].upper()
+    if statement.startswith('BEGIN'):
+        # BEGIN IMMEDIATE ждёт блокировку записи — это и есть ожидание блокировки
+        if METRICS_ENABLED:
+            db_lock_wait.observe(elapsed, (operation,))
+        return
+    if METRICS_ENABLED:
+        db_query_latency.observe(elapsed, (operation,))
+        if statement.startswith(_WRITES) and cursor.rowcount > 0:
+            db_rows.inc((operation, 'write'), cursor.rowcount)
+    if SLOW_QUERY_ENABLED and elapsed >= slow_queries.threshold:
+        slow_queries.record(cursor.connection, sql, parameters, elapsed, operation, many)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Курсор, который замеряет время запросов и считает строки"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record(sql, parameters, time.perf_counter() - started, self)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(sql, None, time.perf_counter() - started, self, many=True)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if METRICS_ENABLED and row is not None:
+            db_rows.inc((current_operation.get(), 'read'))
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if METRICS_ENABLED and rows:
+            db_rows.inc((current_operation.get(), 'read'), len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if METRICS_ENABLED and rows:
+            db_rows.inc((current_operation.get(), 'read'), len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        if METRICS_ENABLED:
+            db_rows.inc((current_operation.get(), 'read'))
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Соединение, все запросы которого идут через InstrumentedCursor.
+
+    Connection.execute() в C создаёт обычный курсор, поэтому execute и
+    executemany переопределены явно.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            if METRICS_ENABLED:
+                db_query_latency.observe(time.perf_counter() - started, (current_operation.get(),))
+
+
+def track_operations(cls):
+    """Декоратор класса: запросы из статических методов помечаются
+    именем метода ("UserDB.create_user") в метриках и журналах."""
+    for name, attr in list(vars(cls).items()):
+        if isinstance(attr, staticmethod):
+            setattr(cls, name, staticmethod(_tracked(attr.__func__, f'{cls.__name__}.{name}')))
+    return cls
+
+
+def _tracked(func, operation):
+    if inspect.isgeneratorfunction(inspect.unwrap(func)):
+        # Генератор выполняется по частям — помечаем каждый шаг
+        @functools.wraps(func)
+        def generator(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    token = current_operation.set(operation)
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        current_operation.reset(token)
+                    yield item
+            finally:
+                # Клиент ушёл посреди потока — сразу возвращаем соединение в пул
+                iterator.close()
+        return generator
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_operation.set(operation)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+    return wrapper
@@ -0,0 +1,944 @@
+# backend/app/database/memory.py
+"""Реализация Repository в памяти процесса: индексированные словари.
+
+Семантика совпадает с SQLite-реализацией (app.database.db): те же
+ограничения уникальности, порядок строк и курсоры страниц, атомарная
+запись на слот и очередь ожидания, инвалидация версий ETag и события
+SSE. Все операции идут под одной блокировкой, поэтому каждая из них
+атомарна, как транзакция.
+
+Данные не переживают перезапуск и не видны другим воркерам — режим для
+тестов и бенчмарков. MEMORY_SNAPSHOT — путь к SQLite-БД, из которой
+хранилище наполняется при init().
+"""
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from app.database.cache import (
+    invalidate_event, invalidate_slots, invalidate_group, invalidate_user, invalidate_waitlist,
+    invalidate_availability,
+)
+from app.database.models import DEFAULT_GROUPS
+from app.database.paging import paginate
+from app.database.repository import (
+    UserRepository, GroupRepository, EventRepository, SlotRepository, RegistrationRepository,
+    Repository, SLOT_MINUTES, BOOKED, ALREADY_REGISTERED, SLOT_TAKEN,
+    WAITLISTED, ALREADY_WAITLISTED, SLOTS_AVAILABLE, parse_time, event_bounds, event_day,
+)
+from app.pubsub import slot_events
+
+MEMORY_SNAPSHOT = os.getenv('MEMORY_SNAPSHOT')
+
+# Столбцы в порядке SQLite-схемы (SELECT * отдаёт их в этом порядке)
+USER_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'password', 'telegram_alias',
+                'course', 'group_name', 'role', 'is_admin', 'created_at')
+EVENT_COLUMNS = ('id', 'title', 'start_time', 'end_time', 'total_slots', 'group_name',
+                 'organizer_id', 'created_at', 'slot_minutes', 'starts_at', 'ends_at',
+                 'free_slots', 'booked_slots')
+PROFILE_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'telegram_alias', 'course',
+                   'group_name', 'role', 'is_admin')
+USER_LIST_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'group_name', 'role',
+                     'is_admin', 'created_at')
+
+
+def _now():
+    # Формат CURRENT_TIMESTAMP в SQLite (UTC)
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
+def _before(keys, after, limit):
+    """Ключи отсортированного по возрастанию списка, меньшие after, —
+    по убыванию и не больше limit + 1 (лишний — признак следующей страницы)"""
+    try:
+        end = bisect_left(keys, tuple(after)) if after else len(keys)
+    except TypeError:
+        # Курсор с чужими типами значений — строк «меньше» него нет
+        return []
+    start = 0 if limit is None else max(0, end - limit - 1)
+    return keys[start:end][::-1]
+
+
+def _publish_deleted(events):
+    for event_id, group_name in events:
+        invalidate_event(event_id, group_name)
+        slot_events.publish(event_id, {"type": "event", "action": "deleted", "event_id": event_id})
+
+
+def _publish_released(event_id, time_slot_id, promoted, owner):
+    if promoted is None and owner is not None:
+        invalidate_availability(event_id, *owner)
+    else:
+        invalidate_slots(event_id)
+    slot_events.publish(event_id, {
+        "type": "slot", "event_id": event_id,
+        "slot_id": time_slot_id, "is_available": promoted is None,
+    })
+    if promoted is not None:
+        if owner is not None:
+            # Счётчики не изменились, но в списке записавшихся группы новый студент
+            invalidate_group(owner[0])
+        _publish_promoted(event_id, time_slot_id, promoted)
+
+
+def _publish_promoted(event_id, time_slot_id, user_id):
+    invalidate_user(user_id)
+    slot_events.publish(event_id, {
+        "type": "promoted", "event_id": event_id,
+        "slot_id": time_slot_id, "user_id": user_id,
+    })
+
+
+def _publish_filled(event_id, promotions):
+    for time_slot_id, user_id in promotions:
+        slot_events.publish(event_id, {
+            "type": "slot", "event_id": event_id,
+            "slot_id": time_slot_id, "is_available": False,
+        })
+        _publish_promoted(event_id, time_slot_id, user_id)
+
+
+def _between(keys, start, end, after):
+    """Ключи отсортированного по возрастанию списка с первым элементом в
+    [start, end) и больше after — по возрастанию"""
+    try:
+        low = bisect_left(keys, (start,)) if start is not None else 0
+        if after:
+            low = max(low, bisect_right(keys, tuple(after)))
+    except TypeError:
+        return []
+    high = bisect_left(keys, (end,)) if end is not None else len(keys)
+    return keys[low:high]
+
+
+def _discard(keys, key):
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+class MemoryStore:
+    """Строки всех таблиц и индексы к ним.
+
+    Индексы повторяют SQLite-схему: email пользователя, мероприятия
+    группы и организатора в порядке ключа страниц, мероприятия группы по
+    началу (только с датой), слоты мероприятия,
+    записи по (студент, мероприятие), слоту и мероприятию, очередь
+    мероприятия в порядке постановки.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users = {}
+        self.user_by_email = {}
+        self.users_order = []                # [(created_at, id)]
+        self.groups = set()
+        self.events = {}
+        self.events_by_group = {}            # group_name → [(created_at, id)]
+        self.events_by_start = {}            # group_name → [(starts_at, id)], только с датой
+        self.events_by_organizer = {}        # organizer_id → [(id,)]
+        self.slots = {}
+        self.slots_by_event = {}             # event_id → {slot_id}
+        self.registrations = {}
+        self.registration_by_user_event = {}  # (user_id, event_id) → id
+        self.registrations_by_user = {}      # user_id → {id}
+        self.registrations_by_event = {}     # event_id → {id}
+        self.registrations_by_slot = {}      # slot_id → {id}
+        self.waitlist = {}                   # event_id → {user_id: id} в порядке очереди
+        self.waitlist_by_user = {}           # user_id → {event_id}
+        self._ids = {}
+
+    def repository(self):
+        return Repository('memory', MemoryUsers(self), MemoryGroups(self), MemoryEvents(self),
+                          MemorySlots(self), MemoryRegistrations(self), init=self.init)
+
+    def init(self):
+        with self.lock:
+            if MEMORY_SNAPSHOT and not self.users and not self.events:
+                self.load_sqlite(MEMORY_SNAPSHOT)
+            self.groups.update(DEFAULT_GROUPS)
+        print(f"✅ Хранилище в памяти: пользователей {len(self.users)}, "
+              f"мероприятий {len(self.events)}")
+
+    def load_sqlite(self, path):
+        """Наполняет хранилище содержимым SQLite-БД (счётчики id — из sqlite_sequence)"""
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with self.lock:
+                for row in conn.execute('SELECT * FROM users ORDER BY id'):
+                    self.add_user(dict(row))
+                self.groups.update(row[0] for row in conn.execute('SELECT name FROM groups'))
+                for row in conn.execute('SELECT * FROM events ORDER BY id'):
+                    self.add_event(dict(row))
+                for row in conn.execute('SELECT * FROM time_slots ORDER BY id'):
+                    self.add_slot(row['event_id'], row['slot_time'], row['is_available'],
+                                  slot_id=row['id'], minute=row['minute'])
+                for row in conn.execute('SELECT * FROM registrations ORDER BY id'):
+                    self.add_registration(row['user_id'], row['event_id'], row['time_slot_id'],
+                                          registration_id=row['id'],
+                                          registered_at=row['registered_at'])
+                for row in conn.execute('SELECT * FROM waitlist ORDER BY id'):
+                    self.add_waitlist(row['event_id'], row['user_id'], waitlist_id=row['id'])
+                for name, seq in conn.execute('SELECT name, seq FROM sqlite_sequence'):
+                    self._ids[name] = max(self._ids.get(name, 0), seq)
+        finally:
+            conn.close()
+
+    def next_id(self, table, explicit=None):
+        # AUTOINCREMENT: id не переиспользуются даже после удаления
+        value = explicit if explicit is not None else self._ids.get(table, 0) + 1
+        self._ids[table] = max(self._ids.get(table, 0), value)
+        return value
+
+    # --- пользователи ---
+
+    def add_user(self, row):
+        row["id"] = self.next_id('users', row.get("id"))
+        row = {column: row.get(column) for column in USER_COLUMNS}
+        self.users[row["id"]] = row
+        self.user_by_email[row["email"]] = row["id"]
+        insort(self.users_order, (row["created_at"], row["id"]))
+        return row["id"]
+
+    def new_user(self, first_name, last_name, email, password_hash, telegram_alias, course,
+                 group_name):
+        if email in self.user_by_email:
+            return None
+        return self.add_user({
+            "first_name": first_name, "last_name": last_name, "email": email,
+            "password": password_hash, "telegram_alias": telegram_alias, "course": course,
+            "group_name": group_name, "role": 'student', "is_admin": 0, "created_at": _now(),
+        })
+
+    def remove_user(self, user_id):
+        """Только строка пользователя (как DELETE FROM users без каскада)"""
+        user = self.users.pop(user_id, None)
+        if user is not None:
+            self.user_by_email.pop(user["email"], None)
+            _discard(self.users_order, (user["created_at"], user_id))
+        return user
+
+    # --- мероприятия и слоты ---
+
+    def add_event(self, row):
+        row["id"] = self.next_id('events', row.get("id"))
+        row = {column: row.get(column) for column in EVENT_COLUMNS}
+        self.events[row["id"]] = row
+        insort(self.events_by_group.setdefault(row["group_name"], []),
+               (row["created_at"], row["id"]))
+        insort(self.events_by_organizer.setdefault(row["organizer_id"], []), (row["id"],))
+        self.index_start(row)
+        return row["id"]
+
+    def index_start(self, row):
+        if row["starts_at"] is not None:
+            insort(self.events_by_start.setdefault(row["group_name"], []),
+                   (row["starts_at"], row["id"]))
+
+    def unindex_start(self, row):
+        if row["starts_at"] is not None:
+            _discard(self.events_by_start.get(row["group_name"], []),
+                     (row["starts_at"], row["id"]))
+
+    def remove_event(self, event_id):
+        """Удаляет только строку мероприятия (как DELETE FROM events)"""
+        row = self.events.pop(event_id, None)
+        if row is not None:
+            _discard(self.events_by_group.get(row["group_name"], []),
+                     (row["created_at"], event_id))
+            _discard(self.events_by_organizer.get(row["organizer_id"], []), (event_id,))
+            self.unindex_start(row)
+        return row
+
+    def add_slot(self, event_id, slot_time, is_available=1, slot_id=None, minute=None):
+        slot_id = self.next_id('time_slots', slot_id)
+        if minute is None:
+            minute = parse_time(slot_time)
+        self.slots[slot_id] = {"id": slot_id, "event_id": event_id, "slot_time": slot_time,
+                               "minute": minute, "is_available": is_available}
+        self.slots_by_event.setdefault(event_id, set()).add(slot_id)
+        return slot_id
+
+    def remove_slot(self, slot_id):
+        slot = self.slots.pop(slot_id, None)
+        if slot is not None:
+            self.slots_by_event.get(slot["event_id"], set()).discard(slot_id)
+
+    def shift_counters(self, event_id, free, booked):
+        """Сдвигает счётчики слотов; (group_name, organizer_id) или None"""
+        event = self.events.get(event_id)
+        if event is None:
+            return None
+        event["free_slots"] += free
+        event["booked_slots"] += booked
+        return event["group_name"], event["organizer_id"]
+
+    def recount_slots(self, event_id):
+        """Пересчитывает счётчики по слотам (как cleanup.rebuild_counters)"""
+        event = self.events.get(event_id)
+        if event is None:
+            return
+        slots = [self.slots[slot_id] for slot_id in self.slots_by_event.get(event_id, ())]
+        event["free_slots"] = sum(1 for slot in slots if slot["is_available"])
+        event["booked_slots"] = len(slots) - event["free_slots"]
+
+    def event_slots(self, event_id):
+        """Слоты мероприятия по времени"""
+        slots = [self.slots[slot_id] for slot_id in self.slots_by_event.get(event_id, ())]
+        slots.sort(key=lambda slot: (slot["minute"], slot["id"]))
+        return slots
+
+    def remove_event_cascade(self, event_id):
+        """Мероприятие вместе с записями, очередью и слотами"""
+        for registration_id in list(self.registrations_by_event.get(event_id, ())):
+            self.remove_registration(registration_id)
+        for user_id in list(self.waitlist.get(event_id, {})):
+            self.remove_waitlist(event_id, user_id)
+        for slot_id in list(self.slots_by_event.get(event_id, ())):
+            self.remove_slot(slot_id)
+        return self.remove_event(event_id)
+
+    # --- записи ---
+
+    def add_registration(self, user_id, event_id, time_slot_id, registration_id=None,
+                         registered_at=None):
+        """id записи или None, если студент уже записан на мероприятие (UNIQUE)"""
+        if (user_id, event_id) in self.registration_by_user_event:
+            return None
+        registration_id = self.next_id('registrations', registration_id)
+        self.registrations[registration_id] = {
+            "id": registration_id, "user_id": user_id, "time_slot_id": time_slot_id,
+            "event_id": event_id, "registered_at": registered_at or _now(),
+        }
+        self.registration_by_user_event[(user_id, event_id)] = registration_id
+        self.registrations_by_user.setdefault(user_id, set()).add(registration_id)
+        self.registrations_by_event.setdefault(event_id, set()).add(registration_id)
+        self.registrations_by_slot.setdefault(time_slot_id, set()).add(registration_id)
+        return registration_id
+
+    def remove_registration(self, registration_id):
+        row = self.registrations.pop(registration_id, None)
+        if row is None:
+            return None
+        self.registration_by_user_event.pop((row["user_id"], row["event_id"]), None)
+        self.registrations_by_user.get(row["user_id"], set()).discard(registration_id)
+        self.registrations_by_event.get(row["event_id"], set()).discard(registration_id)
+        self.registrations_by_slot.get(row["time_slot_id"], set()).discard(registration_id)
+        return row
+
+    def user_registrations(self, user_id):
+        """Записи студента с данными мероприятия и слота (как JOIN в SQLite)"""
+        rows = []
+        # Как в SQLite: записи читаются по индексу (user_id, event_id),
+        # затем устойчивая сортировка по created_at мероприятия
+        registrations = sorted((self.registrations[registration_id]
+                                for registration_id in self.registrations_by_user.get(user_id, ())),
+                               key=lambda registration: registration["event_id"])
+        for registration in registrations:
+            registration_id = registration["id"]
+            event = self.events.get(registration["event_id"])
+            slot = self.slots.get(registration["time_slot_id"])
+            if event is None or slot is None:
+                continue
+            rows.append({
+                "id": registration_id,
+                "event_id": event["id"],
+                "title": event["title"],
+                "start_time": event["start_time"],
+                "end_time": event["end_time"],
+                "slot_time": slot["slot_time"],
+                "time_slot_id": slot["id"],
+                "group_name": event["group_name"],
+                "starts_at": event["starts_at"],
+                "slot_minutes": event["slot_minutes"],
+                "registered_at": registration["registered_at"],
+                "_created_at": event["created_at"],
+            })
+        rows.sort(key=lambda row: row["_created_at"], reverse=True)
+        for row in rows:
+            del row["_created_at"]
+        return rows
+
+    def roster(self, event_ids):
+        """Записавшиеся на мероприятия event_ids (как ROSTER_COLUMNS в SQLite):
+        в порядке мероприятий, внутри — по времени слота"""
+        rows = []
+        for event_id in event_ids:
+            event = self.events[event_id]
+            for slot in self.event_slots(event_id):
+                for registration_id in sorted(self.registrations_by_slot.get(slot["id"], ())):
+                    registration = self.registrations[registration_id]
+                    user = self.users.get(registration["user_id"])
+                    if user is None:
+                        continue
+                    rows.append({
+                        "event_id": event_id,
+                        "title": event["title"],
+                        "starts_at": event["starts_at"],
+                        "slot_time": slot["slot_time"],
+                        "minute": slot["minute"],
+                        "registered_at": registration["registered_at"],
+                        "last_name": user["last_name"],
+                        "first_name": user["first_name"],
+                        "email": user["email"],
+                        "telegram_alias": user["telegram_alias"],
+                        "group_name": user["group_name"],
+                        "course": user["course"],
+                    })
+        return rows
+
+    # --- очередь ожидания ---
+
+    def add_waitlist(self, event_id, user_id, waitlist_id=None):
+        queue = self.waitlist.setdefault(event_id, {})
+        if user_id in queue:
+            return None
+        queue[user_id] = self.next_id('waitlist', waitlist_id)
+        self.waitlist_by_user.setdefault(user_id, set()).add(event_id)
+        return queue[user_id]
+
+    def remove_waitlist(self, event_id, user_id):
+        queue = self.waitlist.get(event_id)
+        if not queue or queue.pop(user_id, None) is None:
+            return False
+        self.waitlist_by_user.get(user_id, set()).discard(event_id)
+        return True
+
+    def release_slot(self, event_id, time_slot_id):
+        """Освобождает слот и отдаёт его первому в очереди; id записанного или None"""
+        slot = self.slots.get(time_slot_id)
+        if slot is None:
+            return None
+        slot["is_available"] = 1
+        promoted = self.promote_waitlist(event_id, time_slot_id)
+        if promoted is None:
+            self.shift_counters(event_id, 1, -1)
+        return promoted
+
+    def promote_waitlist(self, event_id, time_slot_id):
+        queue = self.waitlist.get(event_id, {})
+        while queue:
+            user_id = next(iter(queue))
+            self.remove_waitlist(event_id, user_id)
+            if self.add_registration(user_id, event_id, time_slot_id) is None:
+                # Уже записан на это мероприятие — берём следующего
+                continue
+            slot = self.slots.get(time_slot_id)
+            if slot is not None:
+                slot["is_available"] = 0
+            return user_id
+        return None
+
+    def fill_from_waitlist(self, event_id):
+        """Очередь на свободные слоты по времени, пока есть места по
+        total_slots (счётчики не сдвигает); [(слот, студент)]"""
+        event = self.events.get(event_id)
+        if event is None or not self.waitlist.get(event_id):
+            return []
+        places = event["total_slots"] - len(self.registrations_by_event.get(event_id, ()))
+        promotions = []
+        for slot in self.event_slots(event_id):
+            if len(promotions) >= places:
+                break
+            if not slot["is_available"]:
+                continue
+            user_id = self.promote_waitlist(event_id, slot["id"])
+            if user_id is None:
+                break
+            promotions.append((slot["id"], user_id))
+        return promotions
+
+    def waitlist_position(self, user_id, event_id):
+        if user_id is None:
+            return None
+        for position, queued in enumerate(self.waitlist.get(event_id, {}), start=1):
+            if queued == user_id:
+                return position
+        return None
+
+
+class _Part:
+    def __init__(self, store):
+        self.store = store
+
+
+class MemoryUsers(_Part, UserRepository):
+    def create_user(self, first_name, last_name, email, password_hash, telegram_alias, course,
+                    group_name):
+        with self.store.lock:
+            return self.store.new_user(first_name, last_name, email, password_hash,
+                                       telegram_alias, course, group_name)
+
+    def find_existing_emails(self, emails):
+        with self.store.lock:
+            return {email for email in emails if email in self.store.user_by_email}
+
+    def create_users_bulk(self, users):
+        with self.store.lock:
+            taken = self.find_existing_emails([user["email"] for user in users])
+            for user in users:
+                if user["email"] not in taken:
+                    self.store.new_user(user["first_name"], user["last_name"], user["email"],
+                                        user["password_hash"], user["telegram_alias"],
+                                        user["course"], user["group_name"])
+        return taken
+
+    def get_user_by_email(self, email):
+        with self.store.lock:
+            user_id = self.store.user_by_email.get(email)
+            return dict(self.store.users[user_id]) if user_id is not None else None
+
+    def get_user_by_id(self, user_id):
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            return dict(user) if user else None
+
+    def set_user_role(self, user_id, role):
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if user is not None:
+                user["role"] = role
+                user["is_admin"] = 1 if role == "admin" else 0
+        invalidate_user(user_id)
+
+    def make_admin(self, user_id):
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if user is not None:
+                user["role"] = "admin"
+                user["is_admin"] = 1
+        invalidate_user(user_id)
+
+    def get_profile(self, user_id):
+        store = self.store
+        with store.lock:
+            user = store.users.get(user_id)
+            if user is None:
+                return None
+            user = {column: user[column] for column in PROFILE_COLUMNS}
+            registrations = store.user_registrations(user_id)
+            organized_events = [dict(store.events[event_id])
+                                for (event_id,) in store.events_by_organizer.get(user_id, [])]
+        user["is_admin"] = bool(user["is_admin"])
+        return {
+            "user": user,
+            "registrations": registrations,
+            "organized_events": organized_events,
+        }
+
+    def _rows(self, limit, after):
+        store = self.store
+        return [{column: store.users[user_id][column] for column in USER_LIST_COLUMNS}
+                for _, user_id in _before(store.users_order, after, limit)]
+
+    def get_all_users(self, limit=None, after=None):
+        with self.store.lock:
+            rows = self._rows(limit, after)
+        return paginate(rows, limit, lambda row: (row["created_at"], row["id"]))
+
+    def delete_user(self, user_id):
+        """Удаляет пользователя вместе с его записями и мероприятиями"""
+        return self.delete_users([user_id]) > 0
+
+    def delete_users(self, user_ids):
+        """Удаляет пользователей с каскадом, как ON DELETE CASCADE в SQLite;
+        занятые ими слоты чужих мероприятий отдаются очереди"""
+        store = self.store
+        with store.lock:
+            user_ids = sorted(user_id for user_id in set(user_ids) if user_id in store.users)
+            organized = sorted(event_id for user_id in user_ids
+                               for (event_id,) in store.events_by_organizer.get(user_id, []))
+            events = [(event_id, store.remove_event_cascade(event_id)["group_name"])
+                      for event_id in organized]
+            booked = sorted((registration_id,) + tuple(
+                                store.registrations[registration_id][column]
+                                for column in ("event_id", "time_slot_id"))
+                            for user_id in user_ids
+                            for registration_id in store.registrations_by_user.get(user_id, ())
+                            if store.registrations[registration_id]["event_id"] in store.events)
+            for user_id in user_ids:
+                for registration_id in list(store.registrations_by_user.get(user_id, ())):
+                    store.remove_registration(registration_id)
+                for event_id in list(store.waitlist_by_user.get(user_id, ())):
+                    store.remove_waitlist(event_id, user_id)
+                store.remove_user(user_id)
+            released = [(event_id, time_slot_id, store.release_slot(event_id, time_slot_id),
+                         (store.events[event_id]["group_name"], store.events[event_id]["organizer_id"]))
+                        for _, event_id, time_slot_id in booked]
+
+        _publish_deleted(events)
+        for event_id, time_slot_id, promoted, owner in released:
+            _publish_released(event_id, time_slot_id, promoted, owner)
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        return len(user_ids)
+
+
+class MemoryGroups(_Part, GroupRepository):
+    def get_all_groups(self):
+        with self.store.lock:
+            return sorted(self.store.groups)
+
+
+class MemoryEvents(_Part, EventRepository):
+    def _new_event(self, title, start_time, end_time, total_slots, group_name, organizer_id,
+                   slot_minutes, event_date, free_slots=0):
+        starts_at, ends_at = event_bounds(event_date, start_time, end_time)
+        return self.store.add_event({
+            "title": title, "start_time": start_time, "end_time": end_time,
+            "total_slots": total_slots, "group_name": group_name,
+            "organizer_id": organizer_id, "created_at": _now(), "slot_minutes": slot_minutes,
+            "starts_at": starts_at, "ends_at": ends_at,
+            "free_slots": free_slots, "booked_slots": 0,
+        })
+
+    def create_event(self, title, start_time, end_time, total_slots, group_name, organizer_id,
+                     slot_minutes=SLOT_MINUTES, event_date=None):
+        with self.store.lock:
+            event_id = self._new_event(title, start_time, end_time, total_slots, group_name,
+                                       organizer_id, slot_minutes, event_date)
+        invalidate_group(group_name)
+        invalidate_user(organizer_id)
+        return event_id
+
+    def create_events_bulk(self, events):
+        with self.store.lock:
+            event_ids = []
+            for event in events:
+                times = SlotRepository.slot_times(event["start_time"], event["end_time"],
+                                                  event["slot_minutes"])
+                event_id = self._new_event(event["title"], event["start_time"], event["end_time"],
+                                           event["total_slots"], event["group_name"],
+                                           event["organizer_id"], event["slot_minutes"],
+                                           event.get("event_date"), len(times))
+                event_ids.append(event_id)
+                for minute, slot_time in times:
+                    self.store.add_slot(event_id, slot_time, minute=minute)
+
+        for event_id in event_ids:
+            invalidate_slots(event_id)
+        for group_name in {event["group_name"] for event in events}:
+            invalidate_group(group_name)
+        for organizer_id in {event["organizer_id"] for event in events}:
+            invalidate_user(organizer_id)
+        return event_ids
+
+    def _group_rows(self, group_name, limit, after):
+        store = self.store
+        return [dict(store.events[event_id])
+                for _, event_id in _before(store.events_by_group.get(group_name, []), after, limit)]
+
+    def get_events_by_group(self, group_name):
+        with self.store.lock:
+            return self._group_rows(group_name, None, None)
+
+    def get_events_by_group_page(self, group_name, limit=None, after=None):
+        with self.store.lock:
+            rows = self._group_rows(group_name, limit, after)
+        return paginate(rows, limit, lambda row: (row["created_at"], row["id"]))
+
+    def _range_rows(self, group_name, start, end, limit, after):
+        store = self.store
+        keys = _between(store.events_by_start.get(group_name, []), start, end, after)
+        if limit is not None:
+            keys = keys[:limit + 1]
+        return [dict(store.events[event_id]) for _, event_id in keys]
+
+    def get_events_in_range(self, group_name, start=None, end=None, limit=None, after=None):
+        with self.store.lock:
+            rows = self._range_rows(group_name, start, end, limit, after)
+        return paginate(rows, limit, lambda row: (row["starts_at"], row["id"]))
+
+    def get_event_by_id(self, event_id):
+        with self.store.lock:
+            event = self.store.events.get(event_id)
+            return dict(event) if event else None
+
+    def get_event_detail(self, event_id, user_id=None):
+        store = self.store
+        with store.lock:
+            event = store.events.get(event_id)
+            if event is None:
+                return None
+            event = dict(event)
+            slots = [{"id": slot["id"], "slot_time": slot["slot_time"],
+                      "is_available": slot["is_available"]}
+                     for slot in store.event_slots(event_id)]
+            my_registration = None
+            registration_id = store.registration_by_user_event.get((user_id, event_id))
+            if registration_id is not None:
+                slot = store.slots.get(store.registrations[registration_id]["time_slot_id"])
+                if slot is not None and slot["event_id"] == event_id:
+                    my_registration = {
+                        "id": registration_id,
+                        "time_slot_id": slot["id"],
+                        "slot_time": slot["slot_time"],
+                    }
+            waitlist_length = len(store.waitlist.get(event_id, ()))
+            waitlist_position = store.waitlist_position(user_id, event_id)
+
+        free = sum(1 for slot in slots if slot["is_available"])
+        return {
+            "event": event,
+            "slots": slots,
+            "availability": {
+                "total": len(slots),
+                "free": free,
+                "taken": len(slots) - free,
+            },
+            "my_registration": my_registration,
+            "waitlist": {
+                "length": waitlist_length,
+                "my_position": waitlist_position,
+            },
+        }
+
+    def _organizer_rows(self, organizer_id, limit, after):
+        store = self.store
+        return [dict(store.events[event_id]) for (event_id,) in _before(
+            store.events_by_organizer.get(organizer_id, []), after, limit)]
+
+    def get_events_by_organizer(self, organizer_id, limit=None, after=None):
+        with self.store.lock:
+            rows = self._organizer_rows(organizer_id, limit, after)
+        return paginate(rows, limit, lambda row: (row["id"],))
+
+    def update_event(self, event_id, title, start_time, end_time, total_slots, slot_minutes=None,
+                     event_date=None):
+        """Обновляет мероприятие и сверяет его слоты с новым окном времени
+        (совпадающие слоты и записи на них сохраняются, свободные места
+        отдаются очереди ожидания)"""
+        store = self.store
+        summary = {"kept": 0, "added": 0, "removed": 0, "cancelled": 0, "promoted": 0}
+        promotions = []
+        with store.lock:
+            event = store.events.get(event_id)
+            if event is not None:
+                if slot_minutes is None:
+                    slot_minutes = event["slot_minutes"]
+                if event_date is None:
+                    event_date = event_day(event["starts_at"])
+                starts_at, ends_at = event_bounds(event_date, start_time, end_time)
+                store.unindex_start(event)
+                event.update(title=title, start_time=start_time, end_time=end_time,
+                             total_slots=total_slots, slot_minutes=slot_minutes,
+                             starts_at=starts_at, ends_at=ends_at)
+                store.index_start(event)
+                summary, promotions = self._reconcile_slots(
+                    event_id, start_time, end_time, slot_minutes)
+
+        invalidate_event(event_id, event["group_name"] if event else None)
+        slot_events.publish(event_id, {"type": "event", "action": "updated", "event_id": event_id})
+        _publish_filled(event_id, promotions)
+        return summary
+
+    def _reconcile_slots(self, event_id, start_time, end_time, slot_minutes):
+        store = self.store
+        wanted = SlotRepository.slot_times(start_time, end_time, slot_minutes)
+        existing = {slot["minute"]: slot["id"] for slot in store.event_slots(event_id)}
+
+        wanted_set = {minute for minute, _ in wanted}
+        removed = [slot_id for minute, slot_id in existing.items()
+                   if minute not in wanted_set]
+        added = [(minute, slot_time) for minute, slot_time in wanted if minute not in existing]
+
+        cancelled = 0
+        for slot_id in removed:
+            for registration_id in list(store.registrations_by_slot.get(slot_id, ())):
+                store.remove_registration(registration_id)
+                cancelled += 1
+            store.remove_slot(slot_id)
+        for minute, slot_time in added:
+            store.add_slot(event_id, slot_time, minute=minute)
+        promotions = store.fill_from_waitlist(event_id)
+        store.recount_slots(event_id)
+
+        return {
+            "kept": len(existing) - len(removed),
+            "added": len(added),
+            "removed": len(removed),
+            "cancelled": cancelled,
+            "promoted": len(promotions),
+        }, promotions
+
+    def delete_event(self, event_id):
+        return self.delete_events([event_id]) > 0
+
+    def delete_events(self, event_ids):
+        store = self.store
+        with store.lock:
+            events = [(event_id, store.remove_event_cascade(event_id)["group_name"])
+                      for event_id in sorted(set(event_ids)) if event_id in store.events]
+        _publish_deleted(events)
+        return len(events)
+
+
+class MemorySlots(_Part, SlotRepository):
+    def create_slots(self, event_id, start_time, end_time, slot_minutes=SLOT_MINUTES):
+        slots = self.slot_times(start_time, end_time, slot_minutes)
+        with self.store.lock:
+            for minute, slot_time in slots:
+                self.store.add_slot(event_id, slot_time, minute=minute)
+            owner = self.store.shift_counters(event_id, len(slots), 0)
+        if owner is not None:
+            invalidate_availability(event_id, *owner)
+        else:
+            invalidate_slots(event_id)
+        return [slot_time for _, slot_time in slots]
+
+    def get_slots_by_event(self, event_id):
+        with self.store.lock:
+            return [{"id": slot["id"], "slot_time": slot["slot_time"],
+                     "is_available": slot["is_available"]}
+                    for slot in self.store.event_slots(event_id)]
+
+    def delete_slots_by_event(self, event_id):
+        store = self.store
+        with store.lock:
+            for slot_id in list(store.slots_by_event.get(event_id, ())):
+                # Записи на слот удаляются каскадом (ON DELETE CASCADE)
+                for registration_id in list(store.registrations_by_slot.get(slot_id, ())):
+                    store.remove_registration(registration_id)
+                store.remove_slot(slot_id)
+            store.recount_slots(event_id)
+            event = store.events.get(event_id)
+        if event is not None:
+            invalidate_availability(event_id, event["group_name"], event["organizer_id"])
+        else:
+            invalidate_slots(event_id)
+
+
+class MemoryRegistrations(_Part, RegistrationRepository):
+    def register_user(self, user_id, event_id, time_slot_id):
+        """Записывает на слот, если он принадлежит мероприятию, свободен
+        и лимит total_slots не исчерпан (по счётчику booked_slots)"""
+        store = self.store
+        with store.lock:
+            if (user_id, event_id) in store.registration_by_user_event:
+                return ALREADY_REGISTERED
+            slot = store.slots.get(time_slot_id)
+            event = store.events.get(event_id)
+            if (slot is None or event is None or user_id not in store.users
+                    or slot["event_id"] != event_id
+                    or not slot["is_available"] or event["booked_slots"] >= event["total_slots"]):
+                return SLOT_TAKEN
+            store.add_registration(user_id, event_id, time_slot_id)
+            slot["is_available"] = 0
+            owner = store.shift_counters(event_id, -1, 1)
+            # Записавшийся сам больше не ждёт в очереди
+            store.remove_waitlist(event_id, user_id)
+
+        invalidate_availability(event_id, *owner)
+        invalidate_user(user_id)
+        slot_events.publish(event_id, {
+            "type": "slot", "event_id": event_id,
+            "slot_id": time_slot_id, "is_available": False,
+        })
+        return BOOKED
+
+    def get_user_registrations(self, user_id):
+        with self.store.lock:
+            return self.store.user_registrations(user_id)
+
+    def get_user_registrations_page(self, user_id, limit=None, after=None):
+        with self.store.lock:
+            rows = self.store.user_registrations(user_id)
+        rows.sort(key=lambda row: row["event_id"])
+        if after:
+            rows = [row for row in rows if row["event_id"] > after[0]]
+        if limit is not None:
+            rows = rows[:limit + 1]
+        return paginate(rows, limit, lambda row: (row["event_id"],))
+
+    def get_event_roster(self, event_id, limit=None, after=None):
+        store = self.store
+        with store.lock:
+            rows = store.roster([event_id] if event_id in store.events else [])
+        if after:
+            rows = [row for row in rows if row["minute"] > after[0]]
+        if limit is not None:
+            rows = rows[:limit + 1]
+        return paginate(rows, limit, lambda row: (row["minute"],))
+
+    def get_group_roster(self, group_name, limit=None, after=None):
+        store = self.store
+
+        def order(starts_at, event_id):
+            # Как ORDER BY starts_at, id в SQLite: мероприятия без даты (NULL) первыми
+            return (starts_at is not None, starts_at or 0, event_id)
+
+        rows = []
+        with store.lock:
+            event_ids = sorted((event_id for _, event_id in store.events_by_group.get(group_name, [])),
+                               key=lambda event_id: order(store.events[event_id]["starts_at"], event_id))
+            if after:
+                last = order(after[0], after[1])
+                event_ids = [event_id for event_id in event_ids
+                             if order(store.events[event_id]["starts_at"], event_id) >= last]
+            for event_id in event_ids:
+                for row in store.roster([event_id]):
+                    if after and event_id == after[1] and row["minute"] <= after[2]:
+                        continue
+                    rows.append(row)
+                if limit is not None and len(rows) > limit:
+                    break
+        if limit is not None:
+            rows = rows[:limit + 1]
+        return paginate(rows, limit, lambda row: (row["starts_at"], row["event_id"], row["minute"]))
+
+    def cancel_registration(self, registration_id, time_slot_id):
+        """Отменяет запись и отдаёт слот первому в очереди ожидания"""
+        store = self.store
+        with store.lock:
+            registration = store.registrations.get(registration_id)
+            if registration is None or registration["time_slot_id"] != time_slot_id:
+                return None
+            user_id, event_id = registration["user_id"], registration["event_id"]
+            event = store.events[event_id]
+            owner = (event["group_name"], event["organizer_id"])
+            store.remove_registration(registration_id)
+            promoted = store.release_slot(event_id, time_slot_id)
+
+        invalidate_user(user_id)
+        _publish_released(event_id, time_slot_id, promoted, owner)
+        return promoted
+
+    def join_waitlist(self, user_id, event_id):
+        store = self.store
+        with store.lock:
+            event = store.events.get(event_id)
+            if event is None:
+                return None, None
+            if (user_id, event_id) in store.registration_by_user_event:
+                return ALREADY_REGISTERED, None
+            booked = len(store.registrations_by_event.get(event_id, ()))
+            if event["free_slots"] > 0 and booked < event["total_slots"]:
+                return SLOTS_AVAILABLE, None
+            if user_id not in store.users:
+                return None, None
+
+            added = store.add_waitlist(event_id, user_id) is not None
+            result = WAITLISTED if added else ALREADY_WAITLISTED
+            position = store.waitlist_position(user_id, event_id)
+
+        if result == WAITLISTED:
+            invalidate_waitlist(event_id)
+            invalidate_user(user_id)
+        return result, position
+
+    def leave_waitlist(self, user_id, event_id):
+        with self.store.lock:
+            removed = self.store.remove_waitlist(event_id, user_id)
+        if removed:
+            invalidate_waitlist(event_id)
+            invalidate_user(user_id)
+        return removed
+
+    def get_waitlist_status(self, user_id, event_id):
+        with self.store.lock:
+            length = len(self.store.waitlist.get(event_id, ()))
+            position = self.store.waitlist_position(user_id, event_id)
+        return {"length": length, "position": position}
@@ -1,12 +1,70 @@
 # backend/app/database/models.py
 import sqlite3
-from datetime import datetime
+
+from app.database.cleanup import delete_orphans, rebuild_counters
+from app.database.db import get_db
+from app.database.shared import shared_counters
+
+# Группы, которые есть в любой новой БД
+DEFAULT_GROUPS = [f'Б-{100+i}' for i in range(10)]
 
 
 def init_db():
-    """Инициализирует БД со всеми таблицами"""
-    conn = sqlite3.connect('mephi_link.db')
-    cursor = conn.cursor()
+    """Инициализирует БД: применяет недостающие миграции схемы.
+
+    Версия схемы хранится в PRAGMA user_version; если БД уже актуальна,
+    никаких изменений не выполняется. Воркеры стартуют одновременно,
+    поэтому миграции идут под файловой блокировкой: первый применяет,
+    остальные дожидаются его и видят актуальную версию.
+    """
+    with get_db() as conn, shared_counters.startup():
+        old_version, new_version = migrate(conn)
+    if old_version != new_version:
+        print(f"✅ База данных обновлена: версия схемы {old_version} → {new_version}")
+    else:
+        print(f"✅ База данных актуальна (версия схемы {new_version})")
+
+
+def migrate(conn):
+    """Применяет миграции, которых ещё нет в БД, одной транзакцией.
+
+    Внешние ключи на время миграций выключаются: пересоздание таблицы
+    (DROP + RENAME) иначе каскадом удалило бы дочерние строки. Перед
+    фиксацией ссылки проверяются PRAGMA foreign_key_check.
+
+    Возвращает пару (версия до, версия после).
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version, version
+
+    # PRAGMA foreign_keys внутри транзакции не действует — меняем до BEGIN
+    foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = OFF')
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Перечитываем версию под блокировкой: её мог поднять другой процесс
+        start = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS, start=1):
+            if number <= start:
+                continue
+            migration(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {number}')
+        violation = conn.execute('PRAGMA foreign_key_check').fetchone()
+        if violation:
+            raise sqlite3.IntegrityError(
+                f'Нарушена ссылка после миграции: {violation[0]} → {violation[2]}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {foreign_keys}')
+    return version, max(start, SCHEMA_VERSION)
+
+
+def _create_schema(cursor):
+    """Миграция 1: базовые таблицы и список групп"""
 
     # Таблица пользователей
     cursor.execute('''
@@ -75,14 +133,206 @@ def init_db():
     ''')
 
     # Добавляем группы
-    groups = [f'Б-{100+i}' for i in range(10)]
-    for group in groups:
+    for group in DEFAULT_GROUPS:
         cursor.execute(
             'INSERT OR IGNORE INTO groups (name) VALUES (?)', (group,))
 
-    conn.commit()
-    conn.close()
-    print("✅ База данных инициализирована!")
+
+def _create_indexes(cursor):
+    """Миграция 2: вторичные индексы под основные запросы"""
+    # events WHERE group_name = ? ORDER BY created_at
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_events_group_created
+        ON events (group_name, created_at)
+    ''')
+    # events WHERE organizer_id = ?
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_events_organizer
+        ON events (organizer_id)
+    ''')
+    # time_slots WHERE event_id = ? ORDER BY slot_time (покрывающий)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_time_slots_event_time
+        ON time_slots (event_id, slot_time, is_available)
+    ''')
+    # registrations по слоту и по мероприятию; по user_id работает UNIQUE(user_id, event_id)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_registrations_slot
+        ON registrations (time_slot_id)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_registrations_event
+        ON registrations (event_id)
+    ''')
+
+
+def _add_slot_minutes(cursor):
+    """Миграция 3: длительность слотов хранится в мероприятии"""
+    cursor.execute(
+        'ALTER TABLE events ADD COLUMN slot_minutes INTEGER NOT NULL DEFAULT 30')
+
+
+def _create_users_created_index(cursor):
+    """Миграция 4: индекс для keyset-пагинации списка пользователей"""
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_users_created
+        ON users (created_at)
+    ''')
+
+
+def _create_waitlist(cursor):
+    """Миграция 5: очередь ожидания на мероприятия (FIFO по id)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS waitlist (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(event_id, user_id),
+        FOREIGN KEY (event_id) REFERENCES events(id),
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    ''')
+    _create_waitlist_indexes(cursor)
+
+
+def _create_waitlist_indexes(cursor):
+    # Голова очереди мероприятия и позиция студента — по (event_id, id)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_waitlist_event
+        ON waitlist (event_id, id)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_waitlist_user
+        ON waitlist (user_id)
+    ''')
+
+
+# Таблицы со ссылками и их новые определения (миграция 6)
+CASCADE_TABLES = [
+    ('events', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        total_slots INTEGER NOT NULL,
+        group_name TEXT NOT NULL,
+        organizer_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        slot_minutes INTEGER NOT NULL DEFAULT 30,
+        FOREIGN KEY (organizer_id) REFERENCES users(id) ON DELETE CASCADE
+    '''),
+    ('time_slots', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        slot_time TEXT NOT NULL,
+        is_available BOOLEAN DEFAULT 1,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    '''),
+    ('registrations', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        time_slot_id INTEGER NOT NULL,
+        event_id INTEGER NOT NULL,
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, event_id),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        FOREIGN KEY (time_slot_id) REFERENCES time_slots(id) ON DELETE CASCADE,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    '''),
+    ('waitlist', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(event_id, user_id),
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    '''),
+]
+
+
+def _cascade_foreign_keys(cursor):
+    """Миграция 6: ON DELETE CASCADE у всех ссылок.
+
+    SQLite не меняет ограничения существующей таблицы, поэтому таблицы
+    пересоздаются с переносом строк. Висячие строки, оставшиеся от
+    удалений без каскада, не переносятся (cleanup.delete_orphans).
+    Счётчики AUTOINCREMENT сохраняются: id удалённых строк не
+    переиспользуются.
+    """
+    delete_orphans(cursor)
+    sequences = dict(cursor.execute('SELECT name, seq FROM sqlite_sequence').fetchall())
+    for table, columns_sql in CASCADE_TABLES:
+        cursor.execute(f'CREATE TABLE {table}_new ({columns_sql})')
+        columns = ', '.join(row[1] for row in cursor.execute(f'PRAGMA table_info({table}_new)'))
+        cursor.execute(f'INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}')
+        cursor.execute(f'DROP TABLE {table}')
+        cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        if table in sequences:
+            cursor.execute('DELETE FROM sqlite_sequence WHERE name = ?', (table,))
+            cursor.execute('INSERT INTO sqlite_sequence (name, seq) '
+                           'SELECT ?, MAX(?, IFNULL(MAX(id), 0)) FROM ' + table,
+                           (table, sequences[table]))
+    # Индексы удалились вместе со старыми таблицами
+    _create_indexes(cursor)
+    _create_waitlist_indexes(cursor)
+
+
+def _add_event_dates(cursor):
+    """Миграция 7: даты мероприятий и время слотов целыми числами.
+
+    events.starts_at/ends_at — секунды от 1970-01-01 по местному времени
+    (см. repository.timestamp), NULL у мероприятий без даты. Слоты
+    сортируются по time_slots.minute — минуте суток — вместо строки "HH:MM".
+    """
+    cursor.execute('ALTER TABLE events ADD COLUMN starts_at INTEGER')
+    cursor.execute('ALTER TABLE events ADD COLUMN ends_at INTEGER')
+    # Календарь группы: WHERE group_name = ? AND starts_at в диапазоне
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_events_group_starts
+        ON events (group_name, starts_at)
+    ''')
+
+    cursor.execute('ALTER TABLE time_slots ADD COLUMN minute INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+    UPDATE time_slots
+    SET minute = CAST(substr(slot_time, 1, 2) AS INTEGER) * 60
+               + CAST(substr(slot_time, 4, 2) AS INTEGER)
+    ''')
+    # time_slots WHERE event_id = ? ORDER BY minute (покрывающий)
+    cursor.execute('DROP INDEX IF EXISTS idx_time_slots_event_time')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_time_slots_event_minute
+        ON time_slots (event_id, minute, slot_time, is_available)
+    ''')
+
+
+def _add_slot_counters(cursor):
+    """Миграция 8: счётчики свободных и занятых слотов в events.
+
+    Их меняют те же транзакции, что меняют time_slots.is_available и
+    набор слотов, так что списки мероприятий показывают доступность без
+    чтения time_slots. Сверить и пересчитать: app.database.cleanup.
+    """
+    cursor.execute('ALTER TABLE events ADD COLUMN free_slots INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('ALTER TABLE events ADD COLUMN booked_slots INTEGER NOT NULL DEFAULT 0')
+    rebuild_counters(cursor)
+
+
+# Миграции схемы по порядку; номер миграции = позиция в списке
+MIGRATIONS = [
+    _create_schema,
+    _create_indexes,
+    _add_slot_minutes,
+    _create_users_created_index,
+    _create_waitlist,
+    _cascade_foreign_keys,
+    _add_event_dates,
+    _add_slot_counters,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
 
 
 if __name__ == '__main__':
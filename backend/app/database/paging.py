@@ -0,0 +1,35 @@
+# backend/app/database/paging.py
+import base64
+import json
+
+# Максимальный размер страницы
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values):
+    """Непрозрачный курсор из значений ключа сортировки последней строки"""
+    raw = json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Значения ключа сортировки из курсора; ValueError, если курсор испорчен"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('invalid cursor')
+    return values
+
+
+def paginate(rows, limit, key):
+    """Отрезает лишнюю (limit + 1)-ю строку и строит курсор следующей страницы.
+
+    Возвращает (строки страницы, next_cursor или None).
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,71 @@
+# backend/app/database/pool.py
+import os
+import queue
+import sqlite3
+import threading
+
+# Сколько простаивающих соединений держим открытыми
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+
+# PRAGMA, которые применяются к каждому новому соединению
+PRAGMAS = {
+    'journal_mode': os.getenv('DB_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('DB_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('DB_CACHE_SIZE', '-16000')),
+    # Внешние ключи с ON DELETE CASCADE (в SQLite выключены по умолчанию)
+    'foreign_keys': os.getenv('DB_FOREIGN_KEYS', 'ON'),
+}
+
+
+class ConnectionPool:
+    """Пул долгоживущих соединений SQLite.
+
+    Соединения открываются лениво, настраиваются через PRAGMA один раз
+    и возвращаются в пул после использования. Если пул пуст, открывается
+    дополнительное соединение, которое закрывается при возврате в полный пул.
+    """
+
+    def __init__(self, database, size=POOL_SIZE, pragmas=None, factory=sqlite3.Connection):
+        self.database = database
+        self.factory = factory
+        self.size = size
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Закрывает все простаивающие соединения."""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
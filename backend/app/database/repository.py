@@ -0,0 +1,301 @@
+# backend/app/database/repository.py
+"""Интерфейс доступа к данным и выбор его реализации (backend).
+
+Приложение работает с данными только через Repository: набор хранилищ
+по сущностям (users, groups, events, slots, registrations). Реализации:
+
+- sqlite — статические классы *DB из app.database.db (по умолчанию);
+- memory — индексированные словари в памяти процесса (app.database.memory):
+  та же семантика без диска, для тестов и бенчмарков.
+
+Интерфейсы хранилищ — абстрактные классы (ABC): реализация, в которой
+нет какого-то метода, падает уже при создании Repository, а не на запросе.
+Методы хранилищ синхронные и вызываются из пула потоков (run_db).
+Результаты чтения общие для вызывающих — их нельзя изменять.
+"""
+import os
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+
+# Реализация хранилища: sqlite или memory
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')
+
+# Длительность слота по умолчанию, минут
+SLOT_MINUTES = int(os.getenv('SLOT_MINUTES', '30'))
+
+# Начало отсчёта дат мероприятий и длина суток, секунд
+EPOCH = date(1970, 1, 1)
+DAY = 24 * 60 * 60
+
+# Результаты записи на слот
+BOOKED = 'booked'
+ALREADY_REGISTERED = 'already_registered'
+SLOT_TAKEN = 'slot_taken'
+
+# Результаты постановки в очередь ожидания
+WAITLISTED = 'waitlisted'
+ALREADY_WAITLISTED = 'already_waitlisted'
+SLOTS_AVAILABLE = 'slots_available'
+
+
+def parse_time(value):
+    """Время в формате HH:MM → минута суток; ValueError, если это не время
+    суток (25:99 иначе дало бы минуту следующего дня в starts_at/minute)"""
+    hours, minutes = (int(part) for part in value.split(':'))
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f'❌ Неверное время: {value}')
+    return hours * 60 + minutes
+
+
+def format_time(minute):
+    """Минута суток → время в формате HH:MM"""
+    return f'{minute // 60:02d}:{minute % 60:02d}'
+
+
+def timestamp(day, minute=0):
+    """Дата и минута суток → секунды от 1970-01-01.
+
+    Время мероприятий местное, без часового пояса, и кодируется как UTC:
+    date(starts_at, 'unixepoch') в SQLite даёт дату мероприятия.
+    """
+    return (day - EPOCH).days * DAY + minute * 60
+
+
+def event_bounds(day, start_time, end_time):
+    """(starts_at, ends_at) мероприятия в дату day; (None, None) без даты"""
+    if day is None:
+        return None, None
+    return timestamp(day, parse_time(start_time)), timestamp(day, parse_time(end_time))
+
+
+def event_day(starts_at):
+    """Дата мероприятия по starts_at (None — мероприятие без даты)"""
+    return None if starts_at is None else EPOCH + timedelta(days=starts_at // DAY)
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    def create_user(self, first_name, last_name, email, password_hash, telegram_alias, course,
+                    group_name):
+        """id нового пользователя или None, если email занят"""
+
+    @abstractmethod
+    def find_existing_emails(self, emails):
+        """Какие из email уже зарегистрированы (множество)"""
+
+    @abstractmethod
+    def create_users_bulk(self, users):
+        """Создаёт пользователей атомарно; возвращает множество занятых email"""
+
+    @abstractmethod
+    def get_user_by_email(self, email):
+        ...
+
+    @abstractmethod
+    def get_user_by_id(self, user_id):
+        ...
+
+    @abstractmethod
+    def set_user_role(self, user_id, role):
+        ...
+
+    @abstractmethod
+    def make_admin(self, user_id):
+        ...
+
+    @abstractmethod
+    def get_profile(self, user_id):
+        """{"user", "registrations", "organized_events"} или None"""
+
+    @abstractmethod
+    def get_all_users(self, limit=None, after=None):
+        """Страница пользователей по (created_at, id) убыв.: (строки, next_cursor)"""
+
+    @abstractmethod
+    def delete_user(self, user_id):
+        """False, если пользователя нет"""
+
+    @abstractmethod
+    def delete_users(self, user_ids):
+        """Удаляет пользователей атомарно вместе с их мероприятиями, записями
+        и очередями; занятые ими слоты отдаются очереди. Число удалённых."""
+
+
+class GroupRepository(ABC):
+    @abstractmethod
+    def get_all_groups(self):
+        """Названия групп по алфавиту"""
+
+
+class EventRepository(ABC):
+    @abstractmethod
+    def create_event(self, title, start_time, end_time, total_slots, group_name, organizer_id,
+                     slot_minutes=SLOT_MINUTES, event_date=None):
+        """id нового мероприятия (слоты создаёт SlotRepository.create_slots);
+        event_date — дата (datetime.date) или None для мероприятия без даты"""
+
+    @abstractmethod
+    def create_events_bulk(self, events):
+        """Мероприятия вместе со слотами атомарно; возвращает их id"""
+
+    @abstractmethod
+    def get_events_by_group(self, group_name):
+        ...
+
+    @abstractmethod
+    def get_events_by_group_page(self, group_name, limit=None, after=None):
+        """Страница по (created_at, id) убыв.: (строки, next_cursor)"""
+
+    @abstractmethod
+    def get_events_in_range(self, group_name, start=None, end=None, limit=None, after=None):
+        """Мероприятия группы с датой, начинающиеся в [start, end) (секунды,
+        см. timestamp), по (starts_at, id) возр.: (строки, next_cursor)"""
+
+    @abstractmethod
+    def get_event_by_id(self, event_id):
+        ...
+
+    @abstractmethod
+    def get_event_detail(self, event_id, user_id=None):
+        """Мероприятие, слоты, доступность, запись пользователя и очередь — или None"""
+
+    @abstractmethod
+    def get_events_by_organizer(self, organizer_id, limit=None, after=None):
+        """Страница по id убыв.: (строки, next_cursor)"""
+
+    @abstractmethod
+    def update_event(self, event_id, title, start_time, end_time, total_slots, slot_minutes=None,
+                     event_date=None):
+        """Обновляет мероприятие и сверяет слоты, свободные места отдаются
+        очереди ожидания; итог (kept, added, removed, cancelled, promoted).
+        slot_minutes и event_date None — прежние значения"""
+
+    @abstractmethod
+    def delete_event(self, event_id):
+        """False, если мероприятия нет"""
+
+    @abstractmethod
+    def delete_events(self, event_ids):
+        """Удаляет мероприятия атомарно со слотами, записями и очередью.
+        Число удалённых."""
+
+
+class SlotRepository(ABC):
+    @staticmethod
+    def slot_times(start_time, end_time, slot_minutes=SLOT_MINUTES):
+        """Начала слотов в окне [start_time, end_time): пары (минута суток, "HH:MM")"""
+        return [(minute, format_time(minute))
+                for minute in range(parse_time(start_time), parse_time(end_time), slot_minutes)]
+
+    @abstractmethod
+    def create_slots(self, event_id, start_time, end_time, slot_minutes=SLOT_MINUTES):
+        ...
+
+    @abstractmethod
+    def get_slots_by_event(self, event_id):
+        ...
+
+    @abstractmethod
+    def delete_slots_by_event(self, event_id):
+        ...
+
+
+class RegistrationRepository(ABC):
+    @abstractmethod
+    def register_user(self, user_id, event_id, time_slot_id):
+        """BOOKED, ALREADY_REGISTERED или SLOT_TAKEN (в том числе если слота,
+        мероприятия или пользователя нет)"""
+
+    @abstractmethod
+    def get_user_registrations(self, user_id):
+        ...
+
+    @abstractmethod
+    def get_user_registrations_page(self, user_id, limit=None, after=None):
+        """Записи пользователя по event_id; (строки, next_cursor)"""
+
+    @abstractmethod
+    def get_event_roster(self, event_id, limit=None, after=None):
+        """Записавшиеся на мероприятие по времени слота: студент, слот
+        (slot_time, minute), мероприятие (event_id, title, starts_at) и
+        registered_at; (строки, next_cursor)"""
+
+    @abstractmethod
+    def get_group_roster(self, group_name, limit=None, after=None):
+        """Записавшиеся на все мероприятия группы: мероприятия по
+        (starts_at, id) — сначала без даты, внутри — по времени слота;
+        (строки, next_cursor)"""
+
+    @abstractmethod
+    def cancel_registration(self, registration_id, time_slot_id):
+        """Отменяет запись; id записанного из очереди студента или None"""
+
+    @abstractmethod
+    def join_waitlist(self, user_id, event_id):
+        """(результат, позиция в очереди); (None, None) — нет мероприятия
+        или пользователя"""
+
+    @abstractmethod
+    def leave_waitlist(self, user_id, event_id):
+        ...
+
+    @abstractmethod
+    def get_waitlist_status(self, user_id, event_id):
+        """{"length", "position"}"""
+
+
+class Repository:
+    """Хранилища одной реализации и её жизненный цикл (init/close)"""
+
+    def __init__(self, name, users, groups, events, slots, registrations,
+                 init=None, close=None):
+        self.name = name
+        self.users = users
+        self.groups = groups
+        self.events = events
+        self.slots = slots
+        self.registrations = registrations
+        self._init = init
+        self._close = close
+
+    def init(self):
+        """Готовит хранилище к работе (схема, начальные данные)"""
+        if self._init is not None:
+            self._init()
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+def _sqlite_repository():
+    from app.database import db
+    from app.database.models import init_db
+
+    return Repository('sqlite', db.UserDB(), db.GroupDB(), db.EventDB(), db.SlotDB(),
+                      db.RegistrationDB(),
+                      init=init_db, close=db.close_pool)
+
+
+def _memory_repository():
+    from app.database.memory import MemoryStore
+
+    return MemoryStore().repository()
+
+
+BACKENDS = {
+    'sqlite': _sqlite_repository,
+    'memory': _memory_repository,
+}
+
+_repository = None
+
+
+def get_repository():
+    """Repository выбранной в STORAGE_BACKEND реализации (один на процесс)"""
+    global _repository
+    if _repository is None:
+        if STORAGE_BACKEND not in BACKENDS:
+            raise ValueError(f'Неизвестный STORAGE_BACKEND: {STORAGE_BACKEND}')
+        _repository = BACKENDS[STORAGE_BACKEND]()
+    return _repository
@@ -0,0 +1,164 @@
+# backend/app/database/shared.py
+import mmap
+import os
+import secrets
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    from fcntl import LOCK_EX, LOCK_NB, LOCK_SH, LOCK_UN
+except ImportError:  # Windows: блокировок между процессами нет — только один воркер
+    fcntl = None
+    LOCK_EX = LOCK_NB = LOCK_SH = LOCK_UN = 0
+
+# Число счётчиков поколений в общем файле
+SHARED_SLOTS = int(os.getenv('SHARED_SLOTS', '65536'))
+
+# Заголовок файла: токен запуска (ETag) и байты блокировок. Секретов в
+# файле нет: его может прочитать любой, кому доступен каталог с БД
+HEADER_SIZE = 64
+TOKEN = slice(0, 4)
+# Байты заголовка, на которых держатся блокировки fcntl:
+# «процесс жив» (разделяемая, пока процесс работает) и «идёт запуск»
+_ALIVE = 4
+_STARTUP = 5
+
+COUNTER = struct.Struct('<Q')
+
+
+def _lock(fd, kind, offset, length=1):
+    if fcntl is not None and fd is not None:
+        fcntl.lockf(fd, kind, length, offset)
+
+
+def _same_file(fd, path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    current = os.fstat(fd)
+    return (stat.st_dev, stat.st_ino) == (current.st_dev, current.st_ino)
+
+
+class SharedCounters:
+    """Счётчики поколений, общие для всех процессов, работающих с одной БД.
+
+    Хранятся в файле рядом с БД (<DATABASE>-gen), отображённом в память:
+    чтение — обращение к памяти без системных вызовов, увеличение — под
+    блокировкой диапазона байт (fcntl.lockf), чтобы инкременты разных
+    воркеров не терялись. Ключ отображается на счётчик по crc32; коллизия
+    лишь изредка сбрасывает чужую запись кеша, но не оставляет устаревшую.
+
+    До attach() счётчики живут в памяти процесса.
+    """
+
+    def __init__(self, slots=SHARED_SLOTS):
+        self.path = None
+        self._fd = None
+        self._alive = False
+        # Были ли при запуске другие живые процессы на этом файле
+        self.peers = False
+        self._slots = slots
+        self._buf = bytearray(HEADER_SIZE + slots * COUNTER.size)
+        self._lock = threading.Lock()
+        self._startup_lock = threading.Lock()
+        self._new_header()
+
+    def attach(self, path):
+        """Подключает файл счётчиков (создаёт при первом обращении).
+
+        Блокировки fcntl принадлежат процессу и снимаются закрытием любого
+        дескриптора того же файла, поэтому тот же файл под другим путём не
+        открывается заново, а блокировка «жив» берётся на новом дескрипторе
+        до закрытия старого.
+        """
+        with self._startup_lock, self._lock:
+            if path == self.path:
+                return
+            if self._fd is not None and _same_file(self._fd, path):
+                self.path = path
+                return
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                _lock(fd, LOCK_EX, _STARTUP)
+                try:
+                    created = os.fstat(fd).st_size < HEADER_SIZE + COUNTER.size
+                    if created:
+                        os.ftruncate(fd, HEADER_SIZE + SHARED_SLOTS * COUNTER.size)
+                    buf = mmap.mmap(fd, 0)
+                    if created:
+                        self._new_header(buf)
+                    if self._alive:
+                        _lock(fd, LOCK_SH, _ALIVE)
+                finally:
+                    _lock(fd, LOCK_UN, _STARTUP)
+            except BaseException:
+                os.close(fd)
+                raise
+            # Старое отображение не закрываем: его может читать другой поток
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = fd
+            self._buf = buf
+            self._slots = (len(buf) - HEADER_SIZE) // COUNTER.size
+            self.path = path
+
+    @contextmanager
+    def startup(self):
+        """Блокировка запуска: инициализацию БД выполняет один процесс за раз.
+
+        Если других живых процессов нет (никто не держит блокировку
+        «жив»), заголовок обновляется — новый токен ETag, как при
+        перезапуске одиночного процесса. Воркеры, стартующие
+        рядом с работающими, берут заголовок как есть. Повторный запуск
+        в том же процессе заголовок не трогает.
+        """
+        with self._startup_lock:
+            fd = self._fd
+            _lock(fd, LOCK_EX, _STARTUP)
+            try:
+                if not self._alive:
+                    try:
+                        _lock(fd, LOCK_EX | LOCK_NB, _ALIVE)
+                        alone = True
+                    except OSError:
+                        alone = False
+                    if alone:
+                        self._new_header()
+                    self.peers = not alone
+                    _lock(fd, LOCK_SH, _ALIVE)
+                    self._alive = True
+                yield
+            finally:
+                _lock(fd, LOCK_UN, _STARTUP)
+
+    def _new_header(self, buf=None):
+        buf = self._buf if buf is None else buf
+        buf[TOKEN] = secrets.token_bytes(TOKEN.stop - TOKEN.start)
+
+    @property
+    def token(self):
+        return self._buf[TOKEN].hex()
+
+    def slot(self, *key):
+        return zlib.crc32(repr(key).encode()) % self._slots
+
+    def get(self, slot):
+        return COUNTER.unpack_from(self._buf, HEADER_SIZE + slot * COUNTER.size)[0]
+
+    def bump(self, slot):
+        offset = HEADER_SIZE + slot * COUNTER.size
+        with self._lock:
+            _lock(self._fd, LOCK_EX, offset, COUNTER.size)
+            try:
+                value = COUNTER.unpack_from(self._buf, offset)[0] + 1
+                COUNTER.pack_into(self._buf, offset, value)
+            finally:
+                _lock(self._fd, LOCK_UN, offset, COUNTER.size)
+        return value
+
+
+shared_counters = SharedCounters()
@@ -0,0 +1,155 @@
+# backend/app/database/slowlog.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Порог медленного запроса, мс (отрицательное значение отключает журнал)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+# Сколько разных форм запросов хранить в сводке
+SLOW_QUERY_SHAPES = int(os.getenv('SLOW_QUERY_SHAPES', '200'))
+
+SLOW_QUERY_ENABLED = SLOW_QUERY_MS >= 0
+
+# Полный просмотр таблицы без индекса: "SCAN events", но не "SCAN events USING INDEX ..."
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)')
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+logger = logging.getLogger('app.slow_query')
+
+
+def normalize_sql(sql):
+    """Форма запроса: SQL без лишних пробелов и переводов строк"""
+    return ' '.join(sql.split())
+
+
+def params_shape(parameters, many=False):
+    """Типы параметров без значений: "(int, str)" или "executemany (int, str)" """
+    if many:
+        return 'executemany'
+    if isinstance(parameters, dict):
+        inner = ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items())
+    else:
+        inner = ', '.join(type(value).__name__ for value in parameters)
+    return f'({inner})'
+
+
+# Ошибка привязки: "... The current statement uses 3, and there are 0 supplied."
+_BINDINGS = re.compile(r'statement uses (\d+)')
+
+
+def _explain_rows(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN с пустыми значениями вместо параметров запроса.
+
+    Параметры повторяют форму исходных: словарь для именованных, список
+    той же длины для позиционных. Для executemany (parameters=None) число
+    параметров сообщает сам SQLite — так учитываются ?NNN и не
+    учитываются «?» внутри строковых литералов.
+    """
+    # Базовый execute — чтобы EXPLAIN не попал в метрики и в этот же журнал
+    explain = f'EXPLAIN QUERY PLAN {sql}'
+    if isinstance(parameters, dict):
+        return sqlite3.Connection.execute(conn, explain, dict.fromkeys(parameters)).fetchall()
+    if parameters is not None:
+        return sqlite3.Connection.execute(conn, explain, [None] * len(parameters)).fetchall()
+    try:
+        return sqlite3.Connection.execute(conn, explain).fetchall()
+    except sqlite3.ProgrammingError as e:
+        match = _BINDINGS.search(str(e))
+        if match is None:
+            raise
+        return sqlite3.Connection.execute(conn, explain, [None] * int(match.group(1))).fetchall()
+
+
+class SlowQueryLog:
+    """Сводка медленных запросов по формам SQL.
+
+    Для каждой формы хранит число срабатываний, суммарное и максимальное
+    время, вызывающие методы *DB-классов и план EXPLAIN QUERY PLAN.
+    План вычисляется один раз на форму запроса и хранится в LRU на
+    max_shapes форм.
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, max_shapes=SLOW_QUERY_SHAPES):
+        self.threshold = threshold_ms / 1000
+        self.max_shapes = max_shapes
+        self._shapes = {}
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _explain(self, conn, sql, parameters):
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        with self._lock:
+            plan = self._plans.get(sql)
+            if plan is not None:
+                self._plans.move_to_end(sql)
+                return plan
+        try:
+            plan = [row[3] for row in _explain_rows(conn, sql, parameters)]
+        except sqlite3.Error as e:
+            plan = [f'EXPLAIN не выполнен: {e}']
+        with self._lock:
+            # LRU: новые формы вытесняют давно не встречавшиеся
+            self._plans[sql] = plan
+            while len(self._plans) > self.max_shapes:
+                self._plans.popitem(last=False)
+        return plan
+
+    def record(self, conn, sql, parameters, elapsed, operation, many=False):
+        sql = normalize_sql(sql)
+        shape = params_shape(parameters, many)
+        plan = self._explain(conn, sql, parameters)
+        full_scan = bool(FULL_SCAN.search('\n'.join(plan)))
+
+        logger.warning('медленный запрос %.1f мс [%s] %s %s; план: %s',
+                       elapsed * 1000, operation, sql, shape, ' | '.join(plan))
+
+        with self._lock:
+            entry = self._shapes.get(sql)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Вытесняем форму с наименьшим максимумом
+                    weakest = min(self._shapes, key=lambda key: self._shapes[key]["max_ms"])
+                    del self._shapes[weakest]
+                entry = self._shapes[sql] = {
+                    "sql": sql,
+                    "params": shape,
+                    "operations": [],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": plan,
+                    "full_scan": full_scan,
+                }
+            elapsed_ms = elapsed * 1000
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = time.time()
+            if operation not in entry["operations"]:
+                entry["operations"].append(operation)
+
+    def top(self, limit=10, order="max"):
+        """Самые медленные формы запросов (по max_ms или total_ms)"""
+        key = "total_ms" if order == "total" else "max_ms"
+        with self._lock:
+            entries = [dict(entry, operations=list(entry["operations"]))
+                       for entry in self._shapes.values()]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        for entry in entries[:limit]:
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 3)
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._shapes.clear()
+
+
+slow_queries = SlowQueryLog()
@@ -0,0 +1,153 @@
+# backend/app/export.py
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+
+from app.database.repository import event_day, parse_time
+
+# Размер куска потоковой выгрузки, символов: строки копятся в буфере и
+# отдаются кусками — память не зависит от числа строк, а ответ не
+# дробится на отдельную отправку на каждую строку
+EXPORT_CHUNK = int(os.getenv('EXPORT_CHUNK', '65536'))
+
+# Колонки CSV со списком записавшихся
+ROSTER_FIELDS = [
+    "event_id",
+    "title",
+    "date",
+    "slot_time",
+    "last_name",
+    "first_name",
+    "email",
+    "telegram_alias",
+    "group_name",
+    "course",
+    "registered_at",
+]
+
+# Название календаря записей студента в приложениях-календарях
+CALENDAR_NAME = "MEPhI-Link"
+
+
+def _flush(buffer):
+    data = buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+# Начала ячеек, которые Excel и LibreOffice читают как формулу
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """Текст из БД (названия, ФИО, алиасы) не должен стать формулой при
+    открытии выгрузки в таблице: такие ячейки начинаются с апострофа"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def roster_row(row):
+    """Строка get_*_roster → ячейки CSV в порядке ROSTER_FIELDS"""
+    day = event_day(row["starts_at"])
+    return [_csv_cell(value) for value in (
+        row["event_id"],
+        row["title"],
+        day.isoformat() if day else "",
+        row["slot_time"],
+        row["last_name"],
+        row["first_name"],
+        row["email"],
+        row["telegram_alias"],
+        row["group_name"],
+        row["course"],
+        row["registered_at"],
+    )]
+
+
+async def roster_csv(pages):
+    """CSV со списком записавшихся кусками байт; pages — асинхронный
+    итератор страниц строк get_*_roster"""
+    buffer = io.StringIO()
+    # BOM: Excel иначе открывает UTF-8 с кириллицей в однобайтовой кодировке;
+    # импорт (app.importer) и csv с encoding="utf-8-sig" его пропускают
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow(ROSTER_FIELDS)
+    async for rows in pages:
+        for row in rows:
+            writer.writerow(roster_row(row))
+            if buffer.tell() >= EXPORT_CHUNK:
+                yield _flush(buffer)
+    yield _flush(buffer)
+
+
+def _ics_text(value):
+    """Экранирование TEXT по RFC 5545"""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _ics_line(line):
+    """Строка iCalendar с переносом по 75 байт (продолжение — с пробела) и CRLF"""
+    if len(line.encode("utf-8")) <= 75:
+        return line + "\r\n"
+    parts, part, size = [], "", 0
+    for char in line:
+        length = len(char.encode("utf-8"))
+        if size + length > 75:
+            parts.append(part)
+            part, size = " ", 1
+        part += char
+        size += length
+    parts.append(part)
+    return "\r\n".join(parts) + "\r\n"
+
+
+def _ics_utc(value):
+    """registered_at ("YYYY-MM-DD HH:MM:SS", UTC) → 20240101T000000Z"""
+    if not value:
+        return "19700101T000000Z"
+    return datetime.fromisoformat(str(value)).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _ics_event(buffer, row):
+    """VEVENT записи; запись на мероприятие без даты пропускается"""
+    day = event_day(row["starts_at"])
+    if day is None:
+        return
+    start = datetime(day.year, day.month, day.day) + timedelta(
+        minutes=parse_time(row["slot_time"]))
+    end = start + timedelta(minutes=row["slot_minutes"])
+    description = (f"Группа {row['group_name']}, "
+                   f"мероприятие {row['start_time']}–{row['end_time']}")
+    for line in ("BEGIN:VEVENT",
+                 f"UID:registration-{row['id']}@mephi-link",
+                 f"DTSTAMP:{_ics_utc(row['registered_at'])}",
+                 f"DTSTART:{start:%Y%m%dT%H%M%S}",
+                 f"DTEND:{end:%Y%m%dT%H%M%S}",
+                 f"SUMMARY:{_ics_text(row['title'])}",
+                 f"DESCRIPTION:{_ics_text(description)}",
+                 "END:VEVENT"):
+        buffer.write(_ics_line(line))
+
+
+async def registrations_ics(pages):
+    """Календарь iCalendar с записями студента кусками байт; pages —
+    асинхронный итератор страниц строк get_user_registrations_page.
+    Время — местное, без часового пояса, как в БД; записи на мероприятия
+    без даты пропускаются — их не поставить в календарь."""
+    buffer = io.StringIO()
+    for line in ("BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//MEPhI-Link//RU",
+                 "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+                 f"X-WR-CALNAME:{_ics_text(CALENDAR_NAME)}"):
+        buffer.write(_ics_line(line))
+    async for rows in pages:
+        for row in rows:
+            _ics_event(buffer, row)
+            if buffer.tell() >= EXPORT_CHUNK:
+                yield _flush(buffer)
+    buffer.write(_ics_line("END:VCALENDAR"))
+    yield _flush(buffer)
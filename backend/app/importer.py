@@ -0,0 +1,152 @@
+# backend/app/importer.py
+import csv
+import io
+import json
+import os
+import re
+from datetime import date
+
+from app.database.repository import parse_time
+
+# Максимум строк в одном файле импорта
+MAX_IMPORT_ROWS = int(os.getenv('MAX_IMPORT_ROWS', '20000'))
+
+USER_FIELDS = [
+    "first_name",
+    "last_name",
+    "email",
+    "password",
+    "telegram_alias",
+    "course",
+    "group_name",
+]
+EVENT_FIELDS = ["title", "start_time", "end_time", "total_slots"]
+
+EMAIL_RE = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+TIME_RE = re.compile(r"^\d{2}:\d{2}$")
+
+
+def detect_format(content_type, format=None):
+    """Формат файла импорта: явный ?format= или по Content-Type (по умолчанию NDJSON)"""
+    if format:
+        return format
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+def parse_rows(body: bytes, format: str):
+    """Разбирает CSV (с заголовком) или NDJSON.
+
+    Возвращает (строки, ошибки): строки — список (номер записи, dict),
+    ошибки — записи, которые не удалось разобрать. Нумерация с 1,
+    без учёта заголовка CSV и пустых строк. ValueError — файл не в UTF-8.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Например, CSV из Excel в cp1251
+        raise ValueError("❌ Файл должен быть в кодировке UTF-8") from None
+    rows, errors = [], []
+
+    if format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for number, row in enumerate(reader, 1):
+            rows.append((number, {key.strip(): (value or "").strip()
+                                  for key, value in row.items() if key}))
+        return rows, errors
+
+    number = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            errors.append({"row": number, "error": "❌ Некорректный JSON"})
+            continue
+        if not isinstance(row, dict):
+            errors.append({"row": number, "error": "❌ Ожидается JSON-объект"})
+            continue
+        rows.append((number, row))
+    return rows, errors
+
+
+def _missing_field(row, fields):
+    for field in fields:
+        if field not in row or row[field] in (None, ""):
+            return f"❌ Поле '{field}' обязательно"
+    return None
+
+
+def _int_field(row, field):
+    try:
+        return int(row[field])
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_user(user):
+    """Проверка полей регистрации; возвращает текст ошибки или None"""
+    error = _missing_field(user, USER_FIELDS)
+    if error:
+        return error
+    if not EMAIL_RE.match(str(user["email"])):
+        return "❌ Некорректный email"
+    if len(str(user["password"])) < 6:
+        return "❌ Пароль минимум 6 символов"
+    if _int_field(user, "course") is None:
+        return "❌ Поле 'course' должно быть числом"
+    return None
+
+
+def parse_slot_minutes(value, default):
+    """Длительность слота в минутах (5–1440) или default; ValueError при ошибке"""
+    if value in (None, ""):
+        return default
+    try:
+        slot_minutes = int(value)
+    except (TypeError, ValueError):
+        slot_minutes = 0
+    if not 5 <= slot_minutes <= 24 * 60:
+        raise ValueError("❌ Длительность слота: от 5 до 1440 минут")
+    return slot_minutes
+
+
+def parse_event_date(value):
+    """Дата мероприятия (YYYY-MM-DD) или None, если не указана; ValueError при ошибке"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError("❌ Неверный формат даты (YYYY-MM-DD)") from None
+
+
+def _minute_of_day(value):
+    """Время HH:MM → минута суток; None, если формат или значение неверны"""
+    value = str(value)
+    if not TIME_RE.match(value):
+        return None
+    try:
+        return parse_time(value)
+    except ValueError:
+        return None
+
+
+def validate_event(event):
+    """Проверка полей мероприятия; возвращает текст ошибки или None"""
+    if _missing_field(event, EVENT_FIELDS):
+        return "❌ Все поля мероприятия обязательны"
+    start = _minute_of_day(event["start_time"])
+    end = _minute_of_day(event["end_time"])
+    if start is None or end is None:
+        return "❌ Неверный формат времени (HH:MM)"
+    if start >= end:
+        return "❌ Время начала должно быть раньше времени окончания"
+    if _int_field(event, "total_slots") is None:
+        return "❌ Поле 'total_slots' должно быть числом"
+    return None
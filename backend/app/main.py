@@ -1,12 +1,62 @@
 # backend/app/main.py
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from app.database.models import init_db
-from app.database.db import UserDB, GroupDB, EventDB, SlotDB, RegistrationDB, get_db
-from app.utils import hash_password, verify_password
-import re
-
-app = FastAPI(title="MEPhI-Link API", version="1.0.0")
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from app.database.repository import (
+    ALREADY_REGISTERED, SLOT_TAKEN, SLOT_MINUTES, WAITLISTED, SLOTS_AVAILABLE, get_repository,
+    timestamp,
+)
+from app.coalesce import coalesce_stats, event_flight, group_events_flight
+from app.database.aio import run_db, shutdown_executor
+from app.database.cache import cache_stats, versions
+from app.database.paging import MAX_PAGE_SIZE, decode_cursor
+from app.database.slowlog import slow_queries
+from app.auth import current_user, decode_token, issue_tokens, optional_user, require_secret
+from app.export import registrations_ics, roster_csv
+from app.importer import (
+    MAX_IMPORT_ROWS, detect_format, parse_event_date, parse_rows, parse_slot_minutes,
+    validate_event, validate_user,
+)
+from app.metrics import MetricsMiddleware, registry
+from app.pubsub import slot_events
+from app.schemas import (
+    BulkDeleteRequest, BulkDeleteResponse, CacheStats, CancelResponse, CreateEventResponse, Event, EventDetail, EventRequest, EventsPage,
+    EventWithSlots, Groups, ImportEventsResponse, ImportUsersResponse, LoginRequest,
+    LoginResponse, MakeAdminRequest, Message, Profile, RefreshRequest, RegisterRequest,
+    RegisterResponse, Registrations, Root, SlowQueries, Tokens, UpdateEventResponse, User,
+    UserListItem, UsersPage, WaitlistJoinResponse, WaitlistStatus,
+)
+from app.throttle import check_auth_rate
+from app.utils import (
+    HashBusy, hash_password_async, hash_passwords_async, verify_password_async,
+    shutdown_hash_executor,
+)
+from datetime import datetime
+from pydantic import TypeAdapter
+from urllib.parse import quote
+import functools
+import json
+import orjson
+import os
+
+# Ответы сериализуются orjson; форма ответа задаётся response_model (app.schemas)
+app = FastAPI(title="MEPhI-Link API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Хранилище данных (реализация — STORAGE_BACKEND)
+repo = get_repository()
+
+# Интервал keep-alive комментариев в SSE-потоке, секунд
+SSE_HEARTBEAT = float(os.getenv('SSE_HEARTBEAT', '15'))
+# Число процессов-воркеров (ту же переменную читают uvicorn и gunicorn)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+# Как часто SSE-поток сверяет версию мероприятия, секунд: записи в других
+# воркерах не проходят через брокер этого процесса (0 — не сверять)
+SSE_VERSION_POLL = float(os.getenv('SSE_VERSION_POLL', '2' if WEB_CONCURRENCY > 1 else '0'))
+
+# Время и статусы запросов по маршрутам для /metrics
+app.add_middleware(MetricsMiddleware)
 
 # CORS для фронтенда на localhost
 app.add_middleware(
@@ -20,52 +70,194 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup():
-    """Инициализация БД при старте приложения."""
-    init_db()
+    """Инициализация хранилища при старте приложения."""
+    repo.init()
+    require_secret(WEB_CONCURRENCY)
+    slot_events.bind()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """Остановка пулов потоков/процессов и закрытие хранилища."""
+    slot_events.unbind()
+    shutdown_executor()
+    shutdown_hash_executor()
+    repo.close()
+
+
+@app.exception_handler(HashBusy)
+async def hash_busy_handler(request: Request, exc: HashBusy):
+    """Очередь на хеширование паролей переполнена — просим повторить позже."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "❌ Сервер перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """Ошибки в теле запроса — 400 с текстом первой ошибки, как раньше
+    отдавали ручные проверки; ошибки пути и query — стандартный 422."""
+    errors = [error for error in exc.errors() if error["loc"][:1] == ("body",)]
+    if not errors:
+        return await request_validation_exception_handler(request, exc)
+    return JSONResponse(status_code=400, content={"detail": _validation_message(errors[0])})
+
+
+def _validation_message(error):
+    """Текст ошибки проверки тела запроса для клиента."""
+    if error["type"] == "value_error":
+        # ValueError из валидаторов app.schemas — уже готовый текст
+        return str(error["ctx"]["error"])
+    if error["type"] == "json_invalid":
+        return "❌ Некорректный JSON"
+    if len(error["loc"]) < 2:
+        return "❌ Ожидается JSON-объект"
+    field = error["loc"][-1]
+    if error["type"] == "missing":
+        return f"❌ Поле '{field}' обязательно"
+    return f"❌ Некорректное поле '{field}'"
+
+
+async def _read_import(request: Request, format: str | None):
+    """Строки файла импорта (CSV/NDJSON) из тела запроса и ошибки разбора."""
+    format = detect_format(request.headers.get("content-type"), format)
+    try:
+        rows, errors = parse_rows(await request.body(), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) + len(errors) > MAX_IMPORT_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"❌ Слишком много строк (максимум {MAX_IMPORT_ROWS})")
+    return rows, errors
+
+
+def _check_etag(request: Request, response: Response, etag: str,
+                cache_control: str = "no-cache"):
+    """Выставляет ETag ответа. Если клиент прислал ту же версию в
+    If-None-Match, возвращает готовый 304 — без обращения к БД."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+# Параметры постраничной выдачи списков
+PAGE_LIMIT = Query(None, ge=1, le=MAX_PAGE_SIZE)
+PAGE_FORMAT = Query("json", pattern="^(json|ndjson)$")
+# Строк в одной пачке потоковой выдачи (format=ndjson)
+STREAM_BATCH = min(int(os.getenv('STREAM_BATCH', '500')), MAX_PAGE_SIZE)
+# Формат файла импорта; без параметра — по Content-Type
+IMPORT_FORMAT = Query(None, pattern="^(csv|ndjson)$")
+
+
+def _decode_cursor(cursor, size=2):
+    """Курсор keyset-пагинации из запроса (None — первая страница).
+
+    size — число значений в ключе сортировки списка.
+    """
+    if not cursor:
+        return None
+    try:
+        values = decode_cursor(cursor)
+    except ValueError:
+        values = None
+    if values is None or len(values) != size:
+        raise HTTPException(status_code=400, detail="❌ Некорректный курсор")
+    return values
+
+
+async def _pages(fetch_page, after=None):
+    """Непустые keyset-страницы по STREAM_BATCH строк через run_db: чтение
+    идёт в общем пуле потоков БД, соединение возвращается в пул между
+    пачками, поэтому медленный клиент не держит ни соединение, ни курсор.
+
+    fetch_page(limit, after) → (строки, next_cursor), как у постраничных
+    методов хранилища.
+    """
+    while True:
+        rows, next_cursor = await run_db(fetch_page, STREAM_BATCH, after)
+        if rows:
+            yield rows
+        if next_cursor is None:
+            return
+        after = decode_cursor(next_cursor)
+
+
+def _ndjson(fetch_page, adapter: TypeAdapter, after=None, response: Response | None = None):
+    """Потоковый ответ NDJSON: строки читаются страницами (_pages) и
+    проверяются той же моделью, что и JSON-ответ."""
+    async def lines():
+        async for rows in _pages(fetch_page, after):
+            yield b"".join(orjson.dumps(row) + b"\n" for row in adapter.validate_python(rows))
+
+    headers = dict(response.headers) if response is not None else None
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+
+def _download(chunks, media_type: str, filename: str, response: Response):
+    """Потоковая выгрузка файла: куски отдаются по мере чтения страниц из БД (_pages)."""
+    headers = dict(response.headers)
+    headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+# Выгрузки с персональными данными не сохраняются в общих кешах (прокси)
+PRIVATE = "private, no-cache"
+
+
+def _can_export_roster(user: dict, group_name: str, organizer_id: int | None = None):
+    """Список записавшихся видят админ, староста группы и организатор мероприятия."""
+    if user["role"] == "admin" or user["id"] == organizer_id:
+        return True
+    return user["role"] == "starosta" and user["group_name"] == group_name
+
+
+async def _coalesced(flight, key, etag, response: Response, adapter: TypeAdapter, fetch):
+    """Ответ fetch(), общий для одновременных одинаковых запросов (app.coalesce):
+    чтение, проверка по модели ответа и сериализация выполняются один раз."""
+    async def render():
+        return orjson.dumps(adapter.validate_python(await fetch()))
+
+    body = await flight.do(key, etag, render)
+    return Response(body, media_type="application/json", headers=dict(response.headers))
+
+
+EVENT_WITH_SLOTS = TypeAdapter(EventWithSlots)
+EVENTS_PAGE = TypeAdapter(EventsPage)
+# Пачки строк потоковой выдачи — те же модели, что в JSON-ответах
+EVENT_LIST = TypeAdapter(list[Event])
+USER_LIST = TypeAdapter(list[UserListItem])
 
 
 # =============== АУТЕНТИФИКАЦИЯ ===============
 
-@app.post("/api/auth/register")
-async def register(request: Request):
+@app.post("/api/auth/register", response_model=RegisterResponse)
+async def register(user: RegisterRequest, request: Request):
     """Регистрация нового пользователя."""
-    user = await request.json()
-
-    required_fields = [
-        "first_name",
-        "last_name",
-        "email",
-        "password",
-        "telegram_alias",
-        "course",
-        "group_name",
-    ]
-    for field in required_fields:
-        if field not in user or user[field] == "":
-            raise HTTPException(
-                status_code=400, detail=f"❌ Поле '{field}' обязательно")
-
-    if not re.match(r"^[\w\.-]+@[\w\.-]+\.\w+$", user["email"]):
-        raise HTTPException(status_code=400, detail="❌ Некорректный email")
-
-    if len(user["password"]) < 6:
-        raise HTTPException(
-            status_code=400, detail="❌ Пароль минимум 6 символов")
+    # Лимиты проверяются до запроса к БД и хеширования пароля
+    check_auth_rate(request, user.email)
 
-    if UserDB.get_user_by_email(user["email"]):
+    if await run_db(repo.users.get_user_by_email, user.email):
         raise HTTPException(
             status_code=400, detail="❌ Email уже зарегистрирован")
 
-    password_hash = hash_password(user["password"])
+    password_hash = await hash_password_async(user.password)
 
-    user_id = UserDB.create_user(
-        first_name=user["first_name"],
-        last_name=user["last_name"],
-        email=user["email"],
+    user_id = await run_db(
+        repo.users.create_user,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
         password_hash=password_hash,
-        telegram_alias=user["telegram_alias"],
-        course=int(user["course"]),
-        group_name=user["group_name"],
+        telegram_alias=user.telegram_alias,
+        course=user.course,
+        group_name=user.group_name,
     )
 
     if not user_id:
@@ -78,105 +270,98 @@ async def register(request: Request):
     }
 
 
-@app.post("/api/auth/login")
-async def login(request: Request):
+@app.post("/api/auth/login", response_model=LoginResponse)
+async def login(credentials: LoginRequest, request: Request):
     """Авторизация пользователя."""
-    credentials = await request.json()
-    email = credentials.get("email")
-    password = credentials.get("password")
-
-    if not email or not password:
-        raise HTTPException(
-            status_code=400, detail="❌ Email и пароль обязательны")
+    check_auth_rate(request, credentials.email)
 
-    user = UserDB.get_user_by_email(email)
-    if not user or not verify_password(password, user["password"]):
+    user = await run_db(repo.users.get_user_by_email, credentials.email)
+    if not user or not await verify_password_async(credentials.password, user["password"]):
         raise HTTPException(
             status_code=401, detail="❌ Неверный email или пароль")
 
-    return {
-        "success": True,
-        "user_id": user["id"],
-        "first_name": user["first_name"],
-        "last_name": user["last_name"],
-        "email": user["email"],
-        "group_name": user["group_name"],
-        "is_admin": bool(user["is_admin"]),
-        "role": user.get("role", "student"),
-        "course": user["course"],
-        "telegram_alias": user["telegram_alias"]
-    }
+    # Строка пользователя идёт в ответ как есть: пароль и прочие
+    # лишние поля отбрасывает LoginResponse
+    return {**user, "success": True, "user_id": user["id"], **issue_tokens(user)}
+
+
+@app.post("/api/auth/refresh", response_model=Tokens)
+async def refresh(body: RefreshRequest):
+    """Обновить access-токен по refresh-токену (без повторной проверки пароля)."""
+    claims = decode_token(body.refresh_token, token_type="refresh")
+
+    # Перечитываем пользователя, чтобы в новый токен попала актуальная роль
+    user = await run_db(repo.users.get_user_by_id, claims["id"])
+    if not user:
+        raise HTTPException(status_code=401, detail="❌ Пользователь не найден")
+
+    return {"success": True, **issue_tokens(user)}
 
 
 # =============== ПРОФИЛЬ ПОЛЬЗОВАТЕЛЯ ===============
 
-@app.get("/api/user/{user_id}")
+@app.get("/api/user/{user_id}", response_model=User)
 async def get_user(user_id: int):
     """Получить данные пользователя по id."""
-    user = UserDB.get_user_by_id(user_id)
+    user = await run_db(repo.users.get_user_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="❌ Пользователь не найден")
+    return user
 
-    return {
-        "id": user["id"],
-        "first_name": user["first_name"],
-        "last_name": user["last_name"],
-        "email": user["email"],
-        "telegram_alias": user["telegram_alias"],
-        "course": user["course"],
-        "group_name": user["group_name"],
-        "is_admin": bool(user["is_admin"]),
-    }
+
+@app.get("/api/profile/{user_id}", response_model=Profile)
+async def get_profile(user_id: int, request: Request, response: Response):
+    """Профиль одним запросом: данные пользователя, его записи и созданные им мероприятия."""
+    etag = versions.etag(("user", user_id), ("catalog", None))
+    not_modified = _check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    profile = await run_db(repo.users.get_profile, user_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="❌ Пользователь не найден")
+    return profile
 
 
 # =============== ГРУППЫ ===============
 
-@app.get("/api/groups")
-async def get_groups():
+@app.get("/api/groups", response_model=Groups)
+async def get_groups(request: Request, response: Response):
     """Получить список групп."""
-    groups = GroupDB.get_all_groups()
+    not_modified = _check_etag(request, response, versions.etag(("groups", None)))
+    if not_modified:
+        return not_modified
+
+    groups = await run_db(repo.groups.get_all_groups)
     return {"groups": groups}
 
 
 # =============== МЕРОПРИЯТИЯ ===============
 
-@app.post("/api/events")
-async def create_event(request: Request, user_id: int):
+@app.post("/api/events", response_model=CreateEventResponse)
+async def create_event(body: EventRequest, user: dict = Depends(current_user)):
     """Создать мероприятие (только админ/староста)."""
-    body = await request.json()
-    title = body.get("title")
-    start_time = body.get("start_time")
-    end_time = body.get("end_time")
-    total_slots = body.get("total_slots")
-
-    if not title or not start_time or not end_time or total_slots is None:
-        raise HTTPException(
-            status_code=400, detail="❌ Все поля мероприятия обязательны")
-
-    user = UserDB.get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="❌ Пользователь не найден")
-
-    # 🔑 ИСПРАВЛЕНИЕ: используем .get() чтобы не было None
-    user_role = user.get("role", "student")
+    # Роль и группа берутся из токена — без запроса к БД
+    user_role = user["role"]
     if user_role not in ["admin", "starosta"]:
         raise HTTPException(
             status_code=403, detail=f"❌ Только админы и старосты могут создавать мероприятия (ваша роль: {user_role})")
 
-    if not re.match(r"^\d{2}:\d{2}$", start_time) or not re.match(r"^\d{2}:\d{2}$", end_time):
-        raise HTTPException(
-            status_code=400, detail="❌ Неверный формат времени (HH:MM)")
+    slot_minutes = SLOT_MINUTES if body.slot_minutes is None else body.slot_minutes
 
-    event_id = EventDB.create_event(
-        title=title,
-        start_time=start_time,
-        end_time=end_time,
-        total_slots=int(total_slots),
+    event_id = await run_db(
+        repo.events.create_event,
+        title=body.title,
+        start_time=body.start_time,
+        end_time=body.end_time,
+        total_slots=body.total_slots,
         group_name=user["group_name"],
-        organizer_id=user_id,
+        organizer_id=user["id"],
+        slot_minutes=slot_minutes,
+        event_date=body.date,
     )
 
-    SlotDB.create_slots(event_id, start_time, end_time)
+    await run_db(repo.slots.create_slots, event_id, body.start_time, body.end_time, slot_minutes)
 
     return {
         "success": True,
@@ -185,223 +370,573 @@ async def create_event(request: Request, user_id: int):
     }
 
 
-@app.get("/api/events/group/{group_name}")
-async def get_events_by_group(group_name: str):
-    """Получить все мероприятия для конкретной группы."""
-    events = EventDB.get_events_by_group(group_name)
-    return {"events": events}
+@app.post("/api/events/bulk", response_model=ImportEventsResponse)
+async def create_events_bulk(request: Request, format: str | None = IMPORT_FORMAT,
+                             user: dict = Depends(current_user)):
+    """Создать много мероприятий со слотами из CSV или NDJSON одной транзакцией.
 
+    Поля строки — как у POST /api/events. Староста создаёт мероприятия
+    своей группы; админ может указать group_name в строке.
+    """
+    user_role = user["role"]
+    if user_role not in ["admin", "starosta"]:
+        raise HTTPException(
+            status_code=403, detail=f"❌ Только админы и старосты могут создавать мероприятия (ваша роль: {user_role})")
 
-@app.get("/api/events/{event_id}")
-async def get_event(event_id: int):
-    """Получить детали мероприятия и его слоты."""
-    event = EventDB.get_event_by_id(event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
+    rows, errors = await _read_import(request, format)
+
+    events = []
+    for number, event in rows:
+        error = validate_event(event)
+        if not error:
+            try:
+                slot_minutes = parse_slot_minutes(event.get("slot_minutes"), SLOT_MINUTES)
+                event_date = parse_event_date(event.get("date"))
+            except ValueError as e:
+                error = str(e)
+        group_name = user["group_name"]
+        if user_role == "admin" and event.get("group_name"):
+            group_name = str(event["group_name"])
+        if not error and not group_name:
+            error = "❌ Поле 'group_name' обязательно"
+        if error:
+            errors.append({"row": number, "error": error})
+            continue
+        events.append({
+            "title": str(event["title"]),
+            "start_time": event["start_time"],
+            "end_time": event["end_time"],
+            "total_slots": int(event["total_slots"]),
+            "group_name": group_name,
+            "organizer_id": user["id"],
+            "slot_minutes": slot_minutes,
+            "event_date": event_date,
+        })
+
+    event_ids = await run_db(repo.events.create_events_bulk, events) if events else []
 
-    slots = SlotDB.get_slots_by_event(event_id)
+    errors.sort(key=lambda error: error["row"])
     return {
-        "event": event,
-        "slots": slots,
+        "success": True,
+        "created": len(event_ids),
+        "event_ids": event_ids,
+        "failed": len(errors),
+        "errors": errors,
     }
 
 
-@app.put("/api/events/{event_id}")
-async def update_event(event_id: int, request: Request, user_id: int):
-    """Обновить мероприятие (только создатель)."""
-    body = await request.json()
-    title = body.get("title")
-    start_time = body.get("start_time")
-    end_time = body.get("end_time")
-    total_slots = body.get("total_slots")
+def _calendar_bound(value):
+    """Граница диапазона календаря: YYYY-MM-DD или YYYY-MM-DDTHH:MM → секунды
+    (см. timestamp); None — без границы"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="❌ Неверный формат даты (YYYY-MM-DD или YYYY-MM-DDTHH:MM)")
+    return timestamp(moment.date(), moment.hour * 60 + moment.minute)
+
+
+@app.get("/api/events", response_model=EventsPage)
+async def get_events_calendar(request: Request, response: Response, group: str,
+                              start: str | None = Query(None, alias="from"),
+                              end: str | None = Query(None, alias="to"),
+                              limit: int | None = PAGE_LIMIT, cursor: str | None = None,
+                              format: str = PAGE_FORMAT):
+    """Календарь группы: мероприятия с датой, начинающиеся в [from, to),
+    по времени начала (целиком или постранично по cursor/limit)."""
+    start, end = _calendar_bound(start), _calendar_bound(end)
+    not_modified = _check_etag(request, response, versions.etag(("group", group)))
+    if not_modified:
+        return not_modified
+
+    after = _decode_cursor(cursor)
+    if format == "ndjson":
+        return _ndjson(functools.partial(repo.events.get_events_in_range, group, start, end),
+                       EVENT_LIST, after, response)
+    events, next_cursor = await run_db(repo.events.get_events_in_range, group, start, end,
+                                       limit, after)
+    return {"events": events, "next_cursor": next_cursor}
+
+
+@app.get("/api/events/group/{group_name}", response_model=EventsPage)
+async def get_events_by_group(group_name: str, request: Request, response: Response,
+                              limit: int | None = PAGE_LIMIT, cursor: str | None = None,
+                              format: str = PAGE_FORMAT):
+    """Получить мероприятия группы (целиком или постранично по cursor/limit)."""
+    etag = versions.etag(("group", group_name))
+    not_modified = _check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    after = _decode_cursor(cursor)
+    if format == "ndjson":
+        return _ndjson(functools.partial(repo.events.get_events_by_group_page, group_name),
+                       EVENT_LIST, after, response)
+
+    async def fetch():
+        if limit is None and after is None:
+            events = await run_db(repo.events.get_events_by_group, group_name)
+            return {"events": events, "next_cursor": None}
+        events, next_cursor = await run_db(
+            repo.events.get_events_by_group_page, group_name, limit, after)
+        return {"events": events, "next_cursor": next_cursor}
+
+    return await _coalesced(group_events_flight, (group_name, limit, cursor), etag, response,
+                            EVENTS_PAGE, fetch)
+
+
+@app.get("/api/events/group/{group_name}/roster.csv")
+async def export_group_roster(group_name: str, request: Request, response: Response,
+                              user: dict = Depends(current_user)):
+    """Записавшиеся на все мероприятия группы в CSV (староста группы или админ)."""
+    if not _can_export_roster(user, group_name):
+        raise HTTPException(
+            status_code=403, detail="❌ Выгружать записи группы могут только её староста и админы")
+
+    not_modified = _check_etag(request, response, versions.etag(("group", group_name)), PRIVATE)
+    if not_modified:
+        return not_modified
+
+    pages = _pages(functools.partial(repo.registrations.get_group_roster, group_name))
+    return _download(roster_csv(pages), "text/csv", f"roster-{group_name}.csv", response)
+
+
+@app.get("/api/events/{event_id}", response_model=EventWithSlots)
+async def get_event(event_id: int, request: Request, response: Response):
+    """Получить детали мероприятия и его слоты."""
+    etag = versions.etag(("event", event_id))
+    not_modified = _check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    async def fetch():
+        event = await run_db(repo.events.get_event_by_id, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
+
+        slots = await run_db(repo.slots.get_slots_by_event, event_id)
+        return {
+            "event": event,
+            "slots": slots,
+        }
+
+    return await _coalesced(event_flight, event_id, etag, response, EVENT_WITH_SLOTS, fetch)
+
+
+@app.get("/api/events/{event_id}/detail", response_model=EventDetail)
+async def get_event_detail(event_id: int, request: Request, response: Response,
+                           user: dict | None = Depends(optional_user)):
+    """Страница мероприятия одним запросом: мероприятие, слоты со счётчиками
+    свободных/занятых и запись пользователя из токена на это мероприятие
+    (без токена — без персональной части)."""
+    user_id = user["id"] if user else None
+    etag = versions.etag(("event", event_id), ("user", user_id))
+    not_modified = _check_etag(request, response, etag, PRIVATE if user else "no-cache")
+    if not_modified:
+        return not_modified
+
+    detail = await run_db(repo.events.get_event_detail, event_id, user_id)
+    if not detail:
+        raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
+    return detail
+
+
+@app.get("/api/events/{event_id}/roster.csv")
+async def export_event_roster(event_id: int, request: Request, response: Response,
+                              user: dict = Depends(current_user)):
+    """Записавшиеся на мероприятие по времени слота в CSV
+    (организатор, староста группы или админ)."""
+    event = await run_db(repo.events.get_event_by_id, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
+    if not _can_export_roster(user, event["group_name"], event["organizer_id"]):
+        raise HTTPException(
+            status_code=403, detail="❌ Вы не можете выгружать записи на это мероприятие")
+
+    not_modified = _check_etag(request, response, versions.etag(("event", event_id)), PRIVATE)
+    if not_modified:
+        return not_modified
+
+    pages = _pages(functools.partial(repo.registrations.get_event_roster, event_id))
+    return _download(roster_csv(pages), "text/csv", f"roster-{event_id}.csv", response)
+
+
+@app.get("/api/events/{event_id}/stream")
+async def stream_event(event_id: int):
+    """Поток изменений слотов мероприятия (Server-Sent Events).
+
+    События: slot — слот занят/освобождён, event — мероприятие
+    обновлено (нужно перечитать) или удалено (поток закрывается).
+    Записи из других воркеров видны по версии мероприятия и приходят
+    как event/updated.
+    """
+    async def stream():
+        poll = min(SSE_VERSION_POLL, SSE_HEARTBEAT) if SSE_VERSION_POLL > 0 else SSE_HEARTBEAT
+        with slot_events.subscribe(event_id) as subscription:
+            yield "retry: 3000\n\n"
+            seen = versions.get("event", event_id)
+            idle = 0.0
+            while True:
+                message = await subscription.get(timeout=poll)
+                if message is None:
+                    # Мероприятие изменилось в другом воркере — клиент перечитает его
+                    if SSE_VERSION_POLL > 0 and versions.get("event", event_id) != seen:
+                        message = {"type": "event", "action": "updated", "event_id": event_id}
+                    else:
+                        idle += poll
+                        if idle >= SSE_HEARTBEAT:
+                            idle = 0.0
+                            yield ": ping\n\n"
+                        continue
+                seen = versions.get("event", event_id)
+                idle = 0.0
+                data = json.dumps(message, ensure_ascii=False)
+                yield f"event: {message['type']}\ndata: {data}\n\n"
+                if message.get("action") == "deleted":
+                    return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    if not title or not start_time or not end_time or total_slots is None:
-        raise HTTPException(status_code=400, detail="❌ Все поля обязательны")
 
-    existing_event = EventDB.get_event_by_id(event_id)
+@app.put("/api/events/{event_id}", response_model=UpdateEventResponse)
+async def update_event(event_id: int, body: EventRequest, user: dict = Depends(current_user)):
+    """Обновить мероприятие (только создатель)."""
+    existing_event = await run_db(repo.events.get_event_by_id, event_id)
     if not existing_event:
         raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
 
-    if existing_event["organizer_id"] != user_id:
+    if existing_event["organizer_id"] != user["id"]:
         raise HTTPException(
             status_code=403, detail="❌ Вы не можете редактировать это мероприятие")
 
-    # 1) Обновляем мероприятие
-    EventDB.update_event(
+    slot_minutes = body.slot_minutes
+    if slot_minutes is None:
+        slot_minutes = existing_event["slot_minutes"]
+
+    # Обновляем мероприятие и сверяем слоты одной транзакцией:
+    # записи сохраняются на всех слотах, оставшихся в новом окне времени
+    summary = await run_db(
+        repo.events.update_event,
         event_id=event_id,
-        title=title,
-        start_time=start_time,
-        end_time=end_time,
-        total_slots=int(total_slots),
+        title=body.title,
+        start_time=body.start_time,
+        end_time=body.end_time,
+        total_slots=body.total_slots,
+        slot_minutes=slot_minutes,
+        event_date=body.date,
     )
 
-    # 2) Удаляем ВСЕ регистрации (записи студентов) на это мероприятие
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'DELETE FROM registrations WHERE event_id = ?', (event_id,))
-        conn.commit()
-
-    # 3) Пересоздаём тайм-слоты
-    SlotDB.delete_slots_by_event(event_id)
-    SlotDB.create_slots(event_id, start_time, end_time)
+    message = "✅ Мероприятие обновлено!"
+    if summary["cancelled"]:
+        message += f" Отменено записей на удалённые слоты: {summary['cancelled']}."
+    if summary["promoted"]:
+        message += f" Записано из очереди ожидания: {summary['promoted']}."
 
     return {
         "success": True,
-        "message": "✅ Мероприятие обновлено! Все записи отменены."
+        "message": message,
+        "slots": summary,
     }
 
 
-@app.delete("/api/events/{event_id}")
-async def delete_event(event_id: int, user_id: int):
+@app.delete("/api/events/{event_id}", response_model=Message)
+async def delete_event(event_id: int, user: dict = Depends(current_user)):
     """Удалить мероприятие (только создатель)."""
-    existing_event = EventDB.get_event_by_id(event_id)
+    existing_event = await run_db(repo.events.get_event_by_id, event_id)
     if not existing_event:
         raise HTTPException(status_code=404, detail="❌ Мероприятие не найдено")
 
-    if existing_event["organizer_id"] != user_id:
+    if existing_event["organizer_id"] != user["id"]:
         raise HTTPException(
             status_code=403, detail="❌ Вы не можете удалить это мероприятие")
 
-    EventDB.delete_event(event_id)
+    await run_db(repo.events.delete_event, event_id)
     return {"success": True, "message": "✅ Мероприятие удалено!"}
 
 
-@app.get("/api/events/organizer/{user_id}")
-async def get_user_events(user_id: int):
-    """Получить мероприятия, созданные пользователем."""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM events WHERE organizer_id = ?", (user_id,))
-        events = [dict(row) for row in cursor.fetchall()]
-    return {"events": events}
+@app.get("/api/events/organizer/{user_id}", response_model=EventsPage)
+async def get_user_events(user_id: int, limit: int | None = PAGE_LIMIT,
+                          cursor: str | None = None, format: str = PAGE_FORMAT):
+    """Получить мероприятия, созданные пользователем (целиком или постранично)."""
+    after = _decode_cursor(cursor, size=1)
+    if format == "ndjson":
+        return _ndjson(functools.partial(repo.events.get_events_by_organizer, user_id),
+                       EVENT_LIST, after)
+
+    events, next_cursor = await run_db(repo.events.get_events_by_organizer, user_id, limit, after)
+    return {"events": events, "next_cursor": next_cursor}
 
 
 # =============== ЗАПИСИ НА СЛОТЫ ===============
 
-@app.post("/api/registrations")
+@app.post("/api/registrations", response_model=Message)
 async def register_for_event(user_id: int, event_id: int, time_slot_id: int):
     """Записать пользователя на слот мероприятия."""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM registrations WHERE user_id = ? AND event_id = ?",
-            (user_id, event_id),
-        )
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=400, detail="❌ Вы уже записаны на это мероприятие")
-
-    if RegistrationDB.register_user(user_id, event_id, time_slot_id):
-        return {"success": True, "message": "✅ Вы записались!"}
-    else:
+    result = await run_db(repo.registrations.register_user, user_id, event_id, time_slot_id)
+
+    if result == ALREADY_REGISTERED:
+        raise HTTPException(
+            status_code=400, detail="❌ Вы уже записаны на это мероприятие")
+    if result == SLOT_TAKEN:
         raise HTTPException(status_code=400, detail="❌ Этот слот уже занят")
 
+    return {"success": True, "message": "✅ Вы записались!"}
+
 
-@app.get("/api/registrations/{user_id}")
-async def get_user_registrations(user_id: int):
+@app.get("/api/registrations/{user_id}", response_model=Registrations)
+async def get_user_registrations(user_id: int, request: Request, response: Response):
     """Получить все записи пользователя."""
-    registrations = RegistrationDB.get_user_registrations(user_id)
-
-    result = []
-    for reg in registrations:
-        result.append({
-            "id": reg["id"],
-            "event_id": reg["event_id"],
-            "title": reg["title"],
-            "start_time": reg["start_time"],
-            "end_time": reg["end_time"],
-            "slot_time": reg["slot_time"],
-            "time_slot_id": reg["time_slot_id"]
-        })
+    etag = versions.etag(("user", user_id), ("catalog", None))
+    not_modified = _check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    registrations = await run_db(repo.registrations.get_user_registrations, user_id)
+    return {"registrations": registrations}
 
-    return {"registrations": result}
 
+@app.get("/api/registrations/{user_id}/calendar.ics")
+async def export_user_calendar(user_id: int, request: Request, response: Response,
+                               user: dict = Depends(current_user)):
+    """Записи пользователя календарём iCalendar (сам пользователь или админ)."""
+    if user["id"] != user_id and user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="❌ Можно выгружать только свой календарь")
+    etag = versions.etag(("user", user_id), ("catalog", None))
+    not_modified = _check_etag(request, response, etag, PRIVATE)
+    if not_modified:
+        return not_modified
 
-@app.delete("/api/registrations/{registration_id}/{time_slot_id}")
+    pages = _pages(functools.partial(repo.registrations.get_user_registrations_page, user_id))
+    return _download(registrations_ics(pages), "text/calendar", f"mephi-link-{user_id}.ics",
+                     response)
+
+
+@app.delete("/api/registrations/{registration_id}/{time_slot_id}", response_model=CancelResponse)
 async def cancel_registration(registration_id: int, time_slot_id: int):
     """Отменить запись пользователя на слот."""
     try:
-        RegistrationDB.cancel_registration(registration_id, time_slot_id)
-        return {"success": True, "message": "✅ Запись отменена!"}
+        promoted = await run_db(repo.registrations.cancel_registration, registration_id, time_slot_id)
+        return {"success": True, "message": "✅ Запись отменена!", "promoted_user_id": promoted}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"❌ Ошибка: {str(e)}")
 
 
-# =============== АДМИН-ПАНЕЛЬ ===============
+@app.post("/api/events/{event_id}/waitlist", response_model=WaitlistJoinResponse)
+async def join_waitlist(event_id: int, user: dict = Depends(current_user)):
+    """Встать в очередь ожидания: при отмене чужой записи слот
+    автоматически достанется первому в очереди."""
+    result, position = await run_db(repo.registrations.join_waitlist, user["id"], event_id)
 
-@app.post("/api/admin/make-admin")
-async def make_admin(request: Request, admin_id: int):
-    """Выдать роль пользователю (только админ)."""
-    body = await request.json()
-    user_id = body.get("user_id")
-    role = body.get("role", "student")
+    if result is None:
+        raise HTTPException(status_code=404, detail="❌ Мероприятие или пользователь не найдены")
+    if result == ALREADY_REGISTERED:
+        raise HTTPException(
+            status_code=400, detail="❌ Вы уже записаны на это мероприятие")
+    if result == SLOTS_AVAILABLE:
+        raise HTTPException(
+            status_code=409, detail="❌ Есть свободные слоты — запишитесь на один из них")
 
-    if not user_id:
-        raise HTTPException(status_code=400, detail="❌ user_id обязателен")
+    message = "✅ Вы в очереди" if result == WAITLISTED else "ℹ️ Вы уже в очереди"
+    return {"success": True, "message": f"{message} (позиция {position})", "position": position}
+
+
+@app.get("/api/events/{event_id}/waitlist", response_model=WaitlistStatus)
+async def get_waitlist_status(event_id: int, user: dict | None = Depends(optional_user)):
+    """Длина очереди ожидания и позиция в ней пользователя из токена
+    (без токена — только длина)."""
+    user_id = user["id"] if user else None
+    return await run_db(repo.registrations.get_waitlist_status, user_id, event_id)
 
-    admin_user = UserDB.get_user_by_id(admin_id)
-    if not admin_user or admin_user["role"] != "admin":
+
+@app.delete("/api/events/{event_id}/waitlist", response_model=Message)
+async def leave_waitlist(event_id: int, user: dict = Depends(current_user)):
+    """Выйти из очереди ожидания."""
+    if not await run_db(repo.registrations.leave_waitlist, user["id"], event_id):
+        raise HTTPException(status_code=404, detail="❌ Вы не стоите в очереди")
+    return {"success": True, "message": "✅ Вы вышли из очереди"}
+
+
+# =============== АДМИН-ПАНЕЛЬ ===============
+
+@app.post("/api/admin/make-admin", response_model=Message)
+async def make_admin(body: MakeAdminRequest, admin_user: dict = Depends(current_user)):
+    """Выдать роль пользователю (только админ)."""
+    if admin_user["role"] != "admin":
         raise HTTPException(
             status_code=403, detail="❌ Только администраторы могут выдавать роли")
 
-    UserDB.set_user_role(int(user_id), role)
-
     # is_admin = 1 только если role == "admin"
-    with get_db() as conn:
-        cursor = conn.cursor()
-        is_admin_value = 1 if role == "admin" else 0
-        cursor.execute(
-            'UPDATE users SET is_admin = ? WHERE id = ?',
-            (is_admin_value, int(user_id))
-        )
-        conn.commit()
-
-    return {"success": True, "message": f"✅ Роль {role} выдана!"}
-
-
-@app.get("/api/admin/users")
-async def get_all_users(admin_id: int):
-    """Получить список всех пользователей (только админ)."""
-    admin_user = UserDB.get_user_by_id(admin_id)
-    if not admin_user or admin_user["role"] != "admin":
+    await run_db(repo.users.set_user_role, body.user_id, body.role)
+
+    return {"success": True, "message": f"✅ Роль {body.role} выдана!"}
+
+
+@app.get("/api/admin/users", response_model=UsersPage)
+async def get_all_users(limit: int | None = PAGE_LIMIT, cursor: str | None = None,
+                        format: str = PAGE_FORMAT, admin_user: dict = Depends(current_user)):
+    """Получить список пользователей (только админ).
+
+    С limit — постранично, следующая страница по next_cursor;
+    с format=ndjson — потоком, по строке JSON на пользователя.
+    """
+    if admin_user["role"] != "admin":
         raise HTTPException(
             status_code=403, detail="❌ Только администраторы могут просматривать пользователей")
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, first_name, last_name, email, group_name, role, is_admin "
-            "FROM users ORDER BY created_at DESC"
-        )
-        users = [dict(row) for row in cursor.fetchall()]
+    after = _decode_cursor(cursor)
+    if format == "ndjson":
+        return _ndjson(repo.users.get_all_users, USER_LIST, after)
+
+    users, next_cursor = await run_db(repo.users.get_all_users, limit, after)
+
+    return {"users": users, "next_cursor": next_cursor}
+
+
+@app.post("/api/admin/import/users", response_model=ImportUsersResponse)
+async def import_users(request: Request, format: str | None = IMPORT_FORMAT,
+                       admin_user: dict = Depends(current_user)):
+    """Массовый импорт пользователей из CSV или NDJSON (только админ).
+
+    Пароли хешируются параллельно в пуле процессов, строки вставляются
+    одной транзакцией. В ответе — отчёт об ошибках по номерам строк.
+    """
+    if admin_user["role"] != "admin":
+        raise HTTPException(
+            status_code=403, detail="❌ Только администраторы могут импортировать пользователей")
+
+    rows, errors = await _read_import(request, format)
+
+    valid = []
+    seen = set()
+    for number, user in rows:
+        error = validate_user(user)
+        if not error and user["email"] in seen:
+            error = "❌ Email повторяется в файле"
+        if error:
+            errors.append({"row": number, "email": user.get("email"), "error": error})
+            continue
+        seen.add(user["email"])
+        valid.append((number, user))
+
+    # Занятые email отсеиваем до хеширования — это самая дорогая часть
+    existing = await run_db(repo.users.find_existing_emails, seen)
+    pending = []
+    for number, user in valid:
+        if user["email"] in existing:
+            errors.append({"row": number, "email": user["email"],
+                           "error": "❌ Email уже зарегистрирован"})
+        else:
+            pending.append((number, user))
+
+    hashes = await hash_passwords_async([str(user["password"]) for _, user in pending])
+    users = [{
+        "first_name": str(user["first_name"]),
+        "last_name": str(user["last_name"]),
+        "email": user["email"],
+        "password_hash": password_hash,
+        "telegram_alias": str(user["telegram_alias"]),
+        "course": int(user["course"]),
+        "group_name": str(user["group_name"]),
+    } for (_, user), password_hash in zip(pending, hashes)]
+
+    # Email, зарегистрированные за время хеширования, тоже попадают в отчёт
+    taken = await run_db(repo.users.create_users_bulk, users) if users else set()
+    for number, user in pending:
+        if user["email"] in taken:
+            errors.append({"row": number, "email": user["email"],
+                           "error": "❌ Email уже зарегистрирован"})
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "success": True,
+        "created": len(users) - len(taken),
+        "failed": len(errors),
+        "errors": errors,
+    }
+
 
-    return {"users": users}
+@app.get("/api/admin/cache-stats", response_model=CacheStats)
+async def get_cache_stats(admin_user: dict = Depends(current_user)):
+    """Счётчики попаданий/промахов кеша чтения и объединения одинаковых
+    запросов по ключам (только админ)."""
+    if admin_user["role"] != "admin":
+        raise HTTPException(
+            status_code=403, detail="❌ Только администраторы могут просматривать статистику")
 
+    return {"caches": cache_stats(), "coalescing": coalesce_stats()}
 
-@app.delete("/api/admin/users/{user_id}")
-async def delete_user(user_id: int, admin_id: int):
+
+@app.get("/api/admin/slow-queries", response_model=SlowQueries)
+async def get_slow_queries(limit: int = Query(10, ge=1, le=100),
+                           order: str = Query("max", pattern="^(max|total)$"),
+                           admin_user: dict = Depends(current_user)):
+    """Самые медленные формы SQL-запросов с планами выполнения (только админ)."""
+    if admin_user["role"] != "admin":
+        raise HTTPException(
+            status_code=403, detail="❌ Только администраторы могут просматривать статистику")
+
+    return {
+        "threshold_ms": slow_queries.threshold * 1000,
+        "queries": slow_queries.top(limit, order),
+    }
+
+
+@app.delete("/api/admin/users/{user_id}", response_model=Message)
+async def delete_user(user_id: int, admin_user: dict = Depends(current_user)):
     """Удалить пользователя (только админ)."""
-    admin_user = UserDB.get_user_by_id(admin_id)
-    if not admin_user or not admin_user["is_admin"]:
+    if admin_user["role"] != "admin":
         raise HTTPException(
             status_code=403, detail="❌ Только администраторы могут удалять пользователей")
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM registrations WHERE user_id = ?", (user_id,))
-        cursor.execute("DELETE FROM events WHERE organizer_id = ?", (user_id,))
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        conn.commit()
+    if not await run_db(repo.users.delete_user, user_id):
+        raise HTTPException(status_code=404, detail="❌ Пользователь не найден")
 
     return {"success": True, "message": "✅ Пользователь удалён!"}
 
 
+@app.post("/api/admin/users/bulk-delete", response_model=BulkDeleteResponse)
+async def delete_users_bulk(body: BulkDeleteRequest, admin_user: dict = Depends(current_user)):
+    """Удалить много пользователей одной транзакцией (только админ).
+
+    Мероприятия, записи и очереди удаляемых уходят каскадом, занятые
+    ими слоты достаются ожидающим. Несуществующие id пропускаются.
+    """
+    if admin_user["role"] != "admin":
+        raise HTTPException(
+            status_code=403, detail="❌ Только администраторы могут удалять пользователей")
+
+    deleted = await run_db(repo.users.delete_users, body.ids)
+    return {"success": True, "message": f"✅ Удалено пользователей: {deleted}", "deleted": deleted}
+
+
+@app.post("/api/admin/events/bulk-delete", response_model=BulkDeleteResponse)
+async def delete_events_bulk(body: BulkDeleteRequest, admin_user: dict = Depends(current_user)):
+    """Удалить много мероприятий со слотами и записями одной транзакцией (только админ)."""
+    if admin_user["role"] != "admin":
+        raise HTTPException(
+            status_code=403, detail="❌ Только администраторы могут удалять мероприятия")
+
+    deleted = await run_db(repo.events.delete_events, body.ids)
+    return {"success": True, "message": f"✅ Удалено мероприятий: {deleted}", "deleted": deleted}
+
+
+# =============== МЕТРИКИ ===============
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # =============== ROOT ===============
 
-@app.get("/")
+@app.get("/", response_model=Root)
 async def root():
     """Простой health-check."""
     return {"message": "🚀 MEPhI-Link API запущен!", "docs": "/docs"}
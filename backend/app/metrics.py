@@ -0,0 +1,196 @@
+# backend/app/metrics.py
+import bisect
+import os
+import threading
+import time
+
+# Сбор метрик можно отключить целиком
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+
+# Границы корзин гистограмм, секунды
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Counter:
+    """Счётчик с метками (значения меток — кортеж в порядке labelnames)"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{_labels_text(self.labelnames, labels)} {value}'
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами в формате Prometheus"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики по корзинам (+Inf последним), сумма, количество]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted((labels, ([*state[0]], state[1], state[2]))
+                           for labels, state in self._values.items())
+        names = self.labelnames + ('le',)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket
+                yield f'{self.name}_bucket{_labels_text(names, labels + (bound,))} {cumulative}'
+            yield f'{self.name}_sum{_labels_text(self.labelnames, labels)} {total}'
+            yield f'{self.name}_count{_labels_text(self.labelnames, labels)} {count}'
+
+
+class Callback:
+    """Метрика, значения которой считываются функцией при каждом сборе"""
+
+    def __init__(self, name, help, kind, labelnames, func):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def collect(self):
+        for labels, value in sorted(self.func().items()):
+            yield f'{self.name}{_labels_text(self.labelnames, labels)} {value}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, kind, labelnames, func):
+        """func() -> {кортеж меток: значение}"""
+        return self.register(Callback(name, help, kind, labelnames, func))
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP-запросы по маршруту и статусу',
+    ('method', 'route', 'status'))
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса',
+    ('method', 'route'))
+
+db_query_latency = registry.histogram(
+    'db_query_duration_seconds', 'Время выполнения SQL-запросов',
+    ('operation',))
+db_rows = registry.counter(
+    'db_rows_total', 'Строки, прочитанные (read) и изменённые (write) запросами',
+    ('operation', 'kind'))
+db_lock_wait = registry.histogram(
+    'db_lock_wait_seconds', 'Ожидание блокировки записи (BEGIN IMMEDIATE)',
+    ('operation',))
+db_busy_retries = registry.counter(
+    'db_busy_retries_total', 'Повторы транзакций из-за занятой БД',
+    ('operation',))
+
+password_hash_latency = registry.histogram(
+    'password_hash_duration_seconds', 'Хеширование и проверка паролей (PBKDF2) с ожиданием пула',
+    ('op',))
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время и статус каждого HTTP-запроса по шаблону маршрута.
+
+    Метка route — шаблон пути (/api/events/{event_id}), а не сам путь,
+    чтобы число рядов не росло с числом id. Для потоковых ответов время
+    считается до конца отправки тела.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route(self, scope):
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if self._routes is None:
+            self._routes = {getattr(route, 'endpoint', None): route.path
+                            for route in scope['app'].routes}
+        return self._routes.get(endpoint, 'unmatched')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route(scope)
+            method = scope['method']
+            http_latency.observe(time.perf_counter() - started, (method, route))
+            http_requests.inc((method, route, str(status)))
@@ -0,0 +1,134 @@
+# backend/app/pubsub.py
+import asyncio
+import os
+import threading
+from collections import deque
+
+from app.metrics import registry
+
+# Сколько непрочитанных сообщений хранит один подписчик (старые вытесняются)
+SUBSCRIBER_BUFFER = int(os.getenv('PUBSUB_BUFFER', '64'))
+
+
+class Subscription:
+    """Подписка на тему: буфер сообщений и флаг «есть новые».
+
+    Пока подписчик простаивает, он не занимает ничего, кроме буфера и
+    asyncio.Event; публикация не создаёт задач на каждого подписчика.
+    """
+
+    def __init__(self, broker, topic, buffer=SUBSCRIBER_BUFFER):
+        self.broker = broker
+        self.topic = topic
+        self.dropped = 0
+        self._messages = deque(maxlen=buffer)
+        self._ready = asyncio.Event()
+
+    def push(self, message):
+        if len(self._messages) == self._messages.maxlen:
+            self.dropped += 1
+        self._messages.append(message)
+        self._ready.set()
+
+    async def get(self, timeout=None):
+        """Ждёт следующее сообщение; по таймауту возвращает None"""
+        if not self._messages:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._messages.popleft()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    """In-process pub/sub с рассылкой по темам (например, по id мероприятия).
+
+    publish() можно вызывать из любого потока (в том числе из пула потоков
+    БД): рассылка выполняется одним колбэком в event loop, который
+    раскладывает сообщение по буферам всех подписчиков темы.
+    """
+
+    def __init__(self):
+        self._topics = {}
+        self._loop = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def bind(self, loop=None):
+        """Привязывает брокер к event loop приложения (при старте)"""
+        self._loop = loop or asyncio.get_running_loop()
+
+    def unbind(self):
+        self._loop = None
+        with self._lock:
+            self._topics.clear()
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def subscribers(self, topic):
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic, message):
+        """Отправляет сообщение всем подписчикам темы (потокобезопасно)"""
+        loop = self._loop
+        if loop is None or topic not in self._topics:
+            return
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(topic, message)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._fanout, topic, message)
+            except RuntimeError:
+                # event loop уже закрыт (остановка приложения)
+                pass
+
+    def _fanout(self, topic, message):
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            subscription.push(message)
+        self.delivered += len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscribers": sum(len(s) for s in self._topics.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+# Изменения слотов мероприятий: тема — id мероприятия
+slot_events = Broker()
+
+registry.callback('sse_subscribers', 'Открытые подписки на изменения слотов', 'gauge',
+                  (), lambda: {(): slot_events.stats()["subscribers"]})
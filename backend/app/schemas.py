@@ -0,0 +1,331 @@
+# backend/app/schemas.py
+"""Модели запросов и ответов API.
+
+Запросы — pydantic-модели: проверки те же, что у импорта (app.importer),
+и с теми же текстами ошибок; обработчик RequestValidationError в main
+отдаёт их как 400.
+
+Ответы — TypedDict: строки хранилища отдаются как есть, без
+промежуточных копий в обработчиках. Проверка TypedDict в несколько раз
+дешевле, чем BaseModel, а лишние поля строки (например, password)
+в ответ не попадают.
+"""
+import datetime
+import os
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, model_validator
+from typing_extensions import NotRequired, TypedDict
+
+from app.importer import parse_event_date, parse_slot_minutes, validate_event, validate_user
+
+# Максимум id в одном запросе массового удаления
+MAX_BULK_DELETE = int(os.getenv('MAX_BULK_DELETE', '10000'))
+
+
+def _object(data):
+    if not isinstance(data, dict):
+        raise ValueError("❌ Ожидается JSON-объект")
+    return data
+
+
+# =============== ЗАПРОСЫ ===============
+
+class RegisterRequest(BaseModel):
+    first_name: str
+    last_name: str
+    email: str
+    password: str
+    telegram_alias: str
+    course: int
+    group_name: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        error = validate_user(_object(data))
+        if error:
+            raise ValueError(error)
+        return data
+
+
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        if not _object(data).get("email") or not data.get("password"):
+            raise ValueError("❌ Email и пароль обязательны")
+        return data
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        if not _object(data).get("refresh_token"):
+            raise ValueError("❌ refresh_token обязателен")
+        return data
+
+
+class EventRequest(BaseModel):
+    """Создание и изменение мероприятия; slot_minutes=None — по умолчанию
+    (при создании) или прежняя длительность (при изменении); date=None —
+    без даты (при создании) или прежняя дата (при изменении)"""
+    title: str
+    start_time: str
+    end_time: str
+    total_slots: int
+    slot_minutes: Optional[int] = None
+    date: Optional[datetime.date] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        error = validate_event(_object(data))
+        if error:
+            raise ValueError(error)
+        return {**data, "slot_minutes": parse_slot_minutes(data.get("slot_minutes"), None),
+                "date": parse_event_date(data.get("date"))}
+
+
+class MakeAdminRequest(BaseModel):
+    user_id: int
+    role: Literal["admin", "starosta", "student"] = "student"
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        if not _object(data).get("user_id"):
+            raise ValueError("❌ user_id обязателен")
+        return data
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: list[int]
+
+    @model_validator(mode="before")
+    @classmethod
+    def check(cls, data):
+        ids = _object(data).get("ids")
+        if not ids:
+            raise ValueError("❌ Список ids пуст")
+        if isinstance(ids, list) and len(ids) > MAX_BULK_DELETE:
+            raise ValueError(f"❌ Слишком много id (максимум {MAX_BULK_DELETE})")
+        return data
+
+
+# =============== ОТВЕТЫ ===============
+
+class Message(TypedDict):
+    success: bool
+    message: str
+
+
+class RegisterResponse(Message):
+    user_id: int
+
+
+class Tokens(TypedDict):
+    success: bool
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+
+
+class LoginResponse(Tokens):
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+    group_name: Optional[str]
+    is_admin: bool
+    role: Optional[str]
+    course: Optional[int]
+    telegram_alias: Optional[str]
+
+
+class User(TypedDict):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    telegram_alias: Optional[str]
+    course: Optional[int]
+    group_name: Optional[str]
+    is_admin: bool
+
+
+class ProfileUser(User):
+    role: Optional[str]
+
+
+class UserListItem(TypedDict):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    group_name: Optional[str]
+    role: Optional[str]
+    is_admin: bool
+    created_at: Optional[str]
+
+
+class UsersPage(TypedDict):
+    users: list[UserListItem]
+    next_cursor: Optional[str]
+
+
+class Event(TypedDict):
+    id: int
+    title: str
+    start_time: str
+    end_time: str
+    total_slots: int
+    group_name: str
+    organizer_id: int
+    created_at: Optional[str]
+    slot_minutes: int
+    starts_at: Optional[int]
+    ends_at: Optional[int]
+    free_slots: int
+    booked_slots: int
+
+
+class EventsPage(TypedDict):
+    events: list[Event]
+    next_cursor: Optional[str]
+
+
+class Slot(TypedDict):
+    id: int
+    slot_time: str
+    is_available: int
+
+
+class EventWithSlots(TypedDict):
+    event: Event
+    slots: list[Slot]
+
+
+class Availability(TypedDict):
+    total: int
+    free: int
+    taken: int
+
+
+class MyRegistration(TypedDict):
+    id: int
+    time_slot_id: int
+    slot_time: str
+
+
+class WaitlistPosition(TypedDict):
+    length: int
+    my_position: Optional[int]
+
+
+class EventDetail(EventWithSlots):
+    availability: Availability
+    my_registration: Optional[MyRegistration]
+    waitlist: WaitlistPosition
+
+
+class Registration(TypedDict):
+    id: int
+    event_id: int
+    title: str
+    start_time: str
+    end_time: str
+    slot_time: str
+    time_slot_id: int
+    group_name: str
+    starts_at: Optional[int]
+    slot_minutes: int
+    registered_at: Optional[str]
+
+
+class Registrations(TypedDict):
+    registrations: list[Registration]
+
+
+class Profile(TypedDict):
+    user: ProfileUser
+    registrations: list[Registration]
+    organized_events: list[Event]
+
+
+class Groups(TypedDict):
+    groups: list[str]
+
+
+class CreateEventResponse(TypedDict):
+    success: bool
+    event_id: int
+    message: str
+
+
+class SlotsSummary(TypedDict):
+    kept: int
+    added: int
+    removed: int
+    cancelled: int
+    promoted: int
+
+
+class UpdateEventResponse(Message):
+    slots: SlotsSummary
+
+
+class BulkDeleteResponse(Message):
+    deleted: int
+
+
+class CancelResponse(Message):
+    promoted_user_id: Optional[int]
+
+
+class WaitlistJoinResponse(Message):
+    position: Optional[int]
+
+
+class WaitlistStatus(TypedDict):
+    length: int
+    position: Optional[int]
+
+
+class ImportRowError(TypedDict):
+    row: int
+    error: str
+    email: NotRequired[Any]
+
+
+class ImportUsersResponse(TypedDict):
+    success: bool
+    created: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class ImportEventsResponse(ImportUsersResponse):
+    event_ids: list[int]
+
+
+class CacheStats(TypedDict):
+    caches: dict[str, dict[str, Any]]
+    coalescing: dict[str, dict[str, Any]]
+
+
+class SlowQueries(TypedDict):
+    threshold_ms: float
+    queries: list[dict[str, Any]]
+
+
+class Root(TypedDict):
+    message: str
+    docs: str
@@ -0,0 +1,107 @@
+# backend/app/throttle.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from app.metrics import registry
+
+# Ограничение частоты логинов и регистраций (каждая стоит одного PBKDF2)
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', '1') != '0'
+# Попыток в минуту и размер «запаса» на всплеск — с одного IP...
+THROTTLE_IP_PER_MINUTE = float(os.getenv('THROTTLE_IP_PER_MINUTE', '30'))
+THROTTLE_IP_BURST = int(os.getenv('THROTTLE_IP_BURST', '10'))
+# ...и на один email
+THROTTLE_EMAIL_PER_MINUTE = float(os.getenv('THROTTLE_EMAIL_PER_MINUTE', '6'))
+THROTTLE_EMAIL_BURST = int(os.getenv('THROTTLE_EMAIL_BURST', '5'))
+# Сколько ключей (IP/email) помнит каждый ограничитель
+THROTTLE_MAX_KEYS = int(os.getenv('THROTTLE_MAX_KEYS', '100000'))
+# Брать IP клиента из X-Forwarded-For (только за доверенным прокси)
+TRUST_FORWARDED = os.getenv('TRUST_FORWARDED', '0') == '1'
+
+throttle_rejections = registry.counter(
+    'throttle_rejections_total', 'Запросы, отклонённые ограничителем частоты',
+    ('limiter',))
+
+
+class TokenBucketLimiter:
+    """Token bucket на ключ с ограниченной памятью.
+
+    Корзины хранятся в LRU-порядке; при переполнении вытесняется давно
+    не использованный ключ. Вытеснение безопасно: за время простоя
+    корзина, скорее всего, и так успела наполниться.
+    """
+
+    def __init__(self, name, per_minute, burst, max_keys=THROTTLE_MAX_KEYS):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key):
+        """Забирает токен; возвращает (разрешено, через сколько секунд повторить)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.pop(key, None)
+            if state is None:
+                tokens = self.burst
+            else:
+                tokens, updated = state
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                allowed, retry_after = True, 0.0
+            else:
+                allowed = False
+                retry_after = (1 - tokens) / self.rate if self.rate else 60.0
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+ip_limiter = TokenBucketLimiter('ip', THROTTLE_IP_PER_MINUTE, THROTTLE_IP_BURST)
+email_limiter = TokenBucketLimiter('email', THROTTLE_EMAIL_PER_MINUTE, THROTTLE_EMAIL_BURST)
+
+registry.callback('throttle_keys', 'Ключей в памяти ограничителя частоты', 'gauge',
+                  ('limiter',), lambda: {(limiter.name,): len(limiter)
+                                         for limiter in (ip_limiter, email_limiter)})
+
+
+def client_ip(request: Request):
+    if TRUST_FORWARDED:
+        forwarded = request.headers.get('x-forwarded-for')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.client.host if request.client else 'unknown'
+
+
+def check_auth_rate(request: Request, email=None):
+    """Проверяет лимиты по IP и email до хеширования пароля; иначе 429"""
+    if not THROTTLE_ENABLED:
+        return
+    checks = [(ip_limiter, client_ip(request))]
+    if email:
+        checks.append((email_limiter, str(email).strip().lower()))
+    for limiter, key in checks:
+        allowed, retry_after = limiter.hit(key)
+        if not allowed:
+            throttle_rejections.inc((limiter.name,))
+            seconds = max(1, math.ceil(retry_after))
+            raise HTTPException(
+                status_code=429,
+                detail=f"❌ Слишком много попыток, повторите через {seconds} с",
+                headers={"Retry-After": str(seconds)},
+            )
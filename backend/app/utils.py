@@ -1,6 +1,32 @@
 # backend/app/utils.py
+import asyncio
 import hashlib
+import os
 import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.metrics import password_hash_latency, registry
+
+# Число процессов для хеширования паролей (по умолчанию — по числу ядер)
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(os.cpu_count() or 1)))
+# Сколько хеширований может ждать/выполняться одновременно и сколько
+# секунд запрос ждёт своей очереди, прежде чем получить отказ
+HASH_CONCURRENCY = int(os.getenv('HASH_CONCURRENCY', str(HASH_WORKERS * 2)))
+HASH_QUEUE_TIMEOUT = float(os.getenv('HASH_QUEUE_TIMEOUT', '2'))
+
+_hash_executor = None
+_hash_slots = None
+_hash_in_flight = 0
+
+hash_rejections = registry.counter(
+    'password_hash_rejections_total', 'Хеширования, не дождавшиеся очереди')
+registry.callback('password_hash_in_flight', 'Хеширования в работе', 'gauge',
+                  (), lambda: {(): _hash_in_flight})
+
+
+class HashBusy(Exception):
+    """Очередь на хеширование паролей переполнена"""
 
 
 def hash_password(password: str) -> str:
@@ -20,3 +46,98 @@ def verify_password(password: str, password_hash: str) -> bool:
         return new_hash.hex() == pwd_hash
     except:
         return False
+
+
+def _get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _hash_executor
+
+
+async def _timed(op, awaitable):
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        password_hash_latency.observe(time.perf_counter() - started, (op,))
+
+
+def _get_hash_slots(loop):
+    global _hash_slots
+    # Семафор asyncio привязан к event loop, в котором создан
+    if _hash_slots is None or _hash_slots[0] is not loop:
+        _hash_slots = (loop, asyncio.Semaphore(HASH_CONCURRENCY))
+    return _hash_slots[1]
+
+
+async def _run_hash(op, func, *args):
+    """Хеширование в пуле процессов с ограничением числа одновременных
+    операций; если место не освободилось за HASH_QUEUE_TIMEOUT — HashBusy"""
+    global _hash_in_flight
+    loop = asyncio.get_running_loop()
+    slots = _get_hash_slots(loop)
+    try:
+        await asyncio.wait_for(slots.acquire(), HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        hash_rejections.inc()
+        raise HashBusy()
+    _hash_in_flight += 1
+    try:
+        return await _timed(op, loop.run_in_executor(_get_hash_executor(), func, *args))
+    finally:
+        _hash_in_flight -= 1
+        slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    """Хеширует пароль в пуле процессов, не блокируя event loop"""
+    return await _run_hash('hash', hash_password, password)
+
+
+def _hash_many(passwords):
+    return [hash_password(password) for password in passwords]
+
+
+async def hash_passwords_async(passwords):
+    """Хеширует список паролей пачками параллельно на процессах пула.
+
+    Пачки идут через ту же очередь, что и вход/регистрация (_run_hash):
+    импорт занимает не больше HASH_WORKERS мест из HASH_CONCURRENCY,
+    остальные остаются интерактивным запросам. Если место не
+    освободилось за HASH_QUEUE_TIMEOUT — HashBusy, остальные пачки
+    отменяются. Порядок результатов совпадает с порядком паролей.
+    """
+    if not passwords:
+        return []
+    # По несколько пачек на процесс — чтобы процессы не простаивали в конце
+    size = max(1, -(-len(passwords) // (HASH_WORKERS * 4)))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = [None] * len(chunks)
+    pending = iter(range(len(chunks)))
+    lanes = max(1, min(HASH_WORKERS, HASH_CONCURRENCY - 1, len(chunks)))
+
+    async def lane():
+        for index in pending:
+            results[index] = await _run_hash('hash_bulk', _hash_many, chunks[index])
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for _ in range(lanes):
+                group.create_task(lane())
+    except* HashBusy:
+        raise HashBusy() from None
+    return [password_hash for chunk in results for password_hash in chunk]
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """Проверяет пароль в пуле процессов, не блокируя event loop"""
+    return await _run_hash('verify', verify_password, password, password_hash)
+
+
+def shutdown_hash_executor():
+    """Останавливает пул процессов хеширования"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
@@ -0,0 +1,114 @@
+# backend/benchmarks/booking_stress.py
+"""Стресс-проверка записи на слоты при одновременном наплыве.
+
+Создаёт временную БД, одно мероприятие и сотни студентов, которые
+одновременно записываются на слоты этого мероприятия. После этого
+проверяются инварианты: на слот не больше одной записи, у студента не
+больше одной записи, total_slots не превышен, флаги is_available совпадают
+с записями.
+
+    cd backend
+    python -m benchmarks.booking_stress --users 500 --slots 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--slots', type=int, default=8,
+                        help='число слотов по 30 минут')
+    parser.add_argument('--total-slots', type=int, default=None,
+                        help='лимит мест (по умолчанию равен числу слотов)')
+    parser.add_argument('--threads', type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ['DATABASE'] = os.path.join(tempfile.mkdtemp(), 'stress.db')
+
+    from app.database import db
+    from app.database.models import init_db
+
+    init_db()
+    total_slots = args.total_slots or args.slots
+
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT INTO users (first_name, last_name, email, password, course, group_name) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [('u', str(i), f'u{i}@stress.test', 'x', 1, 'Б-100')
+             for i in range(args.users)])
+        conn.commit()
+
+    end_minutes = 9 * 60 + 30 * args.slots
+    event_id = db.EventDB.create_event(
+        'stress', '09:00', f'{end_minutes // 60:02d}:{end_minutes % 60:02d}',
+        total_slots, 'Б-100', 1)
+    db.SlotDB.create_slots(event_id, '09:00',
+                           f'{end_minutes // 60:02d}:{end_minutes % 60:02d}')
+    slot_ids = [slot['id'] for slot in db.SlotDB.get_slots_by_event(event_id)]
+
+    # Каждый студент пытается записаться дважды: на случайный слот и повторно
+    attempts = [(user_id, random.choice(slot_ids))
+                for user_id in range(1, args.users + 1)
+                for _ in range(2)]
+    random.shuffle(attempts)
+    barrier = threading.Barrier(min(args.threads, len(attempts)))
+
+    def book(attempt):
+        try:
+            barrier.wait(timeout=1)
+        except threading.BrokenBarrierError:
+            pass
+        user_id, slot_id = attempt
+        return db.RegistrationDB.register_user(user_id, event_id, slot_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = Counter(executor.map(book, attempts))
+    elapsed = time.perf_counter() - started
+
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT user_id, time_slot_id FROM registrations WHERE event_id = ?',
+                       (event_id,))
+        rows = cursor.fetchall()
+        cursor.execute('SELECT COUNT(*) FROM time_slots WHERE event_id = ? AND is_available = 0',
+                       (event_id,))
+        taken_flags = cursor.fetchone()[0]
+
+    per_slot = Counter(row['time_slot_id'] for row in rows)
+    per_user = Counter(row['user_id'] for row in rows)
+    errors = []
+    if any(count > 1 for count in per_slot.values()):
+        errors.append('на один слот записано несколько студентов')
+    if any(count > 1 for count in per_user.values()):
+        errors.append('студент записан несколько раз')
+    if len(rows) > total_slots:
+        errors.append(f'записей {len(rows)} > total_slots {total_slots}')
+    if taken_flags != len(rows):
+        errors.append(f'занятых слотов {taken_flags}, записей {len(rows)}')
+    if results[db.BOOKED] != len(rows):
+        errors.append(f'успешных ответов {results[db.BOOKED]}, записей {len(rows)}')
+
+    print(f'попыток: {len(attempts)} за {elapsed:.3f} с '
+          f'({len(attempts) / elapsed:.0f} оп/с)')
+    for status, count in sorted(results.items()):
+        print(f'  {status}: {count}')
+    for error in errors:
+        print(f'❌ {error}')
+    if errors:
+        sys.exit(1)
+    print('✅ инварианты соблюдены')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/coalescing.py
+"""Объединение одинаковых одновременных чтений (app.coalesce).
+
+Наполняет БД генератором benchmarks.seed и волнами шлёт в приложение
+(ASGI-клиент, без сети) по --burst одновременных запросов одного и того
+же мероприятия — как при открытии записи. Прогон повторяется с
+объединением и без. Печатает пропускную способность, перцентили и число
+чтений мероприятия из хранилища. Кеш чтения по умолчанию выключен,
+чтобы каждое чтение доходило до БД.
+
+    cd backend
+    python -m benchmarks.coalescing --burst 200 --waves 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import summarize
+from benchmarks.seed import add_arguments, group_name, seed_from_args
+
+
+async def run(client, path, burst, waves, pause):
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        started = time.perf_counter()
+        response = await client.get(path)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+
+    started = time.perf_counter()
+    for _ in range(waves):
+        await asyncio.gather(*(one() for _ in range(burst)))
+        # Пауза длиннее micro-TTL: следующая волна читает заново
+        await asyncio.sleep(pause)
+    return summarize(latencies, errors, time.perf_counter() - started - pause * waves)
+
+
+async def run_all(args):
+    from app import coalesce
+    from app.main import app, repo
+
+    reads = 0
+    get_event_by_id = repo.events.get_event_by_id
+
+    def counting(event_id):
+        nonlocal reads
+        reads += 1
+        return get_event_by_id(event_id)
+
+    repo.events.get_event_by_id = counting
+    paths = {"event": '/api/events/1', "group": f'/api/events/group/{group_name(0)}'}
+    pause = coalesce.COALESCE_TTL * 2
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://bench', timeout=60) as client:
+            print(f'{"запрос":<7} {"объед.":<7} {"запросы":>8} {"rps":>9} {"p50, мс":>9} '
+                  f'{"p99, мс":>9} {"чтений":>7}')
+            for name, path in paths.items():
+                for enabled in (False, True):
+                    coalesce.COALESCE_ENABLED = enabled
+                    reads = 0
+                    result = await run(client, path, args.burst, args.waves, pause)
+                    counted = reads if name == "event" else '-'
+                    print(f'{name:<7} {"да" if enabled else "нет":<7} {result["requests"]:>8} '
+                          f'{result["rps"]:>9.1f} {result["p50_ms"]:>9.2f} '
+                          f'{result["p99_ms"]:>9.2f} {counted:>7}')
+    finally:
+        await app.router.shutdown()
+        repo.events.get_event_by_id = get_event_by_id
+
+    for name, stats in coalesce.coalesce_stats(top=3).items():
+        print(f'{name}: чтений {stats["fetches"]}, присоединений {stats["shared"]}, '
+              f'из micro-TTL {stats["recent_hits"]}, сэкономлено {stats["saved_ratio"]:.1%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--burst', type=int, default=200, help='одновременных запросов в волне')
+    parser.add_argument('--waves', type=int, default=20)
+    parser.add_argument('--cache', action='store_true', help='не выключать кеш чтения')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ['CACHE_ENABLED'] = '0'
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    summary = seed_from_args(database, args)
+    print('данные: ' + ', '.join(f'{key}: {value}' for key, value in summary.items()))
+
+    asyncio.run(run_all(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# backend/benchmarks/export.py
+"""Потоковые выгрузки: CSV со списком записавшихся группы (app.export).
+
+Наполняет БД генератором benchmarks.seed и сравнивает два способа
+собрать CSV записавшихся на все мероприятия одной группы:
+
+- list — все строки читаются в список (fetchall), CSV собирается в одну
+  строку и отдаётся целиком;
+- stream — как GET /api/events/group/{group_name}/roster.csv: строки
+  читаются страницами по STREAM_BATCH через пул потоков БД и отдаются
+  кусками по EXPORT_CHUNK.
+
+Печатает время и пик выделенной памяти (tracemalloc) обоих способов,
+проверяет, что CSV совпадают и что планы выгрузок не сортируют строки
+вне индекса, и отдаёт ту же выгрузку через приложение (ASGI-клиент).
+
+    cd backend
+    python -m benchmarks.export --events-per-group 400 --slots-per-event 20
+"""
+import argparse
+import asyncio
+import csv
+import functools
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+
+from benchmarks.seed import ADMIN_EMAIL, PASSWORD, add_arguments, group_name, seed_from_args
+
+
+def build_list(group):
+    """CSV целиком в памяти: список строк из БД и одна строка текста"""
+    from app.database.db import _group_roster_query, get_db
+    from app.export import ROSTER_FIELDS, roster_row
+
+    with get_db() as conn:
+        rows = [dict(row) for row in conn.execute(*_group_roster_query(group, None, None))]
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow(ROSTER_FIELDS)
+    for row in rows:
+        writer.writerow(roster_row(row))
+    return [buffer.getvalue().encode("utf-8")]
+
+
+def build_stream(group):
+    from app.database.db import RegistrationDB
+    from app.export import roster_csv
+    from app.main import _pages
+
+    return iterate(roster_csv(_pages(functools.partial(RegistrationDB.get_group_roster, group))))
+
+
+def iterate(chunks):
+    """Обходит асинхронный генератор кусков из синхронного кода"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(anext(chunks))
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.close()
+
+
+def measure(build, group, repeat):
+    """(медиана времени, мс; пик памяти, КБ; кусков; тело)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in build(group):
+            pass
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    chunks = sum(1 for _ in build(group))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Тело — отдельным проходом, вне замера памяти: только для сравнения способов
+    body = b''.join(build(group))
+    return timings[len(timings) // 2], peak / 1024, chunks, body
+
+
+async def fetch(group):
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://bench', timeout=60) as client:
+            response = await client.post('/api/auth/login',
+                                         json={"email": ADMIN_EMAIL, "password": PASSWORD})
+            headers = {"Authorization": f'Bearer {response.json()["access_token"]}'}
+            started = time.perf_counter()
+            response = await client.get(f'/api/events/group/{group}/roster.csv', headers=headers)
+            elapsed = time.perf_counter() - started
+            again = await client.get(f'/api/events/group/{group}/roster.csv',
+                                     headers={**headers, "If-None-Match": response.headers["etag"]})
+    finally:
+        await app.router.shutdown()
+    return response, elapsed, again.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='повторов на замер')
+    add_arguments(parser)
+    parser.set_defaults(groups=2, events_per_group=400, slots_per_event=20, fill=1.0)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    summary = seed_from_args(database, args)
+    print('данные: ' + ', '.join(f'{key}: {value}' for key, value in summary.items()))
+
+    from app.database.db import get_db
+    from benchmarks.query_plans import check_plans, streamed_queries
+
+    group = group_name(0)
+    with get_db() as conn:
+        problems = check_plans(conn, streamed_queries(), streamed=True)
+        rows = conn.execute('SELECT COUNT(*) FROM registrations r JOIN events e '
+                            'ON e.id = r.event_id WHERE e.group_name = ?', (group,)).fetchone()[0]
+    print(f'группа {group}: записей {rows}')
+
+    print(f'{"способ":<7} {"мс":>9} {"пик, КБ":>9} {"КБ":>9} {"кусков":>7}')
+    bodies = {}
+    for name, build in (("list", build_list), ("stream", build_stream)):
+        ms, peak, chunks, bodies[name] = measure(build, group, args.repeat)
+        print(f'{name:<7} {ms:>9.1f} {peak:>9.0f} {len(bodies[name]) / 1024:>9.0f} {chunks:>7}')
+    if bodies["list"] != bodies["stream"]:
+        problems.append('CSV потоковой выгрузки отличается от собранного целиком')
+
+    response, elapsed, again = asyncio.run(fetch(group))
+    print(f'GET roster.csv: {response.status_code}, {len(response.content) / 1024:.0f} КБ '
+          f'за {elapsed * 1000:.1f} мс; повтор с If-None-Match: {again}')
+    if response.content != bodies["stream"]:
+        problems.append('ответ приложения отличается от выгрузки')
+
+    for problem in problems:
+        print(f'❌ {problem}')
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# backend/benchmarks/fanout.py
+"""Бенчмарк рассылки изменений слотов подписчикам (app.pubsub).
+
+Создаёт тысячи подписчиков одного мероприятия, публикует сообщения из
+отдельного потока (как это делает пул потоков БД) и измеряет задержку
+от publish() до получения сообщения каждым подписчиком.
+
+    cd backend
+    python -m benchmarks.fanout --subscribers 10000 --messages 20
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from app.pubsub import Broker
+from benchmarks.common import percentile
+
+
+async def run(subscribers, messages, interval):
+    broker = Broker()
+    broker.bind()
+    latencies = []
+    received = 0
+
+    async def consume(subscription):
+        nonlocal received
+        with subscription:
+            for _ in range(messages):
+                message = await subscription.get()
+                latencies.append(time.perf_counter() - message["sent"])
+                received += 1
+
+    consumers = [asyncio.create_task(consume(broker.subscribe(1)))
+                 for _ in range(subscribers)]
+    await asyncio.sleep(0)
+
+    def produce():
+        for slot_id in range(messages):
+            broker.publish(1, {"type": "slot", "slot_id": slot_id, "sent": time.perf_counter()})
+            time.sleep(interval)
+
+    started = time.perf_counter()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+    producer.join()
+
+    ms = [value * 1000 for value in latencies]
+    print(f'подписчиков: {subscribers}, сообщений: {messages}, доставок: {received}')
+    print(f'время: {elapsed:.3f} с, {received / elapsed:,.0f} доставок/с')
+    print(f'задержка, мс: p50={percentile(ms, 50):.2f} p95={percentile(ms, 95):.2f} '
+          f'p99={percentile(ms, 99):.2f} max={max(ms):.2f} mean={statistics.mean(ms):.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.05,
+                        help='пауза между публикациями, секунд')
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.messages, args.interval))
+
+
+if __name__ == '__main__':
+    main()
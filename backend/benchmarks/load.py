@@ -0,0 +1,365 @@
+# backend/benchmarks/load.py
+"""Нагрузочные сценарии API: в процессе (ASGI-клиент) или через uvicorn.
+
+Наполняет БД генератором benchmarks.seed и прогоняет конкурентные
+сценарии: шторм логинов, наплыв записи на одно мероприятие, чтение
+мероприятий группы (дашборд), неделю календаря группы и постраничный список пользователей в
+админке. Для каждого сценария печатает пропускную способность,
+p50/p95/p99 и долю ошибок. Результат можно сохранить как базовую линию
+и сравнить с ней следующий прогон.
+
+    cd backend
+    python -m benchmarks.load --mode asgi --save
+    python -m benchmarks.load --mode uvicorn --compare benchmarks/baselines/asgi-1a2b3c4.json
+    python -m benchmarks.load --mode uvicorn --workers 4
+    python -m benchmarks.load --storage memory
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import summarize
+from datetime import timedelta
+
+from benchmarks.seed import (
+    ADMIN_EMAIL, FIRST_DAY, PASSWORD, add_arguments, group_name, seed_from_args, user_email,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'baselines')
+
+
+class Scenario:
+    """Сценарий нагрузки: request(client, context, i) выполняет i-й запрос.
+
+    Ответ со статусом вне expected (или исключение) считается ошибкой.
+    weight — доля от --requests (логины дороже остальных запросов).
+    """
+
+    def __init__(self, name, request, expected=(200,), weight=1.0):
+        self.name = name
+        self.request = request
+        self.expected = set(expected)
+        self.weight = weight
+
+
+async def _login(client, context, i):
+    index = context["rng"].randrange(context["users"])
+    return await client.post('/api/auth/login',
+                             json={"email": user_email(index), "password": PASSWORD})
+
+
+async def _dashboard(client, context, i):
+    group = group_name(context["rng"].randrange(context["groups"]))
+    return await client.get(f'/api/events/group/{group}')
+
+
+async def _calendar(client, context, i):
+    # Первая неделя мероприятий группы — по индексу (group_name, starts_at)
+    group = group_name(context["rng"].randrange(context["groups"]))
+    return await client.get('/api/events', params={
+        "group": group, "from": FIRST_DAY.isoformat(),
+        "to": (FIRST_DAY + timedelta(days=7)).isoformat()})
+
+
+async def _admin_list(client, context, i):
+    cursors = context["admin_cursors"]
+    params = {"limit": 100}
+    cursor = cursors[i % len(cursors)]
+    if cursor:
+        params["cursor"] = cursor
+    return await client.get('/api/admin/users', params=params, headers=context["admin_headers"])
+
+
+async def _booking_rush(client, context, i):
+    # Каждый запрос — другой студент, все рвутся на одно мероприятие
+    user_id = context["rush_users"][i % len(context["rush_users"])]
+    slot_id = context["rng"].choice(context["rush_slots"])
+    return await client.post('/api/registrations', params={
+        "user_id": user_id, "event_id": context["rush_event"], "time_slot_id": slot_id})
+
+
+SCENARIOS = {
+    "login": Scenario("login", _login, weight=0.2),
+    "dashboard": Scenario("dashboard", _dashboard),
+    "calendar": Scenario("calendar", _calendar),
+    "admin_list": Scenario("admin_list", _admin_list),
+    # 400 — слот занят или студент уже записан: ожидаемый исход наплыва
+    "booking_rush": Scenario("booking_rush", _booking_rush, expected=(200, 400)),
+}
+
+
+async def prepare(client, args):
+    """Данные сценариев, которые проще получить через API, чем из БД"""
+    response = await client.post('/api/auth/login',
+                                 json={"email": ADMIN_EMAIL, "password": PASSWORD})
+    response.raise_for_status()
+    admin_headers = {"Authorization": f'Bearer {response.json()["access_token"]}'}
+
+    # Курсоры первых страниц списка пользователей: запрос i читает страницу i % N
+    cursors = [None]
+    while len(cursors) < args.admin_pages:
+        params = {"limit": 100}
+        if cursors[-1]:
+            params["cursor"] = cursors[-1]
+        response = await client.get('/api/admin/users', headers=admin_headers, params=params)
+        next_cursor = response.json()["next_cursor"]
+        if not next_cursor:
+            break
+        cursors.append(next_cursor)
+
+    events = (await client.get(f'/api/events/group/{group_name(0)}')).json()["events"]
+    rush_event = events[-1]["id"]
+    slots = (await client.get(f'/api/events/{rush_event}')).json()["slots"]
+
+    return {
+        "rng": random.Random(args.seed),
+        "users": args.users,
+        "groups": args.groups,
+        "admin_headers": admin_headers,
+        "admin_cursors": cursors,
+        "rush_event": rush_event,
+        "rush_slots": [slot["id"] for slot in slots],
+        # id студентов: 2 .. users + 1
+        "rush_users": list(range(2, args.users + 2)),
+    }
+
+
+async def run_scenario(client, scenario, context, requests, concurrency):
+    latencies = []
+    errors = 0
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, context, i)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 'exception'
+            elapsed = time.perf_counter() - started
+        statuses[status] = statuses.get(status, 0) + 1
+        if status in scenario.expected:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    result["statuses"] = {str(key): value for key, value in sorted(statuses.items(), key=str)}
+    return result
+
+
+async def run_all(client, args):
+    context = await prepare(client, args)
+    results = {}
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        requests = max(1, int(args.requests * scenario.weight))
+        results[name] = await run_scenario(client, scenario, context, requests, args.concurrency)
+        print_row(name, results[name])
+    return results
+
+
+@contextlib.asynccontextmanager
+async def asgi_client(args):
+    """Приложение в этом же процессе: без сети, только стоимость обработки"""
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://bench', timeout=60) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(args):
+    """Отдельный процесс uvicorn (args.workers воркеров) на свободном порту"""
+    port = _free_port()
+    env = dict(os.environ, DATABASE=os.environ['DATABASE'], WEB_CONCURRENCY=str(args.workers))
+    # Без общего секрета воркеры не примут токены друг друга и не стартуют
+    env.setdefault('JWT_SECRET', secrets.token_hex(32))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', str(args.workers),
+         '--log-level', 'warning', '--no-access-log'],
+        cwd=BACKEND_DIR, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    limits = httpx.Limits(max_connections=args.concurrency,
+                          max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            for _ in range(300):
+                try:
+                    await client.get('/')
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None:
+                        raise RuntimeError('uvicorn завершился при запуске')
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError('uvicorn не ответил за 30 с')
+            # Первый ответ — от самого быстрого воркера; даём подняться остальным
+            if args.workers > 1:
+                await asyncio.sleep(args.workers)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def print_row(name, result):
+    print(f'{name:<14} {result["requests"]:>7} {result["rps"]:>9.1f} '
+          f'{result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+          f'{result["error_rate"]:>7.2%}  {result["statuses"]}')
+
+
+def print_header():
+    print(f'{"сценарий":<14} {"запросы":>7} {"rps":>9} {"p50, мс":>9} {"p95, мс":>9} '
+          f'{"p99, мс":>9} {"ошибки":>7}')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline, report, tolerance):
+    """Сравнивает прогон с базовой линией; возвращает список регрессий"""
+    regressions = []
+    meta = baseline["meta"]
+    print(f'\nсравнение с {meta["commit"]} ({meta["mode"]}), допуск {tolerance:.0%}:')
+    for key in ("mode", "storage", "params", "cpu_count"):
+        if meta.get(key) != report["meta"].get(key):
+            print(f'  ⚠️ {key} отличается от базовой линии — сравнение условное')
+    results = report["scenarios"]
+    for name, result in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        deltas = []
+        for key, higher_is_worse in (("rps", False), ("p95_ms", True), ("p99_ms", True)):
+            if not base[key]:
+                continue
+            change = (result[key] - base[key]) / base[key]
+            deltas.append(f'{key} {change:+.1%}')
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            if worse:
+                regressions.append(f'{name}: {key} {base[key]} → {result[key]}')
+        if result["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f'{name}: error_rate {base["error_rate"]} → {result["error_rate"]}')
+        print(f'  {name:<14} ' + ', '.join(deltas))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['asgi', 'uvicorn'], default='asgi')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='через запятую: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='запросов на сценарий (логины — 20%%)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='процессов uvicorn (только --mode uvicorn)')
+    parser.add_argument('--admin-pages', type=int, default=10)
+    parser.add_argument('--storage', choices=['sqlite', 'memory'], default='sqlite',
+                        help='реализация хранилища (memory — снимок наполненной БД)')
+    parser.add_argument('--db', help='путь к БД (по умолчанию временный файл)')
+    parser.add_argument('--save', nargs='?', const='', metavar='PATH',
+                        help='сохранить результат (по умолчанию в benchmarks/baselines/)')
+    parser.add_argument('--compare', metavar='PATH', help='сравнить с сохранённым результатом')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='допустимое ухудшение rps/p95/p99')
+    add_arguments(parser)
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'неизвестные сценарии: {", ".join(unknown)}')
+    if args.storage == 'memory' and args.workers > 1:
+        parser.error('хранилище в памяти у каждого воркера своё: --workers 1')
+
+    # Все запросы идут с одного IP: без этого шторм логинов упрётся в лимиты
+    # app.throttle, а не в хеширование (THROTTLE_ENABLED=1 — проверить лимиты)
+    os.environ.setdefault('THROTTLE_ENABLED', '0')
+
+    database = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['STORAGE_BACKEND'] = args.storage
+    os.environ['MEMORY_SNAPSHOT'] = database
+    summary = seed_from_args(database, args)
+    print('данные: ' + ', '.join(f'{key}: {value}' for key, value in summary.items()))
+
+    client_factory = asgi_client if args.mode == 'asgi' else uvicorn_client
+
+    async def run():
+        async with client_factory(args) as client:
+            print_header()
+            return await run_all(client, args)
+
+    results = asyncio.run(run())
+
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "storage": args.storage,
+            "commit": git_commit(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": {key: getattr(args, key) for key in (
+                'requests', 'concurrency', 'workers', 'users', 'groups', 'events_per_group',
+                'slots_per_event', 'fill', 'seed')},
+        },
+        "scenarios": results,
+    }
+
+    if args.save is not None:
+        path = args.save or os.path.join(
+            BASELINES_DIR, f'{args.mode}-{report["meta"]["commit"]}.json')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'\nрезультат сохранён: {path}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for regression in regressions:
+            print(f'❌ регрессия: {regression}')
+        if regressions:
+            sys.exit(1)
+        print('✅ регрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# backend/benchmarks/query_plans.py
+"""Проверка планов запросов (EXPLAIN QUERY PLAN) для горячих запросов.
+
+Создаёт временную БД через init_db и убеждается, что каждый запрос
+хранилища (SQL берётся из app.database.db) использует индекс, а не
+полный просмотр таблицы, а потоковые выгрузки ещё и не сортируют
+строки вне индекса. Завершается с кодом 1, если
+какой-то индекс перестал использоваться.
+
+    cd backend
+    python -m benchmarks.query_plans
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Запросы строятся теми же функциями и константами app.database.db, что
+# выполняет хранилище: регрессия запроса или индекса в db.py не пройдёт
+# проверку. Импорт — внутри функций: DATABASE задаётся до импорта db.
+GROUP = 'Б-100'
+PAGE = 50
+CREATED_AFTER = ['2024-01-01 00:00:00', 100]
+WEEK = (1788220800, 1788825600)
+
+
+def hot_queries():
+    """[(описание, SQL, параметры, ожидаемый индекс)]"""
+    from app.database.db import (
+        USER_REGISTRATIONS_SQL, _group_events_query, _organizer_events_query,
+        _range_events_query, _users_query,
+    )
+
+    return [
+        ('мероприятия группы',
+         *_group_events_query(GROUP, None, None), 'idx_events_group_created'),
+        ('мероприятия группы, следующая страница',
+         *_group_events_query(GROUP, PAGE, CREATED_AFTER), 'idx_events_group_created'),
+        ('календарь группы за неделю',
+         *_range_events_query(GROUP, *WEEK, None, None), 'idx_events_group_starts'),
+        ('календарь группы, следующая страница',
+         *_range_events_query(GROUP, WEEK[0], None, PAGE, [WEEK[0] + 36000, 100]),
+         'idx_events_group_starts'),
+        ('мероприятия организатора',
+         *_organizer_events_query(1, PAGE, None), 'idx_events_organizer'),
+        ('мероприятия организатора, следующая страница',
+         *_organizer_events_query(1, PAGE, [100]), 'idx_events_organizer'),
+        ('пользователи',
+         *_users_query(PAGE, None), 'idx_users_created'),
+        ('пользователи, следующая страница',
+         *_users_query(PAGE, CREATED_AFTER), 'idx_users_created'),
+        ('записи пользователя',
+         USER_REGISTRATIONS_SQL, (1,), 'sqlite_autoindex_registrations_1'),
+        ('слоты мероприятия',
+         'SELECT id, slot_time, is_available FROM time_slots '
+         'WHERE event_id = ? ORDER BY minute',
+         (1,), 'idx_time_slots_event_minute'),
+        ('записи на слот',
+         'SELECT * FROM registrations WHERE time_slot_id = ?',
+         (1,), 'idx_registrations_slot'),
+        ('записи на мероприятие',
+         'SELECT COUNT(*) FROM registrations WHERE event_id = ?',
+         (1,), 'idx_registrations_event'),
+        ('голова очереди ожидания',
+         'SELECT id, user_id FROM waitlist WHERE event_id = ? ORDER BY id LIMIT 1',
+         (1,), 'idx_waitlist_event'),
+        ('позиция в очереди ожидания',
+         'SELECT COUNT(*) FROM waitlist WHERE event_id = ? AND id <= ?',
+         (1, 10), 'idx_waitlist_event'),
+    ]
+
+
+def streamed_queries():
+    """Потоковые выгрузки (app.export): строки читаются страницами по
+    ключу сортировки, поэтому план не должен сортировать их во временном
+    B-дереве"""
+    from app.database.db import (
+        _event_roster_query, _group_roster_query, _user_registrations_query,
+    )
+
+    return [
+        ('записавшиеся на мероприятие',
+         *_event_roster_query(1, PAGE, None), 'idx_time_slots_event_minute'),
+        ('записавшиеся на мероприятие, следующая страница',
+         *_event_roster_query(1, PAGE, [600]), 'idx_time_slots_event_minute'),
+        ('записавшиеся на мероприятия группы',
+         *_group_roster_query(GROUP, PAGE, None), 'idx_events_group_starts'),
+        ('записавшиеся на мероприятия группы, страница после мероприятия без даты',
+         *_group_roster_query(GROUP, PAGE, [None, 100, 600]), 'idx_events_group_starts'),
+        ('записавшиеся на мероприятия группы, следующая страница',
+         *_group_roster_query(GROUP, PAGE, [WEEK[0], 100, 600]), 'idx_events_group_starts'),
+        ('календарь пользователя',
+         *_user_registrations_query(1, PAGE, None), 'sqlite_autoindex_registrations_1'),
+        ('календарь пользователя, следующая страница',
+         *_user_registrations_query(1, PAGE, [100]), 'sqlite_autoindex_registrations_1'),
+    ]
+
+
+# Сортировка результата вне индекса
+TEMP_SORT = 'USE TEMP B-TREE'
+
+# Полный просмотр таблицы без индекса: "SCAN events", но не "SCAN events USING INDEX ..."
+FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+
+def explain(conn, sql, params):
+    """Возвращает строки EXPLAIN QUERY PLAN для запроса"""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+
+def check_plans(conn, queries, streamed=False):
+    """Возвращает список найденных проблем (пустой — всё в порядке);
+    streamed — запросы ещё и не должны сортировать результат"""
+    problems = []
+    for title, sql, params, index in queries:
+        plan = explain(conn, sql, params)
+        text = '\n'.join(plan)
+        if index not in text:
+            problems.append(f'{title}: не используется {index}\n    {text}')
+        elif FULL_SCAN.search(text):
+            problems.append(f'{title}: полный просмотр таблицы\n    {text}')
+        elif streamed and TEMP_SORT in text:
+            problems.append(f'{title}: сортировка вне индекса\n    {text}')
+    return problems
+
+
+def main():
+    os.environ['DATABASE'] = os.path.join(tempfile.mkdtemp(), 'plans.db')
+
+    from app.database.db import get_db
+    from app.database.models import init_db
+
+    init_db()
+    with get_db() as conn:
+        hot, streamed = hot_queries(), streamed_queries()
+        problems = check_plans(conn, hot) + check_plans(conn, streamed, streamed=True)
+        for title, sql, params, _ in hot + streamed:
+            print(f'{title}:')
+            for line in explain(conn, sql, params):
+                print(f'    {line}')
+
+    for problem in problems:
+        print(f'❌ {problem}')
+    if problems:
+        sys.exit(1)
+    print('✅ все горячие запросы используют индексы')
+
+
+if __name__ == '__main__':
+    main()
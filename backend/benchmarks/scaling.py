@@ -0,0 +1,83 @@
+# backend/benchmarks/scaling.py
+"""Масштабирование по числу воркеров uvicorn на одной SQLite-БД.
+
+Для каждого числа воркеров заново наполняет БД (сценарии записи меняют
+данные), поднимает uvicorn --workers N и прогоняет сценарии из
+benchmarks.load. В конце печатает rps по сценариям и ускорение
+относительно первого прогона. Рост упирается в число ядер: воркеров
+больше, чем os.cpu_count(), запускать бессмысленно.
+
+    cd backend
+    python -m benchmarks.scaling --workers 1,2,4 --scenarios login,dashboard
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks.load import SCENARIOS, print_header, run_all, uvicorn_client
+from benchmarks.seed import add_arguments, seed_from_args
+
+
+def run_workers(args, workers):
+    args.workers = workers
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    seed_from_args(database, args)
+
+    async def run():
+        async with uvicorn_client(args) as client:
+            return await run_all(client, args)
+
+    print(f'\nворкеров: {workers}')
+    print_header()
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4',
+                        help='числа воркеров через запятую')
+    parser.add_argument('--scenarios', default='login,dashboard,admin_list',
+                        help='через запятую: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='запросов на сценарий (логины — 20%%)')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--admin-pages', type=int, default=10)
+    parser.add_argument('--save', metavar='PATH', help='сохранить результат в JSON')
+    add_arguments(parser)
+    args = parser.parse_args()
+    counts = [int(value) for value in args.workers.split(',') if value.strip()]
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'неизвестные сценарии: {", ".join(unknown)}')
+
+    os.environ.setdefault('THROTTLE_ENABLED', '0')
+    cpu_count = os.cpu_count() or 1
+    if max(counts) > cpu_count:
+        print(f'⚠️ ядер: {cpu_count} — воркеры сверх этого числа не ускорят обработку')
+
+    results = {workers: run_workers(args, workers) for workers in counts}
+
+    base = counts[0]
+    print(f'\nrps (ускорение относительно {base} воркер.):')
+    print(f'{"сценарий":<14}' + ''.join(f'{workers:>16}' for workers in counts))
+    for name in args.scenarios:
+        row = f'{name:<14}'
+        for workers in counts:
+            rps = results[workers][name]["rps"]
+            base_rps = results[base][name]["rps"]
+            speedup = rps / base_rps if base_rps else 0.0
+            row += f'{rps:>9.1f} (×{speedup:.2f})'
+        print(row)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({"cpu_count": cpu_count, "workers": results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f'\nрезультат сохранён: {args.save}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# backend/benchmarks/seed.py
+"""Генератор синтетических данных для бенчмарков.
+
+Создаёт БД через init_db (все миграции) и наполняет её пользователями,
+группами, мероприятиями, слотами и записями. Генерация детерминирована
+(--seed), так что одинаковые параметры дают одинаковую БД.
+
+    cd backend
+    python -m benchmarks.seed --out /tmp/bench.db --users 20000 --groups 50
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+# Пароль всех сгенерированных пользователей (хеш считается один раз)
+PASSWORD = 'benchpass'
+ADMIN_EMAIL = 'admin@bench.local'
+# Дата первого мероприятия группы; следующие — через EVENT_STEP_DAYS дней
+FIRST_DAY = date(2026, 9, 1)
+EVENT_STEP_DAYS = 2
+
+
+def user_email(index):
+    return f'student{index}@bench.local'
+
+
+def group_name(index):
+    return f'Б-{100 + index}'
+
+
+def seed(database, users=2000, groups=20, events_per_group=5, slots_per_event=8,
+         fill=0.5, slot_minutes=30, rng_seed=1):
+    """Создаёт и наполняет БД; возвращает сводку для сценариев нагрузки.
+
+    fill — доля слотов каждого мероприятия, уже занятых студентами группы.
+    Пользователь с id 1 — администратор (ADMIN_EMAIL), остальные —
+    студенты, равномерно распределённые по группам; первый студент
+    группы — староста и организатор её мероприятий.
+    """
+    if os.path.exists(database):
+        os.remove(database)
+    os.environ['DATABASE'] = database
+
+    from app.database import db
+    from app.database.models import init_db
+    from app.database.repository import event_bounds
+    from app.utils import hash_password
+
+    db.DATABASE = database
+    init_db()
+    rng = random.Random(rng_seed)
+    password_hash = hash_password(PASSWORD)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(database)
+    conn.execute('BEGIN')
+    conn.executemany('INSERT OR IGNORE INTO groups (name) VALUES (?)',
+                     [(group_name(i),) for i in range(groups)])
+
+    conn.execute('''
+        INSERT INTO users (first_name, last_name, email, password, telegram_alias, course,
+                           group_name, role, is_admin)
+        VALUES ('Админ', 'Бенчмарк', ?, ?, '@admin', 1, ?, 'admin', 1)
+    ''', (ADMIN_EMAIL, password_hash, group_name(0)))
+
+    members = {i: [] for i in range(groups)}
+    rows = []
+    for index in range(users):
+        group = index % groups
+        # id: 1 — админ, студенты начинаются с 2
+        members[group].append(index + 2)
+        role = 'starosta' if len(members[group]) == 1 else 'student'
+        rows.append((f'Имя{index}', f'Фамилия{index}', user_email(index), password_hash,
+                     f'@student{index}', 1 + index % 4, group_name(group), role))
+    conn.executemany('''
+        INSERT INTO users (first_name, last_name, email, password, telegram_alias, course,
+                           group_name, role)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+    start_hour = 9
+    end_minutes = start_hour * 60 + slots_per_event * slot_minutes
+    if end_minutes > 24 * 60:
+        raise ValueError('слоты мероприятия не помещаются в сутки')
+    start_time = f'{start_hour:02d}:00'
+    end_time = f'{end_minutes // 60:02d}:{end_minutes % 60:02d}'
+
+    events = 0
+    slots = 0
+    registrations = 0
+    for group in range(groups):
+        students = members[group]
+        if not students:
+            continue
+        for number in range(events_per_group):
+            starts_at, ends_at = event_bounds(FIRST_DAY + timedelta(days=number * EVENT_STEP_DAYS),
+                                              start_time, end_time)
+            times = db.SlotDB.slot_times(start_time, end_time, slot_minutes)
+            taken = set(rng.sample(range(len(times)), min(int(len(times) * fill), len(students))))
+            bookers = rng.sample(students, len(taken))
+            cursor = conn.execute('''
+                INSERT INTO events (title, start_time, end_time, total_slots, group_name,
+                                    organizer_id, slot_minutes, starts_at, ends_at,
+                                    free_slots, booked_slots)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (f'Консультация {number + 1}', start_time, end_time, slots_per_event,
+                  group_name(group), students[0], slot_minutes, starts_at, ends_at,
+                  len(times) - len(taken), len(taken)))
+            event_id = cursor.lastrowid
+            events += 1
+
+            slot_ids = []
+            for position, (minute, slot_time) in enumerate(times):
+                cursor = conn.execute('''
+                    INSERT INTO time_slots (event_id, slot_time, minute, is_available)
+                    VALUES (?, ?, ?, ?)
+                ''', (event_id, slot_time, minute, 0 if position in taken else 1))
+                slot_ids.append(cursor.lastrowid)
+            slots += len(times)
+            conn.executemany('''
+                INSERT INTO registrations (user_id, time_slot_id, event_id) VALUES (?, ?, ?)
+            ''', [(user_id, slot_ids[position], event_id)
+                  for user_id, position in zip(bookers, sorted(taken))])
+            registrations += len(taken)
+
+    conn.commit()
+    conn.close()
+
+    return {
+        "database": database,
+        "users": users,
+        "groups": groups,
+        "events": events,
+        "slots": slots,
+        "registrations": registrations,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--events-per-group', type=int, default=5)
+    parser.add_argument('--slots-per-event', type=int, default=8)
+    parser.add_argument('--fill', type=float, default=0.5,
+                        help='доля уже занятых слотов')
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def seed_from_args(database, args):
+    return seed(database, users=args.users, groups=args.groups,
+                events_per_group=args.events_per_group, slots_per_event=args.slots_per_event,
+                fill=args.fill, rng_seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True, help='путь к создаваемой БД')
+    add_arguments(parser)
+    args = parser.parse_args()
+    summary = seed_from_args(args.out, args)
+    print(', '.join(f'{key}: {value}' for key, value in summary.items()))
+
+
+if __name__ == '__main__':
+    main()
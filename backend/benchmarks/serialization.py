@@ -0,0 +1,174 @@
+# backend/benchmarks/serialization.py
+"""Стоимость сериализации больших списков мероприятий и записей.
+
+Для каждого размера списка сравнивает три способа отдать ответ:
+
+- copy+jsonable — как было: FastAPI без response_model прогоняет ответ
+  через jsonable_encoder, JSONResponse кодирует json.dumps (записи
+  обработчик к тому же копировал в новые словари поле за полем);
+- model+orjson — как сейчас: строки хранилища идут в ответ как есть,
+  response_model маршрута (TypedDict из app.schemas) проверяет и
+  отбирает поля, ORJSONResponse кодирует;
+- orjson — нижняя граница: только orjson.dumps, без проверки.
+
+Ответы проверки response_model берутся из маршрутов самого приложения.
+Время — медиана на один ответ, мс.
+
+    cd backend
+    python -m benchmarks.serialization --sizes 100,1000,5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from benchmarks.common import percentile
+
+
+def event_rows(count):
+    """Строки мероприятий в том виде, в каком их отдаёт хранилище"""
+    return [{
+        "id": index,
+        "title": f"Сдача лабораторной работы №{index % 12 + 1}",
+        "start_time": "10:00",
+        "end_time": "13:00",
+        "total_slots": 6,
+        "group_name": "Б22-505",
+        "organizer_id": 2,
+        "created_at": f"2026-09-{index % 28 + 1:02d} 12:{index % 60:02d}:00",
+        "slot_minutes": 30,
+        "starts_at": 1788256800 + index % 28 * 86400,
+        "ends_at": 1788267600 + index % 28 * 86400,
+        "free_slots": 6 - index % 7,
+        "booked_slots": index % 7,
+    } for index in range(1, count + 1)]
+
+
+def registration_rows(count):
+    return [{
+        "id": index,
+        "event_id": index,
+        "title": f"Сдача лабораторной работы №{index % 12 + 1}",
+        "start_time": "10:00",
+        "end_time": "13:00",
+        "slot_time": f"{10 + index % 3}:{index % 2 * 30:02d}",
+        "time_slot_id": index * 6,
+        "group_name": "Б22-505",
+        "starts_at": 1788256800 + index % 28 * 86400,
+        "slot_minutes": 30,
+        "registered_at": "2026-08-25 09:00:00",
+    } for index in range(1, count + 1)]
+
+
+def copy_events(rows):
+    return {"events": rows, "next_cursor": None}
+
+
+def copy_registrations(rows):
+    result = []
+    for reg in rows:
+        result.append({
+            "id": reg["id"],
+            "event_id": reg["event_id"],
+            "title": reg["title"],
+            "start_time": reg["start_time"],
+            "end_time": reg["end_time"],
+            "slot_time": reg["slot_time"],
+            "time_slot_id": reg["time_slot_id"],
+        })
+    return {"registrations": result}
+
+
+def response_field(path):
+    from app.main import app
+
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path:
+            return route.secure_cloned_response_field
+    raise LookupError(path)
+
+
+async def render_copy(rows, copy):
+    content = await serialize_response(response_content=copy(rows))
+    return JSONResponse(content).body
+
+
+async def render_model(rows, wrap, field):
+    content = await serialize_response(field=field, response_content=wrap(rows))
+    return ORJSONResponse(content).body
+
+
+async def render_orjson(rows, wrap):
+    return orjson.dumps(wrap(rows))
+
+
+async def measure(render, repeat):
+    """Медиана времени (мс) и размер ответа (байт)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await render()
+        timings.append(time.perf_counter() - started)
+    return percentile([value * 1000 for value in timings], 50), len(body)
+
+
+async def run(sizes, repeat):
+    payloads = {
+        "events": (event_rows, copy_events,
+                   lambda rows: {"events": rows, "next_cursor": None},
+                   response_field("/api/events/group/{group_name}")),
+        "registrations": (registration_rows, copy_registrations,
+                          lambda rows: {"registrations": rows},
+                          response_field("/api/registrations/{user_id}")),
+    }
+    results = {}
+    print(f'{"список":<14} {"строк":>7} {"copy+jsonable":>14} {"model+orjson":>13} '
+          f'{"orjson":>8} {"ускорение":>10} {"КБ":>8}')
+    for name, (make_rows, copy, wrap, field) in payloads.items():
+        for size in sizes:
+            rows = make_rows(size)
+            # Ответы обоих путей должны совпадать по содержимому
+            old = json.loads(await render_copy(rows, copy))
+            new = json.loads(await render_model(rows, wrap, field))
+            assert all(item.items() <= row.items()
+                       for item, row in zip(old[name], new[name])), name
+
+            copy_ms, _ = await measure(lambda: render_copy(rows, copy), repeat)
+            model_ms, size_bytes = await measure(lambda: render_model(rows, wrap, field), repeat)
+            orjson_ms, _ = await measure(lambda: render_orjson(rows, wrap), repeat)
+            speedup = copy_ms / model_ms if model_ms else 0.0
+            print(f'{name:<14} {size:>7} {copy_ms:>14.2f} {model_ms:>13.2f} {orjson_ms:>8.2f} '
+                  f'{speedup:>9.1f}× {size_bytes / 1024:>8.0f}')
+            results[f'{name}/{size}'] = {
+                "copy_jsonable_ms": round(copy_ms, 3),
+                "model_orjson_ms": round(model_ms, 3),
+                "orjson_ms": round(orjson_ms, 3),
+                "bytes": size_bytes,
+            }
+    print('(медиана на ответ, мс)')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,5000',
+                        help='размеры списков через запятую')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов на замер')
+    parser.add_argument('--save', metavar='PATH', help='сохранить результат в JSON')
+    args = parser.parse_args()
+    sizes = [int(value) for value in args.sizes.split(',') if value.strip()]
+
+    results = asyncio.run(run(sizes, args.repeat))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\nрезультат сохранён: {args.save}')
+
+
+if __name__ == '__main__':
+    main()
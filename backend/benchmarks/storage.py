@@ -0,0 +1,164 @@
+# backend/benchmarks/storage.py
+"""Сравнение реализаций хранилища: SQLite и в памяти.
+
+Наполняет SQLite-БД генератором benchmarks.seed, загружает ту же БД в
+хранилище в памяти и выполняет на обоих одну и ту же детерминированную
+последовательность операций Repository. Результаты каждой операции
+сравниваются (семантика должна совпадать), счётчики слотов SQLite
+сверяются с time_slots, время печатается в
+микросекундах на вызов. Кеш чтения по умолчанию выключен, чтобы мерить
+само хранилище.
+
+    cd backend
+    python -m benchmarks.storage --users 5000 --operations 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import summarize
+from app.database.repository import DAY, timestamp
+from benchmarks.seed import (
+    EVENT_STEP_DAYS, FIRST_DAY, add_arguments, group_name, seed_from_args, user_email,
+)
+
+
+def workload(args):
+    """Последовательность (операция, хранилище, метод, аргументы)"""
+    rng = random.Random(args.seed)
+    users = list(range(2, args.users + 2))
+    events = args.groups * args.events_per_group
+    slots_per_event = args.slots_per_event
+    operations = []
+    for _ in range(args.operations):
+        user_id = rng.choice(users)
+        event_id = rng.randint(1, events)
+        kind = rng.random()
+        if kind < 0.2:
+            operations.append(('get_user_by_email', 'users', 'get_user_by_email',
+                               (user_email(user_id - 2),)))
+        elif kind < 0.35:
+            operations.append(('get_profile', 'users', 'get_profile', (user_id,)))
+        elif kind < 0.55:
+            operations.append(('get_event_detail', 'events', 'get_event_detail',
+                               (event_id, user_id)))
+        elif kind < 0.6:
+            operations.append(('events_by_group', 'events', 'get_events_by_group_page',
+                               (group_name(rng.randrange(args.groups)), 20, None)))
+        elif kind < 0.65:
+            # Неделя календаря группы, начиная со случайного дня
+            start = timestamp(FIRST_DAY) + rng.randrange(args.events_per_group * EVENT_STEP_DAYS) * DAY
+            operations.append(('events_in_range', 'events', 'get_events_in_range',
+                               (group_name(rng.randrange(args.groups)), start, start + 7 * DAY, 2,
+                                None)))
+        elif kind < 0.7:
+            operations.append(('get_all_users', 'users', 'get_all_users', (100, None)))
+        elif kind < 0.85:
+            # id слотов идут подряд: у мероприятия n — (n-1)*k+1 .. n*k
+            slot_id = (event_id - 1) * slots_per_event + rng.randint(1, slots_per_event)
+            operations.append(('register_user', 'registrations', 'register_user',
+                               (user_id, event_id, slot_id)))
+        elif kind < 0.95:
+            operations.append(('join_waitlist', 'registrations', 'join_waitlist',
+                               (user_id, event_id)))
+        elif kind < 0.99:
+            operations.append(('user_registrations', 'registrations', 'get_user_registrations',
+                               (user_id,)))
+        else:
+            # Каскад: мероприятия удаляемых, записи и выдача слотов очереди
+            operations.append(('delete_users', 'users', 'delete_users',
+                               (rng.sample(users, 3),)))
+    return operations
+
+
+# Время записи ставит каждое хранилище по своим часам — в сравнении не участвует
+WRITE_TIME_FIELDS = {'registered_at'}
+
+
+def comparable(value):
+    """Результат операции без полей времени записи"""
+    if isinstance(value, dict):
+        return {key: comparable(item) for key, item in value.items()
+                if key not in WRITE_TIME_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return type(value)(comparable(item) for item in value)
+    return value
+
+
+def run(repo, operations):
+    """Результаты и время каждой операции"""
+    results = []
+    timings = {}
+    for name, part, method, arguments in operations:
+        func = getattr(getattr(repo, part), method)
+        started = time.perf_counter()
+        result = func(*arguments)
+        timings.setdefault(name, []).append(time.perf_counter() - started)
+        results.append(result)
+    return results, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--cache', action='store_true', help='не выключать кеш чтения')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ['CACHE_ENABLED'] = '0'
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    summary = seed_from_args(database, args)
+    print('данные: ' + ', '.join(f'{key}: {value}' for key, value in summary.items()))
+
+    from app.database.memory import MemoryStore
+    from app.database.repository import BACKENDS
+
+    # Сначала снимок для памяти: прогон SQLite меняет БД
+    store = MemoryStore()
+    store.load_sqlite(database)
+    backends = {'sqlite': BACKENDS['sqlite'](), 'memory': store.repository()}
+
+    operations = workload(args)
+    results = {}
+    timings = {}
+    for name, repo in backends.items():
+        results[name], timings[name] = run(repo, operations)
+
+    mismatches = [(index, operations[index][0])
+                  for index, (left, right) in enumerate(zip(results['sqlite'], results['memory']))
+                  if comparable(left) != comparable(right)]
+
+    print(f'\n{"операция":<20} {"вызовов":>8} {"sqlite, мкс":>12} {"memory, мкс":>12} {"ускорение":>10}')
+    for name in sorted(timings['sqlite']):
+        count = len(timings['sqlite'][name])
+        sqlite_us = summarize(timings['sqlite'][name], 0, 1)["p50_ms"] * 1000
+        memory_us = summarize(timings['memory'][name], 0, 1)["p50_ms"] * 1000
+        speedup = sqlite_us / memory_us if memory_us else 0.0
+        print(f'{name:<20} {count:>8} {sqlite_us:>12.1f} {memory_us:>12.1f} {speedup:>9.1f}×')
+    print('(медиана времени вызова)')
+
+    # Счётчики слотов мероприятий должны совпадать с time_slots после всех операций
+    from app.database.cleanup import find_counter_drift
+    from app.database.db import get_db
+
+    with get_db() as conn:
+        drift = find_counter_drift(conn.cursor())
+    if drift:
+        print(f'❌ счётчики слотов разошлись у мероприятий: {drift[:10]}')
+        sys.exit(1)
+
+    if mismatches:
+        for index, name in mismatches[:10]:
+            print(f'❌ операция {index} ({name}): sqlite {results["sqlite"][index]!r}'
+                  f' ≠ memory {results["memory"][index]!r}')
+        print(f'❌ расхождений: {len(mismatches)}')
+        sys.exit(1)
+    print(f'✅ результаты {len(operations)} операций совпадают')
+
+
+if __name__ == '__main__':
+    main()
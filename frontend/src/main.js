@@ -1,7 +1,9 @@
 // frontend/src/main.js
 import { createApp } from 'vue';
 import { createRouter, createWebHistory } from 'vue-router';
+import axios from 'axios';
 import App from './App.vue';
+import { API_URL } from './config';
 import routes from './router';
 import './assets/styles/main.css';
 
@@ -25,6 +27,53 @@ router.beforeEach((to, from, next) => {
   }
 });
 
+// Токен доступа в каждом запросе к API
+axios.interceptors.request.use((config) => {
+  const token = localStorage.getItem('access_token');
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+// Истёкший access-токен обновляем по refresh-токену и повторяем запрос
+let refreshing = null;
+axios.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (
+      error.response?.status !== 401 ||
+      !refreshToken ||
+      original._retried ||
+      original.url.endsWith('/api/auth/refresh')
+    ) {
+      return Promise.reject(error);
+    }
+
+    original._retried = true;
+    try {
+      refreshing = refreshing || axios.post(`${API_URL}/api/auth/refresh`, {
+        refresh_token: refreshToken,
+      });
+      const response = await refreshing;
+      localStorage.setItem('access_token', response.data.access_token);
+      localStorage.setItem('refresh_token', response.data.refresh_token);
+      return axios(original);
+    } catch (refreshError) {
+      localStorage.removeItem('access_token');
+      localStorage.removeItem('refresh_token');
+      localStorage.removeItem('user_id');
+      localStorage.removeItem('user_data');
+      router.push('/login');
+      return Promise.reject(error);
+    } finally {
+      refreshing = null;
+    }
+  }
+);
+
 const app = createApp(App);
 app.use(router);
 app.mount('#app');